@@ -5,7 +5,12 @@ Provides the Discord commands and high-level validation of them.
 from __future__ import annotations
 
 import asyncio
+import inspect
+import os
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import partial
 
 import discord
 from discord import app_commands
@@ -14,46 +19,244 @@ from discord.ext import commands
 
 from models.deck import Color
 from models.game_state import GameError, Phase
-from repos.lobby_repo import LobbyRepository
-from services.game_service import GameService
+from repos.lobby_archive import LobbyArchive
+from repos.lobby_repo import DATA_DIR, LobbyRepository
+from repos.lobby_store import FsyncPolicy
+from services.bot_scheduler import BotScheduler
+from services.channel_actors import ChannelActors
+from services.discord_cache import DiscordCache
+from services.game_service import AfkSkip, GameService
+from services.game_workers import (
+    GameWorkerPool,
+    RemoteGameService,
+    RemoteLobbyService,
+)
 from services.lobby_service import LobbyService
+from services.timer_wheel import TimerWheel
 from utils.utils import require_channel_id
 from views.renderer import Renderer
 
 
+@dataclass
+class SoloTimerStats:
+    """
+    Counters for solo lobby timers, including the REST calls their messages cost.
+    """
+
+    lobbies: int = 0
+    expired: int = 0
+    rest_calls: int = 0
+
+    def rest_calls_per_lobby(self) -> float:
+        """
+        Returns the average number of REST calls made per solo lobby timer.
+        """
+        return self.rest_calls / self.lobbies if self.lobbies else 0.0
+
+
+@dataclass
+class RestoreStats:
+    """
+    Progress of restoring saved lobbies at startup.
+    """
+
+    total: int = 0
+    restored: int = 0
+    deleted: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    def done(self) -> int:
+        """
+        Returns how many lobbies have been dealt with so far.
+        """
+        return self.restored + self.deleted + self.failed
+
+
+# pylint: disable=too-many-instance-attributes
 class UnoCog(commands.Cog):
     """
     The UnoCog which provides Uno commands to the Discord bot and initializes the rest of the game
     state, views, and services.
     """
 
+    # AFK turns before a player is kicked, and channels updated at once after a timer tick.
+    afk_kick_after = 5
+    afk_fanout = 8
+    # Seconds a lobby with only its host waits for someone to join.
+    solo_timeout = 120
+    # Lobbies restored at once at startup, and how often progress is reported.
+    restore_concurrency = 8
+    restore_progress_every = 250
+
     def __init__(self, bot: commands.Bot):
         # Bot
         self.bot = bot
 
         # Repos
-        self.lobby_repo = LobbyRepository()
+        self.lobby_repo = LobbyRepository(
+            max_staleness=1.0,
+            fsync=FsyncPolicy.PER_FLUSH,
+            archive=LobbyArchive(DATA_DIR / "archive"),
+        )
 
         # Services
-        self.lobby_service = LobbyService(self.lobby_repo)
-        self.game_service = GameService(self.lobby_service)
+        self.bot_scheduler = BotScheduler()
+        self.worker_pool: GameWorkerPool | None = None
+        workers = int(os.getenv("UNO_GAME_WORKERS", "0"))
+        if workers > 0:
+            # Game logic runs in worker processes; this one keeps Discord work.
+            self.worker_pool = GameWorkerPool(
+                workers, channel_ids=self.lobby_repo.ids()
+            )
+            self.lobby_service = RemoteLobbyService(self.lobby_repo, self.worker_pool)
+            self.game_service = RemoteGameService(self.lobby_service)
+        else:
+            self.lobby_service = LobbyService(self.lobby_repo)
+            self.game_service = GameService(self.lobby_service, self.bot_scheduler)
+        self.actors = ChannelActors(self._render_channel)
+        self.discord_cache = DiscordCache(bot)
 
         # Initialize renderer
-        self._renderer = Renderer(self.lobby_service, self.game_service)
+        self._renderer = Renderer(
+            self.lobby_service, self.game_service, self.actors, self.discord_cache
+        )
+
+        # Solo timer, and the task updating each solo lobby's countdown message
+        self._solo_countdowns: dict[int, asyncio.Task] = {}
+        self.solo_stats = SoloTimerStats()
+        # Replay the AFK turns that timed out during downtime instead of resetting the timer.
+        self.catch_up_on_restore = os.getenv("UNO_CATCH_UP", "0") == "1"
+        self.timers = TimerWheel(self._on_timers)
+        self.restore_stats = RestoreStats()
+        self._restore_task: asyncio.Task | None = None
+        self._archive_task: asyncio.Task | None = None
 
-        # Solo timer
-        self._solo_lobby_timers: dict[int, asyncio.Task] = {}
-        self._afk_timers: dict[int, asyncio.Task] = {}
+    async def cog_unload(self) -> None:
+        """
+        Writes out lobby changes that haven't been flushed yet when the bot shuts down.
+        """
+        for task in (
+            self._restore_task,
+            self._archive_task,
+            *self._solo_countdowns.values(),
+        ):
+            if task is not None:
+                task.cancel()
+        await self.timers.close()
+        await self.actors.close()
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        await self.lobby_repo.flush_async()
+        self.lobby_repo.close()
 
     async def restore_persisted_lobbies(self) -> None:
         """
-        Rehydrates saved lobbies after the bot reconnects.
+        Rehydrates saved lobbies after the bot reconnects, most recently active first and
+        `restore_concurrency` at a time.
         """
         await self.bot.wait_until_ready()
 
-        for channel_id, lobby in list(self.lobby_repo.lobbies.items()):
-            if not await self._restore_lobby(channel_id, lobby):
-                self.lobby_repo.delete(channel_id)
+        # Games that finished long ago don't need restoring. Game workers own their lobbies'
+        # records, so with them this process leaves archiving alone.
+        if self.worker_pool is None:
+            await self.lobby_repo.archive_finished_async()
+        channel_ids = self.lobby_repo.by_recent_activity(self._owned_lobby_ids())
+        self.restore_stats = RestoreStats(total=len(channel_ids))
+        started = time.monotonic()
+
+        # Each lobby's requests go to its own channel's rate limit buckets one at a time, so
+        # bounding the lobbies in flight bounds the bot's request rate as a whole.
+        limit = asyncio.Semaphore(self.restore_concurrency)
+
+        async def restore(channel_id: int) -> None:
+            async with limit:
+                await self._restore_saved_lobby(channel_id)
+            self.restore_stats.seconds = time.monotonic() - started
+            if self.restore_stats.done() % self.restore_progress_every == 0:
+                self._report_restore_progress()
+
+        await asyncio.gather(*(restore(channel_id) for channel_id in channel_ids))
+        self._report_restore_progress()
+
+        if self.worker_pool is None:
+            self._archive_task = asyncio.create_task(self._archive_finished_lobbies())
+
+    async def _restore_saved_lobby(self, channel_id: int) -> None:
+        """
+        Restores or deletes one saved lobby on its channel's actor, so commands that arrive
+        meanwhile wait for it.
+        """
+        try:
+            lobby = self.lobby_repo.get(channel_id)
+        except KeyError:
+            self.restore_stats.deleted += 1
+            return
+
+        async def restore() -> bool:
+            if lobby.guild_id is None:
+                await self._record_guild(lobby)
+            return await self._restore_lobby(channel_id, lobby)
+
+        try:
+            restored = await self.actors.run(channel_id, restore)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Restore Error: {e}")
+            self.restore_stats.failed += 1
+            return
+
+        if restored:
+            self.restore_stats.restored += 1
+        else:
+            self.lobby_repo.delete(channel_id)
+            self.restore_stats.deleted += 1
+
+    def _report_restore_progress(self) -> None:
+        stats = self.restore_stats
+        rate = stats.done() / stats.seconds if stats.seconds else 0.0
+        print(
+            f"Restored {stats.done()}/{stats.total} lobbies ({stats.restored} restored, "
+            f"{stats.deleted} deleted, {stats.failed} failed, {rate:.1f}/s)"
+        )
+
+    def _owned_lobby_ids(self) -> list[int]:
+        """
+        Returns the lobbies this process restores: those whose guild is on one of its gateway
+        shards, or every lobby when the bot isn't sharded.
+        """
+        shard_count = self.bot.shard_count or 1
+        if shard_count <= 1:
+            return self.lobby_repo.ids()
+
+        shard_ids = getattr(self.bot, "shard_ids", None)
+        if shard_ids is None:
+            shard_ids = (
+                range(shard_count) if self.bot.shard_id is None else [self.bot.shard_id]
+            )
+        return sorted(
+            channel_id
+            for shard_id in shard_ids
+            for channel_id in self.lobby_repo.ids_in_shard(shard_id, shard_count)
+        )
+
+    async def _record_guild(self, lobby) -> None:
+        """
+        Fills in the guild of a lobby saved before guilds were recorded, so later restores go to
+        the shard that owns it.
+        """
+        channel = await self._get_channel(lobby.channel_id)
+        guild = getattr(channel, "guild", None)
+        if guild is not None:
+            lobby.guild_id = guild.id
+            self.lobby_service.save(lobby.channel_id)
+
+    async def _archive_finished_lobbies(self) -> None:
+        """
+        Periodically moves games that finished a while ago out of memory and into the archive.
+        """
+        while True:
+            await asyncio.sleep(60)
+            await self.lobby_repo.archive_finished_async()
 
     async def _restore_lobby(self, channel_id: int, lobby) -> bool:
         """
@@ -79,8 +282,12 @@ class UnoCog(commands.Cog):
 
         await self._clear_solo_timer_message(lobby)
 
+        details = None
         if lobby.game.phase() == Phase.PLAYING:
-            self._reset_restored_turn_timer(lobby)
+            if self.catch_up_on_restore:
+                details = await self._catch_up_restored_game(channel_id, lobby)
+            else:
+                self._reset_restored_turn_timer(lobby)
 
         try:
             await self._renderer.update_by_message_id(
@@ -92,9 +299,24 @@ class UnoCog(commands.Cog):
         if lobby.game.phase() == Phase.PLAYING:
             self.start_afk_timer(channel_id, lobby)
 
-        await self._send_restore_notice(lobby)
+        await self._send_restore_notice(lobby, details)
         return True
 
+    async def _render_channel(self, channel_id: int) -> None:
+        """
+        Re-renders a channel's main message after its actor has applied a batch of commands.
+        """
+        try:
+            lobby = self.lobby_service.get_lobby(channel_id)
+        except GameError:
+            # The batch deleted the lobby.
+            return
+
+        if lobby.main_message is not None:
+            await self._renderer.update_by_message_id(
+                self.bot, channel_id, lobby.main_message, lobby
+            )
+
     async def _get_channel(self, channel_id: int | None):
         """
         Gets a Discord channel from cache or the API.
@@ -102,18 +324,15 @@ class UnoCog(commands.Cog):
         if channel_id is None:
             return None
 
-        channel = self.bot.get_channel(channel_id)
-        if channel is not None:
-            return channel
-
         try:
-            return await self.bot.fetch_channel(channel_id)
+            return await self.discord_cache.channel(channel_id)
         except (discord.NotFound, discord.Forbidden, discord.HTTPException):
             return None
 
-    async def _send_restore_notice(self, lobby) -> None:
+    async def _send_restore_notice(self, lobby, details: str | None = None) -> None:
         """
-        Notifies the channel when a saved lobby or game has been restored.
+        Notifies the channel when a saved lobby or game has been restored, followed by `details`
+        of what happened while the bot was offline.
         """
         channel = await self._get_channel(lobby.channel_id)
         if channel is None:
@@ -125,6 +344,8 @@ class UnoCog(commands.Cog):
             message = "Game reinstated. Saved state restored after the bot restarted."
         else:
             message = "Saved state restored after the bot restarted."
+        if details:
+            message = f"{message}\n{details}"
 
         try:
             await channel.send(message)
@@ -142,6 +363,27 @@ class UnoCog(commands.Cog):
             return dt_value.replace(tzinfo=timezone.utc)
         return dt_value.astimezone(timezone.utc)
 
+    async def _catch_up_restored_game(self, channel_id: int, lobby) -> str | None:
+        """
+        Applies the AFK turns that timed out while the bot was offline in one pass, and returns a
+        summary of them for the restore notice.
+        """
+        try:
+            skips = await self.actors.run(
+                channel_id,
+                partial(
+                    self.game_service.catch_up,
+                    channel_id,
+                    datetime.now(timezone.utc),
+                    self.afk_kick_after,
+                ),
+            )
+        except GameError as e:
+            print(f"Catch-up Error: {e}")
+            self._reset_restored_turn_timer(lobby)
+            return None
+        return self._renderer.game_views.catch_up_summary(skips, lobby.game)
+
     def _reset_restored_turn_timer(self, lobby) -> None:
         """
         Gives the current player a fresh AFK window after a bot restart.
@@ -149,7 +391,7 @@ class UnoCog(commands.Cog):
         lobby.game.state["afk_deadline"] = datetime.now(timezone.utc) + timedelta(
             seconds=60
         )
-        self.lobby_service.save()
+        self.lobby_service.save(lobby.channel_id)
 
     @app_commands.command(name="create", description="Create a lobby in this channel.")
     async def create(self, interaction: discord.Interaction) -> None:
@@ -161,7 +403,15 @@ class UnoCog(commands.Cog):
         cid = require_channel_id(interaction)
 
         try:
-            lobby = self.lobby_service.create_lobby(cid, interaction.user)
+            lobby = await self.actors.run(
+                cid,
+                partial(
+                    self.lobby_service.create_lobby,
+                    cid,
+                    interaction.user,
+                    interaction.guild_id,
+                ),
+            )
         except GameError as e:
             embed = self._renderer.lobby_views.error_embed(
                 "Lobby Exists" if e.title == "" else e.title, str(e)
@@ -181,7 +431,7 @@ class UnoCog(commands.Cog):
             pass
 
         lobby.channel_id = cid
-        self.lobby_service.save()
+        self.lobby_service.save(cid)
         self.restart_solo_lobby_timer(lobby, reset_deadline=True)
 
     @app_commands.command(
@@ -192,65 +442,10 @@ class UnoCog(commands.Cog):
         """
         Sends a tutorial embed explaining how to use the UNO bot.
         """
-        embed = discord.Embed(
-            title="UNO Bot Tutorial",
-            description="Learn how to start, play, and win a game of UNO using this bot.",
-            color=discord.Color.blue(),
-        )
-
-        embed.add_field(
-            name="Goal",
-            value="Be the first player to get rid of all your cards.",
-            inline=False,
-        )
-
-        embed.add_field(
-            name="How to Start",
-            value="Use `/create` to create a lobby and `/join` to join the game.",
-            inline=False,
-        )
-
-        embed.add_field(
-            name="How to Play",
-            value=(
-                "On your turn, use `/play <card_index> <color>` to play a card from your "
-                "hand. `card_index` is the number shown in your hand view. `color` is only "
-                "needed for wild cards. You can play a card that matches the current color "
-                "or number. If you cannot play, draw a card."
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="Calling UNO",
-            value=(
-                "When you are down to one card, you should call UNO. Make sure to follow "
-                "normal UNO gameplay rules during the match."
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="Useful Commands",
-            value=(
-                "`/create` — create a game lobby\n"
-                "`/join` — join a game\n"
-                "`/play` — play a card on your turn\n"
-                "`/leave` — leave the game\n"
-                "`/help` — view command help\n"
-                "`/tutorial` — show this tutorial"
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="How to Win",
-            value="The first player with no cards left wins the game.",
-            inline=False,
+        await interaction.response.send_message(
+            embed=self._renderer.help_views.tutorial_embed()
         )
 
-        await interaction.response.send_message(embed=embed)
-
     @app_commands.command(
         name="help",
         description="Show a quick reference for the main bot commands.",
@@ -259,45 +454,10 @@ class UnoCog(commands.Cog):
         """
         Sends a help embed listing the main UNO bot commands.
         """
-        embed = discord.Embed(
-            title="UNO Bot Command Reference",
-            description=(
-                "Use `/tutorial` if you want the full gameplay guide. "
-                "Use this command for a quick list of what the bot can do."
-            ),
-            color=discord.Color.green(),
-        )
-
-        embed.add_field(
-            name="Lobby Commands",
-            value=(
-                "`/create` — create a game lobby\n"
-                "`/join` — join an existing game\n"
-                "`/leave` — leave the current lobby or game"
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="Gameplay Commands",
-            value=(
-                "`/play <card_index> <color>` — play a card on your turn\n"
-                "`/kick` — host removes a player from the game"
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="Help Commands",
-            value=(
-                "`/tutorial` — show the full UNO tutorial and gameplay guide\n"
-                "`/help` — show this quick command reference"
-            ),
-            inline=False,
+        await interaction.response.send_message(
+            embed=self._renderer.help_views.help_embed()
         )
 
-        await interaction.response.send_message(embed=embed)
-
     @app_commands.command(
         name="play",
         description="Play a card from your hand on your turn (index starts at 0).",
@@ -331,7 +491,6 @@ class UnoCog(commands.Cog):
 
         try:
             lobby = self.lobby_service.get_lobby(cid)
-            main_msg_id = lobby.main_message
 
             if card_index is None:
                 raise GameError(
@@ -340,11 +499,17 @@ class UnoCog(commands.Cog):
                     private=True,
                 )
 
-            self.game_service.play_card(
+            # The actor re-renders the main game embed once the card is played.
+            await self.actors.run(
                 cid,
-                interaction.user.id,
-                card_index,
-                Color[color.value.upper()] if color else None,
+                partial(
+                    self.game_service.play_card_async,
+                    cid,
+                    interaction.user.id,
+                    card_index,
+                    Color[color.value.upper()] if color else None,
+                ),
+                render=True,
             )
 
         except GameError as e:
@@ -356,9 +521,6 @@ class UnoCog(commands.Cog):
             await interaction.followup.send(embeds=[embed], ephemeral=e.private)
             return
 
-        # update the main game embed
-        await self._renderer.update_by_message_id(self.bot, cid, main_msg_id, lobby)
-
         # notify next player
         await self.dm_current_player_turn(lobby, cid)
 
@@ -369,9 +531,7 @@ class UnoCog(commands.Cog):
         await interaction.followup.send("Successfully played card!", ephemeral=True)
 
         # send updated hand DM
-        bot = interaction.client
         guild = interaction.guild.id
-        user = await bot.fetch_user(interaction.user.id)
         hand = lobby.game.hand(interaction.user.id)
 
         embed = self._renderer.hand_views.hand_embed(
@@ -381,7 +541,7 @@ class UnoCog(commands.Cog):
         )
 
         try:
-            await user.send(embed=embed)
+            await self.discord_cache.send_dm(interaction.user.id, embed=embed)
         except (discord.Forbidden, discord.HTTPException):
             pass
 
@@ -438,7 +598,11 @@ class UnoCog(commands.Cog):
                     "You are not in this game.", private=True, title="Not In Game"
                 )
 
-            phase = self.game_service.leave_player(cid, interaction.user.id)
+            phase = await self.actors.run(
+                cid,
+                partial(self.game_service.leave_player, cid, interaction.user.id),
+                render=True,
+            )
 
         except GameError as e:
             embed = self._renderer.lobby_views.error_embed(
@@ -453,10 +617,6 @@ class UnoCog(commands.Cog):
         if channel:
             await channel.send(f"<@{interaction.user.id}> has left the game.")
 
-        await self._renderer.update_by_message_id(
-            self.bot, cid, lobby.main_message, lobby
-        )
-
         if phase == Phase.LOBBY:
             self.restart_solo_lobby_timer(lobby, reset_deadline=True)
 
@@ -479,33 +639,39 @@ class UnoCog(commands.Cog):
         game = lobby.game
 
         try:
-            self.game_service.kick_player(cid, player_id)
-
-            await self._renderer.update_by_message_id(
-                self.bot, cid, lobby.main_message, lobby
+            await self.actors.run(
+                cid, partial(self.game_service.kick_player, cid, player_id), render=True
             )
 
-            try:
-                user = await self.bot.fetch_user(player_id)
-                if afk:
-                    await user.send(
-                        "You were kicked from the UNO game for being AFK 5 times."
-                    )
-                else:
-                    await user.send("You were kicked from the UNO game.")
-            except (discord.Forbidden, discord.HTTPException):
-                pass
+            await self._announce_kick(cid, player_id, game, afk=afk)
+        except GameError as e:
+            print(f"Kick Error: {e}")
 
-            channel = self.bot.get_channel(cid)
-            if channel and afk:
-                await channel.send(f"<@{player_id}> has been kicked for being AFK.")
+    async def _announce_kick(
+        self, channel_id: int, player_id: int, game, afk: bool = False
+    ) -> None:
+        """
+        Tells a kicked player and their channel, and the channel if the kick ended the game.
+        """
+        try:
+            if afk:
+                await self.discord_cache.send_dm(
+                    player_id,
+                    "You were kicked from the UNO game for being AFK 5 times.",
+                )
+            else:
+                await self.discord_cache.send_dm(
+                    player_id, "You were kicked from the UNO game."
+                )
+        except (discord.Forbidden, discord.HTTPException):
+            pass
 
-            if game.phase() == Phase.FINISHED and channel:
-                if channel:
-                    await channel.send("Game ended due to a lack of players.")
+        channel = self.bot.get_channel(channel_id)
+        if channel and afk:
+            await channel.send(f"<@{player_id}> has been kicked for being AFK.")
 
-        except GameError as e:
-            print(f"Kick Error: {e}")
+        if game.phase() == Phase.FINISHED and channel:
+            await channel.send("Game ended due to a lack of players.")
 
     async def dm_current_player_turn(self, lobby, channel_id: int) -> None:
         """
@@ -532,104 +698,102 @@ class UnoCog(commands.Cog):
         )
 
         try:
-            user = await self.bot.fetch_user(current)
-            await user.send(f"🎮 It's your turn!\nLink to Game: {link}")
+            await self.discord_cache.send_dm(
+                current, f"🎮 It's your turn!\nLink to Game: {link}"
+            )
         except discord.Forbidden:
             pass
 
-    async def run_afk_timer(
-        self,
-        channel_id: int,
-        player_id: int,
-        start_turn_count: int,
-        delay_seconds: float,
-    ):
+    async def _on_timers(self, expired: list) -> None:
+        """
+        Handles the timers that fell due in one tick of the timer wheel.
+        """
+        turns, jobs = [], []
+        for (kind, channel_id), value in expired:
+            if kind == "afk":
+                turns.append((channel_id, *value))
+            elif kind == "solo":
+                jobs.append(self._expire_solo_lobby(channel_id, value))
+        if turns:
+            jobs.append(self._expire_afk_turns(turns))
+        for result in await asyncio.gather(*jobs, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"Timer Error: {result}")
+
+    async def _expire_afk_turns(self, turns: list[tuple[int, int, int]]) -> None:
+        """
+        Skips every player whose turn timed out in one tick, kicking those who have been AFK
+        `afk_kick_after` times. Channels whose actor is idle are changed in one pass and saved
+        together; the rest queue behind their actor's commands. Channels are then updated on
+        Discord, at most `afk_fanout` at a time.
+        """
+        idle = [turn for turn in turns if not self.actors.busy(turn[0])]
+        queued = [turn for turn in turns if self.actors.busy(turn[0])]
+
+        skips = self.game_service.skip_afk_turns(idle, self.afk_kick_after)
+        if inspect.isawaitable(skips):
+            skips = await skips
+        replies = await asyncio.gather(
+            *(
+                self.actors.run(
+                    turn[0],
+                    partial(
+                        self.game_service.skip_afk_turns, [turn], self.afk_kick_after
+                    ),
+                )
+                for turn in queued
+            ),
+            return_exceptions=True,
+        )
+        for reply in replies:
+            if isinstance(reply, Exception):
+                print(f"AFK Timer Error: {reply}")
+            else:
+                skips.update(reply)
+
+        limit = asyncio.Semaphore(self.afk_fanout)
+
+        async def announce(channel_id: int, skip: AfkSkip) -> None:
+            async with limit:
+                await self._announce_afk_skip(channel_id, skip)
+
+        results = await asyncio.gather(
+            *(announce(channel_id, skip) for channel_id, skip in skips.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"AFK Timer Error: {result}")
+
+    async def _announce_afk_skip(self, channel_id: int, skip: AfkSkip) -> None:
         """
-        Skips a player's turn if they don't play in 60 seconds.
-        Kicks them if they've been AFK 5 times.
+        Re-renders a channel after its current player was skipped for being AFK, tells the
+        channel, and sets the next turn's AFK timer.
         """
-        await asyncio.sleep(max(delay_seconds, 0))
-
         try:
             lobby = self.lobby_service.get_lobby(channel_id)
-            game = lobby.game
         except GameError:
             return
+        game = lobby.game
 
-        if game.phase().name != "PLAYING":
-            return
-
-        if (
-            game.current_player() == player_id
-            and game.state["turn_count"] == start_turn_count
-        ):
-            try:
-                result = game.draw_and_pass(player_id)
-
-                # update last move
-                lobby.last_move = {
-                    "type": "draw",
-                    "player": player_id,
-                    "count": len(result.drawn),
-                }
-
-                # increment AFK count
-                game.state["afk_counts"][player_id] = (
-                    game.state["afk_counts"].get(player_id, 0) + 1
-                )
-                afk_count = game.state["afk_counts"][player_id]
-                self.lobby_service.save()
-
-                channel = self.bot.get_channel(channel_id)
-                if channel and afk_count <= 4:
-                    if game.phase() == Phase.FINISHED and game.ended_in_draw():
-                        message = (
-                            f" <@{player_id}> was AFK. No cards were available to draw, "
-                            "so the game ended in a draw."
-                        )
-                    elif len(result.drawn) == 0:
-                        message = (
-                            f" <@{player_id}> was AFK. No cards were available to draw, "
-                            "and their turn was skipped."
-                        )
-                    elif len(result.drawn) == 1:
-                        message = f" <@{player_id}> was AFK. They drew 1 card and were skipped."
-                    else:
-                        message = (
-                            f" <@{player_id}> was AFK. They drew {len(result.drawn)} cards "
-                            "and were skipped."
-                        )
-                    await channel.send(message)
-
-                    await self._renderer.update_by_message_id(
-                        self.bot, channel_id, lobby.main_message, lobby
-                    )
-
-                # auto kick if afk 5 times
-                if afk_count >= 5 and game.phase() == Phase.PLAYING:
-                    await self._kick_player(
-                        lobby, player_id, afk=True, channel_id=channel_id
-                    )
-                    return
+        await self.actors.run(channel_id, lambda: None, render=True)
 
-            except GameError as e:
-                print(f"AFK Timer Error: {e}")
+        channel = self.bot.get_channel(channel_id)
+        if skip.kicked:
+            await self._announce_kick(channel_id, skip.player_id, game, afk=True)
+        elif channel and skip.afk_count < self.afk_kick_after:
+            await channel.send(self._renderer.game_views.afk_skip_message(skip, game))
 
-        # restart timer
-        if game.phase().name == "PLAYING":
+        if game.phase() == Phase.PLAYING:
             self.start_afk_timer(channel_id, lobby)
 
     def start_afk_timer(self, channel_id: int, lobby) -> None:
-        """Starts an AFK timer task for the current player."""
+        """Sets the AFK deadline of the current player's turn, replacing the last turn's."""
         game = lobby.game
 
         if game.phase().name != "PLAYING":
             return
 
-        existing = self._afk_timers.get(channel_id)
-        if existing and not existing.done():
-            existing.cancel()
-
         deadline = game.afk_deadline()
         delay_seconds = 60.0
         if deadline is not None:
@@ -639,13 +803,10 @@ class UnoCog(commands.Cog):
                 0.0,
             )
 
-        self._afk_timers[channel_id] = asyncio.create_task(
-            self.run_afk_timer(
-                channel_id,
-                game.current_player(),
-                game.turn_count(),
-                delay_seconds,
-            )
+        self.timers.schedule(
+            ("afk", channel_id),
+            delay_seconds,
+            (game.current_player(), game.turn_count()),
         )
 
     async def _clear_solo_timer_message(self, lobby, clear_deadline: bool = True):
@@ -656,163 +817,159 @@ class UnoCog(commands.Cog):
 
         if channel is not None and lobby.solo_timer_message is not None:
             try:
-                timer_msg = await channel.fetch_message(lobby.solo_timer_message)
-                await timer_msg.delete()
+                self.solo_stats.rest_calls += 1
+                await channel.get_partial_message(lobby.solo_timer_message).delete()
             except (discord.NotFound, discord.Forbidden, discord.HTTPException):
                 pass
 
         lobby.solo_timer_message = None
         if clear_deadline:
             lobby.solo_expires_at = None
-        self.lobby_service.save()
+        self.lobby_service.save(lobby.channel_id)
+
+    @staticmethod
+    def _solo_timer_embed(expires_at: datetime) -> discord.Embed:
+        """
+        Builds the countdown embed. Discord counts the relative timestamp down on each client,
+        so the message never needs editing.
+        """
+        return discord.Embed(
+            title="⏳ Solo Lobby Timer",
+            description=(
+                f"Lobby expires {discord.utils.format_dt(expires_at, style='R')} "
+                "if nobody joins."
+            ),
+            color=discord.Color.orange(),
+        )
 
-    async def _get_or_create_solo_timer_message(self, lobby):
+    async def _show_solo_countdown(self, lobby) -> None:
         """
-        Fetches the solo timer message, or creates it if missing.
+        Shows a solo lobby's deadline, editing its countdown message if it has one and sending
+        one otherwise.
         """
+        if not lobby.main_message or lobby.solo_expires_at is None:
+            return
         channel = await self._get_channel(lobby.channel_id)
         if channel is None:
-            return None
+            return
 
+        embed = self._solo_timer_embed(lobby.solo_expires_at)
         if lobby.solo_timer_message is not None:
             try:
-                return await channel.fetch_message(lobby.solo_timer_message)
+                self.solo_stats.rest_calls += 1
+                await channel.get_partial_message(lobby.solo_timer_message).edit(
+                    embed=embed
+                )
+                return
             except (discord.NotFound, discord.Forbidden, discord.HTTPException):
                 lobby.solo_timer_message = None
-                self.lobby_service.save()
 
-        timer_msg = await channel.send(
-            embed=discord.Embed(
-                title="⏳ Solo Lobby Timer",
-                description="Lobby expires in **120** seconds if nobody joins.",
-                color=discord.Color.orange(),
-            )
-        )
+        try:
+            self.solo_stats.rest_calls += 1
+            timer_msg = await channel.send(embed=embed)
+        except (discord.Forbidden, discord.HTTPException) as e:
+            print(f"Solo lobby timer error: {e}")
+            return
         lobby.solo_timer_message = timer_msg.id
-        self.lobby_service.save()
-        return timer_msg
+        self.lobby_service.save(lobby.channel_id)
 
-    async def _run_solo_timer_tick(self, lobby, timer_msg):
+    async def _expire_solo_lobby(self, channel_id: int, expires_at: datetime) -> None:
         """
-        Updates the solo timer once and returns the next action to take.
+        Disbands a solo lobby whose deadline passed without anyone joining, marks its countdown
+        as expired and deletes the lobby's main message.
         """
-        if len(lobby.game.players()) > 1 or lobby.game.phase() != Phase.LOBBY:
-            await self._clear_solo_timer_message(lobby)
-            return timer_msg, "stop"
-
-        if lobby.solo_expires_at is None:
-            lobby.solo_expires_at = datetime.now(timezone.utc) + timedelta(seconds=120)
-            self.lobby_service.save()
-
-        lobby.solo_expires_at = self._normalize_utc(lobby.solo_expires_at)
-        remaining = int(
-            (lobby.solo_expires_at - datetime.now(timezone.utc)).total_seconds()
-        )
-
-        if remaining <= 0:
-            return timer_msg, "expire"
-
-        minutes, seconds = divmod(remaining, 60)
-        timer_embed = discord.Embed(
-            title="⏳ Solo Lobby Timer",
-            description=f"Lobby expires in **{minutes}:{seconds:02d}** if nobody joins.",
-            color=discord.Color.orange(),
-        )
-
         try:
-            await timer_msg.edit(embed=timer_embed)
-        except (discord.NotFound, discord.Forbidden, discord.HTTPException):
-            timer_msg = await self._get_or_create_solo_timer_message(lobby)
-            if timer_msg is None:
-                return None, "stop"
-
-        await asyncio.sleep(1)
-        return timer_msg, "continue"
-
-    async def start_solo_lobby_timer(self, lobby):
-        """
-        Starts a solo lobby timer for a lobby with only one player.
-        Sends a separate countdown embed. Replaces it with a "Lobby expired" embed
-        when timer ends and deletes the main lobby embed.
-        """
+            lobby = self.lobby_service.get_lobby(channel_id)
+        except GameError:
+            return
         if (
-            lobby.channel_id is None
-            or not getattr(lobby, "main_message", None)
-            or lobby.game.phase() != Phase.LOBBY
+            lobby.game.phase() != Phase.LOBBY
+            or len(lobby.game.players()) != 1
+            or lobby.solo_expires_at != expires_at
         ):
+            # Someone joined, or the deadline moved, after this timer was set.
             return
 
-        try:
-            timer_msg = await self._get_or_create_solo_timer_message(lobby)
-        except (discord.Forbidden, discord.HTTPException):
-            return
-
-        if timer_msg is None:
+        channel = await self._get_channel(channel_id)
+        if channel is None:
             return
 
         try:
-            while True:
-                timer_msg, next_action = await self._run_solo_timer_tick(
-                    lobby, timer_msg
-                )
-                if next_action == "continue":
-                    continue
-                if next_action == "stop":
-                    return
-                break
-
-            channel = await self._get_channel(lobby.channel_id)
-            if channel is None:
-                return
-
-            self.lobby_service.disband_lobby(lobby.channel_id, lobby.user)
-
-            timer_embed = discord.Embed(
-                title="🕒 Lobby Expired",
-                description="The solo lobby has expired due to inactivity.",
-                color=discord.Color.orange(),
+            await self.actors.run(
+                channel_id,
+                partial(self.lobby_service.disband_lobby, channel_id, lobby.user),
             )
+        except GameError as e:
+            print(f"Solo lobby timer error: {e}")
+            return
+        self.solo_stats.expired += 1
+
+        if lobby.solo_timer_message is not None:
             try:
-                await timer_msg.edit(embed=timer_embed)
+                self.solo_stats.rest_calls += 1
+                await channel.get_partial_message(lobby.solo_timer_message).edit(
+                    embed=discord.Embed(
+                        title="🕒 Lobby Expired",
+                        description="The solo lobby has expired due to inactivity.",
+                        color=discord.Color.orange(),
+                    )
+                )
             except discord.HTTPException:
                 pass
 
+        if lobby.main_message is not None:
             try:
-                main_msg = await channel.fetch_message(lobby.main_message)
-                await main_msg.delete()
+                self.solo_stats.rest_calls += 1
+                await channel.get_partial_message(lobby.main_message).delete()
             except (discord.NotFound, discord.HTTPException):
                 pass
 
-        except asyncio.CancelledError:
-            await self._clear_solo_timer_message(lobby)
-            raise
-
-        except (discord.HTTPException, discord.Forbidden, GameError) as e:
-            print(f"Solo lobby timer error: {e}")
-
     def restart_solo_lobby_timer(self, lobby, reset_deadline: bool = True):
         """
-        Starts the solo timer if there's 1 player, cancels it otherwise.
+        Starts the solo timer if there's 1 player, cancels it otherwise. The countdown is shown
+        once and the lobby expires from one entry in the timer wheel.
         """
         cid = lobby.channel_id
 
-        task = self._solo_lobby_timers.get(cid)
+        task = self._solo_countdowns.get(cid)
         if task and not task.done():
             task.cancel()
 
         if len(lobby.game.players()) == 1 and lobby.game.phase() == Phase.LOBBY:
             if reset_deadline or lobby.solo_expires_at is None:
                 lobby.solo_expires_at = datetime.now(timezone.utc) + timedelta(
-                    seconds=120
+                    seconds=self.solo_timeout
                 )
             else:
                 lobby.solo_expires_at = self._normalize_utc(lobby.solo_expires_at)
-            self.lobby_service.save()
-            self._solo_lobby_timers[cid] = asyncio.create_task(
-                self.start_solo_lobby_timer(lobby)
+            self.lobby_service.save(cid)
+
+            self.solo_stats.lobbies += 1
+            self.timers.schedule(
+                ("solo", cid),
+                (lobby.solo_expires_at - datetime.now(timezone.utc)).total_seconds(),
+                lobby.solo_expires_at,
             )
+            self._start_solo_task(cid, self._show_solo_countdown(lobby))
         else:
-            asyncio.create_task(self._clear_solo_timer_message(lobby))
+            self.timers.cancel(("solo", cid))
+            self._start_solo_task(cid, self._clear_solo_timer_message(lobby))
+
+    def _start_solo_task(self, channel_id: int, coro) -> None:
+        """
+        Runs a solo timer message update in the background, holding on to it until it finishes
+        and reporting what it raised.
+        """
+        task = asyncio.create_task(coro)
+        self._solo_countdowns[channel_id] = task
+
+        def finished(done: asyncio.Task) -> None:
+            if self._solo_countdowns.get(channel_id) is done:
+                del self._solo_countdowns[channel_id]
+            if not done.cancelled() and done.exception() is not None:
+                print(f"Solo lobby timer error: {done.exception()}")
+
+        task.add_done_callback(finished)
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -822,4 +979,7 @@ async def setup(bot: commands.Bot) -> None:
 
     cog = UnoCog(bot)
     await bot.add_cog(cog)
-    await cog.restore_persisted_lobbies()
+    # Restoring can take a while with many lobbies, so it runs after loading finishes.
+    cog._restore_task = asyncio.create_task(  # pylint: disable=protected-access
+        cog.restore_persisted_lobbies()
+    )
@@ -5,9 +5,19 @@ interaction according to various strategies.
 
 import random
 
+from collections.abc import Sequence
 from enum import Enum, auto
 
-from models.deck import Card, Color, Wild, DrawFourWild, can_play_card
+from models import policy
+from models.deck import (
+    COLORS,
+    Card,
+    Color,
+    Wild,
+    DrawFourWild,
+    can_play_card,
+    color_index,
+)
 
 
 class BotError(Exception):
@@ -25,13 +35,29 @@ class Strategy(Enum):
     """
 
     RANDOM = auto()
-
-
-def play_card(strategy: Strategy, hand: list[Card], top: Card):
+    COUNTING = auto()
+    POLICY = auto()
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def play_card(
+    strategy: Strategy,
+    hand: list[Card],
+    top: Card,
+    unseen: Sequence[int] | None = None,
+    rng: random.Random | None = None,
+    next_hand_size: int | None = None,
+):
     """
     Chooses a card from the hand provided according to the bot's strategy, returning it.
-    It returns None if it can't find any playable cards. Also randomly selects color for wilds.
+    It returns None if it can't find any playable cards. Also selects a color for wilds.
+
+    `unseen` is the read-only count vector of card faces the bot has not seen, as returned by
+    `GameState.unseen_cards`. Strategies that don't count cards ignore it. `rng` is used for random
+    choices so seeded games are reproducible; it defaults to the `random` module.
+    `next_hand_size` is how many cards the next player holds, used by the POLICY strategy.
     """
+    rng = rng or random
 
     valid_cards = []
     for i, card in enumerate(hand):
@@ -41,18 +67,77 @@ def play_card(strategy: Strategy, hand: list[Card], top: Card):
     if len(valid_cards) == 0:
         return (None, None)
 
+    colors = None
     if strategy == Strategy.RANDOM:
-        random.shuffle(valid_cards)
+        rng.shuffle(valid_cards)
         index = valid_cards[0]
+    elif strategy == Strategy.COUNTING:
+        index, colors = _counting_choice(hand, valid_cards, unseen)
+    elif strategy == Strategy.POLICY:
+        index, colors = _policy_choice(hand, valid_cards, top, unseen, next_hand_size)
     else:
         raise BotError("Invalid bot strategy chosen")
 
     card = hand[index]
 
     if isinstance(card, (Wild, DrawFourWild)):
-        colors = [Color.RED, Color.YELLOW, Color.BLUE, Color.GREEN]
-        random.shuffle(colors)
+        if colors is None:
+            colors = [Color.RED, Color.YELLOW, Color.BLUE, Color.GREEN]
+            rng.shuffle(colors)
         card.color = colors[0]
         return (index, card.color)
 
     return (index, None)
+
+
+def _counting_choice(
+    hand: list[Card], valid_cards: list[int], unseen: Sequence[int] | None
+) -> tuple[int, list[Color]]:
+    """
+    Plays toward the color opponents are least likely to hold: the fewer unseen cards of a color,
+    the less likely the next player can follow it. Wilds are kept for last and pick the color the
+    bot holds most of.
+    """
+    unseen_by_color = [
+        sum(unseen[i * 13 : (i + 1) * 13]) if unseen is not None else 0
+        for i in range(len(COLORS))
+    ]
+    held_by_color = [sum(1 for card in hand if card.color == color) for color in COLORS]
+
+    def score(i: int) -> tuple[int, int]:
+        card = hand[i]
+        if isinstance(card, (Wild, DrawFourWild)):
+            return (1, 0)
+        return (0, unseen_by_color[color_index(card.color)])
+
+    index = min(valid_cards, key=score)
+    colors = sorted(
+        COLORS,
+        key=lambda color: (
+            -held_by_color[color_index(color)],
+            unseen_by_color[color_index(color)],
+        ),
+    )
+    return index, colors
+
+
+def _policy_choice(
+    hand: list[Card],
+    valid_cards: list[int],
+    top: Card,
+    unseen: Sequence[int] | None,
+    next_hand_size: int | None,
+) -> tuple[int, list[Color]]:
+    """
+    Looks the move up in the trained policy table. Without a table, or in a state the table knows
+    nothing about, the bot plays like COUNTING.
+    """
+    table = policy.load_table(policy.default_path())
+    choice = None
+    if table is not None:
+        # Without a known hand size, assume the opponent still holds a starting hand.
+        size = next_hand_size if next_hand_size is not None else 7
+        choice = policy.choose(table, hand, valid_cards, top, size)
+    if choice is None:
+        return _counting_choice(hand, valid_cards, unseen)
+    return choice
@@ -0,0 +1,190 @@
+"""
+Provides vectorized evaluation of many bot decisions at once. Hands and top cards are encoded as
+face indices (see `models.deck.card_face`) so a whole batch of decisions can be scored with a few
+NumPy array operations instead of one Python loop per bot.
+
+NumPy is optional. Without it, `decide_batch` falls back to calling `bot.play_card` per decision.
+"""
+
+# pylint: disable=import-error
+
+from collections.abc import Sequence
+from dataclasses import replace
+
+from models import bot
+from models.deck import (
+    COLORS,
+    DRAW_FOUR_SYMBOL,
+    NUM_FACES,
+    WILD_FACE,
+    WILD_SYMBOL,
+    Card,
+    Color,
+    card_face,
+    color_index,
+    face_card,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - only hit when the bots extra is absent
+    np = None
+
+# Index used to pad hands to a common length. It has a color and symbol no top card can match.
+_PAD_FACE = NUM_FACES
+
+Decision = tuple[int | None, Color | None]
+
+
+def _face_tables():
+    colors = np.full(NUM_FACES + 1, 5, dtype=np.int8)
+    symbols = np.full(NUM_FACES + 1, 15, dtype=np.int8)
+    wild = np.zeros(NUM_FACES + 1, dtype=bool)
+
+    for face in range(NUM_FACES):
+        if face < WILD_FACE:
+            colors[face] = face // 13
+            symbols[face] = face % 13
+        else:
+            symbols[face] = WILD_SYMBOL if face == WILD_FACE else DRAW_FOUR_SYMBOL
+            wild[face] = True
+
+    return colors, symbols, wild
+
+
+_FACE_COLORS, _FACE_SYMBOLS, _FACE_WILD = (
+    _face_tables() if np is not None else (None, None, None)
+)
+_RNG = np.random.default_rng() if np is not None else None
+
+
+def _face_lookup() -> dict[tuple, int]:
+    # Keyed on (type, color, number) so encoding a card is one dict lookup. Wilds are listed under
+    # every color since a played wild keeps the color chosen for it.
+    lookup = {}
+    for face in range(NUM_FACES):
+        card = face_card(face)
+        colors = [None, *COLORS] if face >= WILD_FACE else [card.color]
+        for color in colors:
+            lookup[(type(card), color, getattr(card, "number", None))] = face
+    return lookup
+
+
+_FACES = _face_lookup()
+
+
+def _encode(card: Card) -> int:
+    try:
+        return _FACES[(type(card), card.color, getattr(card, "number", None))]
+    except KeyError:
+        return card_face(card)
+
+
+def encode_batch(hands: list[list[Card]], tops: list[Card]):
+    """
+    Encodes hands as an (N, H) array of faces padded with `_PAD_FACE`, and tops as two length N
+    arrays holding each top card's color index and symbol.
+    """
+    lengths = np.fromiter(map(len, hands), dtype=np.intp, count=len(hands))
+    flat = np.fromiter(
+        (_encode(card) for hand in hands for card in hand),
+        dtype=np.int8,
+        count=int(lengths.sum()),
+    )
+
+    # Scatter the flat faces into a padded matrix: row i holds its cards in columns 0..len-1.
+    faces = np.full((len(hands), max(int(lengths.max()), 1)), _PAD_FACE, dtype=np.int8)
+    rows = np.repeat(np.arange(len(hands)), lengths)
+    cols = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    faces[rows, cols] = flat
+
+    top_faces = np.fromiter(
+        (_encode(top) for top in tops), dtype=np.int8, count=len(tops)
+    )
+    top_colors = np.fromiter(
+        (color_index(top.color) for top in tops), dtype=np.int8, count=len(tops)
+    )
+
+    return faces, top_colors, _FACE_SYMBOLS[top_faces]
+
+
+def playable_mask(faces, top_colors, top_symbols):
+    """
+    Returns a boolean (N, H) array marking which encoded cards can be played on each top card. This
+    mirrors `models.deck.can_play_card`.
+    """
+    return (
+        _FACE_WILD[faces]
+        | (_FACE_COLORS[faces] == top_colors[:, None])
+        | (_FACE_SYMBOLS[faces] == top_symbols[:, None])
+    )
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+def decide_batch(
+    hands: list[list[Card]],
+    tops: list[Card],
+    strategy: bot.Strategy = bot.Strategy.RANDOM,
+    seed: int | None = None,
+    unseen: list[Sequence[int] | None] | None = None,
+    next_hand_sizes: list[int | None] | None = None,
+) -> list[Decision]:
+    """
+    Makes one decision per (hand, top) pair, returning `(index, color)` tuples with the same meaning
+    as `bot.play_card`. Unlike `bot.play_card`, hands are never modified. Only the RANDOM strategy
+    is vectorized; other strategies are evaluated one decision at a time, with `unseen` and
+    `next_hand_sizes` giving each decision's unseen card counts and next player's hand size.
+    """
+    if not hands:
+        return []
+
+    if np is None or strategy != bot.Strategy.RANDOM:
+        unseen = unseen if unseen is not None else [None] * len(hands)
+        sizes = next_hand_sizes if next_hand_sizes is not None else [None] * len(hands)
+        return [
+            _decide_one(strategy, hand, top, counts, size)
+            for hand, top, counts, size in zip(hands, tops, unseen, sizes)
+        ]
+
+    rng = _RNG if seed is None else np.random.default_rng(seed)
+    faces, top_colors, top_symbols = encode_batch(hands, tops)
+    playable = playable_mask(faces, top_colors, top_symbols)
+
+    # A uniform choice among the playable cards is the argmax of random scores over them.
+    scores = rng.random(faces.shape)
+    scores[~playable] = -1.0
+    indices = scores.argmax(axis=1)
+    has_move = playable.any(axis=1)
+    chosen_wild = _FACE_WILD[faces[np.arange(len(hands)), indices]]
+    colors = rng.integers(0, len(COLORS), len(hands))
+
+    return [
+        ((int(index), COLORS[color] if wild else None) if has else (None, None))
+        for index, has, wild, color in zip(
+            indices.tolist(), has_move.tolist(), chosen_wild.tolist(), colors.tolist()
+        )
+    ]
+
+
+def _decide_one(
+    strategy: bot.Strategy,
+    hand: list[Card],
+    top: Card,
+    unseen: Sequence[int] | None,
+    next_hand_size: int | None = None,
+) -> Decision:
+    # bot.play_card assigns the chosen color to wilds in the hand, so work on copies.
+    return bot.play_card(
+        strategy,
+        [replace(card) for card in hand],
+        top,
+        unseen,
+        next_hand_size=next_hand_size,
+    )
+
+
+def numpy_available() -> bool:
+    """
+    Returns whether the vectorized NumPy path is available.
+    """
+    return np is not None
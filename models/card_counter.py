@@ -0,0 +1,119 @@
+"""
+Provides incrementally maintained counts of the cards each player has not seen yet, which smarter
+bot strategies use to reason about what their opponents might be holding.
+"""
+
+from array import array
+
+from models.deck import NUM_FACES, WILD_FACE, DRAW_FOUR_FACE, Card, card_face
+
+
+def full_deck_counts() -> list[int]:
+    """
+    Returns how many copies of each face a default deck contains: one 0 and two of every other
+    colored face per color, and four of each wild.
+    """
+    counts = [0] * NUM_FACES
+    for face in range(WILD_FACE):
+        counts[face] = 1 if face % 13 == 0 else 2
+    counts[WILD_FACE] = 4
+    counts[DRAW_FOUR_FACE] = 4
+    return counts
+
+
+class UnseenCards:
+    """
+    Keeps, for every player, a count vector indexed by card face of the cards that player has not
+    seen. A card counts as seen by an observer while it is in their hand or in the discard pile, so
+    the counts are the full deck minus the observer's hand minus the discard pile.
+
+    The counts are updated in O(players) per event instead of being recomputed from the whole deck.
+    """
+
+    def __init__(self, hands: dict[int, list[Card]], discard: list[Card]):
+        self._counts: dict[int, array] = recount(hands, discard)
+
+    def view(self, observer: int) -> memoryview:
+        """
+        Returns a read-only view of an observer's counts, indexed by card face.
+        """
+        return memoryview(self._counts[observer]).toreadonly()
+
+    def observers(self) -> list[int]:
+        """
+        Returns the players whose counts are tracked.
+        """
+        return list(self._counts)
+
+    def on_play(self, player: int, card: Card) -> None:
+        """
+        Records that a player moved a card from their hand to the discard pile. Every other player
+        has now seen it.
+        """
+        face = card_face(card)
+        for observer, counts in self._counts.items():
+            if observer != player:
+                counts[face] -= 1
+
+    def on_draw(self, player: int, card: Card) -> None:
+        """
+        Records that a player drew a card into their hand.
+        """
+        counts = self._counts.get(player)
+        if counts is not None:
+            counts[card_face(card)] -= 1
+
+    def on_recycle(self, cards: list[Card]) -> None:
+        """
+        Records that cards left the discard pile for the draw pile, so nobody can see them anymore.
+        """
+        faces = [card_face(card) for card in cards]
+        for counts in self._counts.values():
+            for face in faces:
+                counts[face] += 1
+
+    def remove_observer(self, player: int) -> None:
+        """
+        Stops tracking a player, for example after they were kicked.
+        """
+        self._counts.pop(player, None)
+
+    def copy(self) -> "UnseenCards":
+        """
+        Returns a copy whose counts can change independently of these.
+        """
+        clone = UnseenCards.__new__(UnseenCards)
+        # pylint: disable-next=protected-access
+        clone._counts = {player: counts[:] for player, counts in self._counts.items()}
+        return clone
+
+
+def recount(hands: dict[int, list[Card]], discard: list[Card]) -> dict[int, array]:
+    """
+    Computes every observer's unseen counts from scratch. This is O(deck) per observer and is what
+    `UnseenCards` avoids doing each turn; it is also the reference for consistency checks.
+    """
+    base = full_deck_counts()
+    for card in discard:
+        base[card_face(card)] -= 1
+
+    counts = {}
+    for player, hand in hands.items():
+        player_counts = array("h", base)
+        for card in hand:
+            player_counts[card_face(card)] -= 1
+        counts[player] = player_counts
+
+    return counts
+
+
+def is_consistent(
+    unseen: UnseenCards, hands: dict[int, list[Card]], discard: list[Card]
+) -> bool:
+    """
+    Returns whether incrementally maintained counts match a full recount.
+    """
+    expected = recount(hands, discard)
+    if sorted(expected) != sorted(unseen.observers()):
+        return False
+    return all(unseen.view(player) == counts for player, counts in expected.items())
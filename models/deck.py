@@ -171,6 +171,87 @@ def can_play_card(top: Card, playing: Card) -> bool:
     return can_play
 
 
+COLORS = [Color.RED, Color.YELLOW, Color.BLUE, Color.GREEN]
+
+# Every distinct card face maps to a small integer so hands can be stored as compact arrays. Colored
+# faces are laid out as `color * 13 + symbol`, where symbols 0-9 are numbers followed by Skip,
+# DrawTwo and Reverse. The two wild faces come last.
+SKIP_SYMBOL = 10
+DRAW_TWO_SYMBOL = 11
+REVERSE_SYMBOL = 12
+WILD_SYMBOL = 13
+DRAW_FOUR_SYMBOL = 14
+WILD_FACE = 52
+DRAW_FOUR_FACE = 53
+NUM_FACES = 54
+NO_COLOR = 4
+
+
+def color_index(color: Color | None) -> int:
+    """
+    Returns the index of a color in `COLORS`, or `NO_COLOR` for an uncolored wild.
+    """
+    if color is None:
+        return NO_COLOR
+    return COLORS.index(color)
+
+
+def card_symbol(card: Card) -> int:
+    """
+    Returns the symbol of a card: its number, or one of the `*_SYMBOL` constants.
+    """
+    match card:
+        case Number(_, n) if 0 <= n <= 9:
+            return n
+        case Skip(_):
+            return SKIP_SYMBOL
+        case DrawTwo(_):
+            return DRAW_TWO_SYMBOL
+        case Reverse(_):
+            return REVERSE_SYMBOL
+        case Wild(_):
+            return WILD_SYMBOL
+        case DrawFourWild(_):
+            return DRAW_FOUR_SYMBOL
+
+    raise ValueError("Unknown card type")
+
+
+def card_face(card: Card) -> int:
+    """
+    Encodes a card as its face index in `range(NUM_FACES)`. Wilds encode to the same face whatever
+    color was chosen for them.
+    """
+    symbol = card_symbol(card)
+    if symbol == WILD_SYMBOL:
+        return WILD_FACE
+    if symbol == DRAW_FOUR_SYMBOL:
+        return DRAW_FOUR_FACE
+    return COLORS.index(card.color) * 13 + symbol
+
+
+def face_card(face: int) -> Card:
+    """
+    Decodes a face index produced by `card_face` into a new card.
+    """
+    if face == WILD_FACE:
+        return Wild()
+    if face == DRAW_FOUR_FACE:
+        return DrawFourWild()
+    if not 0 <= face < WILD_FACE:
+        raise ValueError("Unknown card face")
+
+    color = COLORS[face // 13]
+    symbol = face % 13
+    if symbol == SKIP_SYMBOL:
+        return Skip(color)
+    if symbol == DRAW_TWO_SYMBOL:
+        return DrawTwo(color)
+    if symbol == REVERSE_SYMBOL:
+        return Reverse(color)
+    return Number(color, symbol)
+
+
 def format_card(card: Card | None) -> str:
     """
     Formats the card with an appropriate emoji representing its color or type and the card name or
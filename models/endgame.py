@@ -0,0 +1,343 @@
+"""
+Provides an exact endgame solver for bots. When only two players are left holding a handful of
+cards, the bot searches the whole game tree instead of following its strategy: it maximizes its
+win probability on its own turns, minimizes it on the opponent's turns, and averages over the
+possible cards on draws (expectimax).
+
+The solver sees both hands. Draws are chance nodes weighted by the draw pile's composition, since
+the order of the pile is unknown. Uno penalties and discard recycling are not modelled; a draw
+from an empty pile simply draws nothing.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from models.deck import (
+    COLORS,
+    DRAW_FOUR_FACE,
+    DRAW_TWO_SYMBOL,
+    NUM_FACES,
+    REVERSE_SYMBOL,
+    SKIP_SYMBOL,
+    WILD_FACE,
+    Card,
+    Color,
+    card_face,
+    color_index,
+)
+
+# Positions with at most this many cards across both hands are solved exactly.
+MAX_CARDS = 10
+
+# The move a player makes: a card face and the color chosen for it (only used for wilds), or
+# `DRAW` to draw a card and pass.
+Move = tuple[int, int]
+DRAW: Move = (-1, -1)
+
+_WIN = 1.0
+_LOSS = 0.0
+_TIE = 0.5
+
+
+@dataclass
+class SolverStats:
+    """
+    Instrumentation for one or more searches.
+    """
+
+    nodes: int = 0
+    table_hits: int = 0
+    elapsed: float = 0.0
+    budget_exhausted: bool = False
+
+    @property
+    def nodes_per_sec(self) -> float:
+        """
+        Returns how many nodes were searched per second.
+        """
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class SolveResult:
+    """
+    The best move found for a position, its value as a win probability for the player to move,
+    and the instrumentation for the search.
+    """
+
+    move: Move
+    value: float
+    stats: SolverStats = field(default_factory=SolverStats)
+
+
+# pylint: disable=too-few-public-methods
+@dataclass(frozen=True)
+class Position:
+    """
+    A two player endgame position from the point of view of player 0. Hands are sorted tuples of
+    card faces and `pile` holds how many of each face remain in the draw pile.
+    """
+
+    hands: tuple[tuple[int, ...], tuple[int, ...]]
+    top_face: int
+    top_color: int
+    to_move: int
+    pile: tuple[int, ...]
+
+    def key(self, depth: int) -> bytes:
+        """
+        Returns a compact byte string identifying the position and remaining search depth.
+        """
+        return b"".join(
+            (
+                bytes(self.hands[0]),
+                b"\xff",
+                bytes(self.hands[1]),
+                bytes((0xFF, self.top_face, self.top_color, self.to_move, depth)),
+                bytes(self.pile),
+            )
+        )
+
+
+def _face_symbol(face: int) -> int:
+    return face % 13 if face < WILD_FACE else face
+
+
+def _playable(face: int, top_face: int, top_color: int) -> bool:
+    if face >= WILD_FACE:
+        return True
+    return face // 13 == top_color or _face_symbol(face) == _face_symbol(top_face)
+
+
+class EndgameSolver:
+    """
+    Searches endgame positions with expectimax, memoizing values in a bounded LRU transposition
+    table. Each search expands at most `node_budget` nodes; once the budget is spent remaining
+    positions are scored with a heuristic and the result is no longer exact.
+    """
+
+    def __init__(
+        self, node_budget: int = 5_000, table_size: int = 200_000, max_depth: int = 12
+    ):
+        self.node_budget = node_budget
+        self.table_size = table_size
+        self.max_depth = max_depth
+        self.total = SolverStats()
+        self._table: OrderedDict[bytes, float] = OrderedDict()
+        self._stats = SolverStats()
+
+    def solve(self, position: Position) -> SolveResult:
+        """
+        Finds the best move for the player to move in a position.
+        """
+        self._stats = SolverStats()
+        start = time.perf_counter()
+
+        best_move, best_value = DRAW, -1.0
+        player = position.to_move
+        for move in self._moves(position):
+            value = self._after_move(position, move, self.max_depth)
+            value = value if player == 0 else 1.0 - value
+            if value > best_value:
+                best_move, best_value = move, value
+
+        self._stats.elapsed = time.perf_counter() - start
+        self.total.nodes += self._stats.nodes
+        self.total.table_hits += self._stats.table_hits
+        self.total.elapsed += self._stats.elapsed
+        self.total.budget_exhausted |= self._stats.budget_exhausted
+
+        return SolveResult(best_move, best_value, self._stats)
+
+    def _value(self, position: Position, depth: int) -> float:
+        """
+        Returns player 0's win probability with `position.to_move` about to move.
+        """
+        if depth <= 0 or self._stats.nodes >= self.node_budget:
+            if depth > 0:
+                self._stats.budget_exhausted = True
+            return self._heuristic(position)
+
+        key = position.key(depth)
+        cached = self._table.get(key)
+        if cached is not None:
+            self._table.move_to_end(key)
+            self._stats.table_hits += 1
+            return cached
+
+        self._stats.nodes += 1
+        values = [
+            self._after_move(position, move, depth - 1)
+            for move in self._moves(position)
+        ]
+        value = max(values) if position.to_move == 0 else min(values)
+
+        if not self._stats.budget_exhausted:
+            if len(self._table) >= self.table_size:
+                self._table.popitem(last=False)
+            self._table[key] = value
+
+        return value
+
+    def _moves(self, position: Position) -> list[Move]:
+        # Drawing comes last so that, between equally good moves, playing a card wins ties.
+        hand = position.hands[position.to_move]
+        moves = []
+        for face in sorted(set(hand)):
+            if not _playable(face, position.top_face, position.top_color):
+                continue
+            if face >= WILD_FACE:
+                moves.extend((face, color) for color in range(len(COLORS)))
+            else:
+                moves.append((face, face // 13))
+        moves.append(DRAW)
+        return moves
+
+    def _after_move(self, position: Position, move: Move, depth: int) -> float:
+        player = position.to_move
+        other = 1 - player
+
+        if move == DRAW:
+            return self._draw(position, player, 1, other, depth, passing=True)
+
+        face, color = move
+        hand = list(position.hands[player])
+        hand.remove(face)
+        if not hand:
+            return _WIN if player == 0 else _LOSS
+
+        hands = (
+            (tuple(hand), position.hands[1])
+            if player == 0
+            else (position.hands[0], tuple(hand))
+        )
+        played = Position(hands, face, color, other, position.pile)
+
+        symbol = _face_symbol(face)
+        if symbol in (SKIP_SYMBOL, REVERSE_SYMBOL):
+            return self._value(_with_turn(played, player), depth)
+        if symbol == DRAW_TWO_SYMBOL:
+            return self._draw(played, other, 2, player, depth)
+        if face == DRAW_FOUR_FACE:
+            return self._draw(played, other, 4, player, depth)
+        return self._value(played, depth)
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def _draw(
+        self,
+        position: Position,
+        target: int,
+        count: int,
+        then: int,
+        depth: int,
+        passing: bool = False,
+    ) -> float:
+        """
+        Averages over the cards `target` may draw, one at a time, then hands the turn to `then`.
+        `passing` marks a draw and pass, which ends the game in a tie if nothing can be drawn and
+        nobody can play.
+        """
+        if self._stats.nodes >= self.node_budget:
+            self._stats.budget_exhausted = True
+            return self._heuristic(position)
+
+        total = sum(position.pile)
+        if count == 0 or total == 0:
+            if passing and total == 0 and not self._any_playable(position):
+                return _TIE
+            return self._value(_with_turn(position, then), depth)
+
+        value = 0.0
+        for face, copies in enumerate(position.pile):
+            if copies == 0:
+                continue
+            if self._stats.nodes >= self.node_budget:
+                self._stats.budget_exhausted = True
+                return self._heuristic(position)
+
+            self._stats.nodes += 1
+            pile = list(position.pile)
+            pile[face] -= 1
+            hand = tuple(sorted((*position.hands[target], face)))
+            hands = (
+                (hand, position.hands[1]) if target == 0 else (position.hands[0], hand)
+            )
+            drawn = Position(
+                hands, position.top_face, position.top_color, then, tuple(pile)
+            )
+            value += copies / total * self._draw(drawn, target, count - 1, then, depth)
+
+        return value
+
+    @staticmethod
+    def _any_playable(position: Position) -> bool:
+        return any(
+            _playable(face, position.top_face, position.top_color)
+            for hand in position.hands
+            for face in hand
+        )
+
+    @staticmethod
+    def _heuristic(position: Position) -> float:
+        # Fewer cards than the opponent is good; clamp well away from a certain result.
+        lead = len(position.hands[1]) - len(position.hands[0])
+        return min(max(_TIE + 0.08 * lead, 0.05), 0.95)
+
+
+def _with_turn(position: Position, to_move: int) -> Position:
+    return Position(
+        position.hands, position.top_face, position.top_color, to_move, position.pile
+    )
+
+
+def position_for(
+    hand: list[Card], opponent_hand: list[Card], top: Card, draw_pile: list[Card]
+) -> Position:
+    """
+    Builds the solver position with the owner of `hand` as player 0 and to move.
+    """
+    pile = [0] * NUM_FACES
+    for card in draw_pile:
+        pile[card_face(card)] += 1
+
+    return Position(
+        hands=(
+            tuple(sorted(card_face(c) for c in hand)),
+            tuple(sorted(card_face(c) for c in opponent_hand)),
+        ),
+        top_face=card_face(top),
+        top_color=color_index(top.color),
+        to_move=0,
+        pile=tuple(pile),
+    )
+
+
+def decide(
+    solver: EndgameSolver,
+    hand: list[Card],
+    opponent_hand: list[Card],
+    top: Card,
+    draw_pile: list[Card],
+) -> tuple[int | None, Color | None]:
+    """
+    Solves the position and returns the move in the `(index, color)` form used by
+    `bot.play_card`, where `(None, None)` means draw and pass.
+    """
+    result = solver.solve(position_for(hand, opponent_hand, top, draw_pile))
+    if result.move == DRAW:
+        return (None, None)
+
+    face, color = result.move
+    index = next(i for i, card in enumerate(hand) if card_face(card) == face)
+    return (index, COLORS[color] if face >= WILD_FACE else None)
+
+
+_SOLVER = EndgameSolver()
+
+
+def shared_solver() -> EndgameSolver:
+    """
+    Returns the solver shared by all games, so its transposition table is reused between turns.
+    """
+    return _SOLVER
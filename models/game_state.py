@@ -6,7 +6,7 @@ import random
 import time
 from datetime import datetime, timedelta, timezone
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Any
 from enum import Enum, auto
 
@@ -21,8 +21,10 @@ from models.deck import (
     Reverse,
     DrawTwo,
     Number,
+    card_face,
 )
-from models import bot
+from models import bot, endgame
+from models.card_counter import UnseenCards, is_consistent
 
 
 class Phase(Enum):
@@ -107,6 +109,13 @@ def _deal_starting_hands(
     return hands
 
 
+def _copy_cards(cards: list[Card]) -> list[Card]:
+    return [
+        replace(card) if isinstance(card, (Wild, DrawFourWild)) else card
+        for card in cards
+    ]
+
+
 # pylint: disable=too-many-public-methods
 class GameState:
     """
@@ -115,8 +124,8 @@ class GameState:
     accessor functions. Provides functions for modifying game state and progressing the game.
     """
 
-    def __init__(self) -> None:
-        self._rng = random.Random()
+    def __init__(self, seed: int | None = None) -> None:
+        self._rng = random.Random(seed)
         self.state: dict[str, Any] = self._new_state()
 
     def _new_state(self) -> dict[str, Any]:
@@ -124,9 +133,12 @@ class GameState:
             "phase": Phase.LOBBY,  # stores enum
             "players": [],  # stores discord user ids
             "bots": [],  # the indices of the users which are bots
+            "bot_strategies": {},  # bot user id -> bot.Strategy
+            "endgame_solver": True,  # whether bots solve small endgames exactly
             "hands": {},  # stores user id -> list with cards
             "deck": [],  # list with cards
             "discard": [],
+            "unseen": None,  # UnseenCards, created when the game starts
             "turn_index": 0,  # index representing which users turn it is
             "turn_count": 0,  # counter representing the current turn #
             "afk_deadline": None,  # AFK timer deadline (UTC datetime)
@@ -144,6 +156,33 @@ class GameState:
         """
         self.state = self._new_state()
 
+    def snapshot(self) -> "GameState":
+        """
+        Returns a copy that later changes to this game won't affect, so it can be serialized on
+        another thread. This is much cheaper than a deep copy: only the containers are copied,
+        along with wild cards since their color is changed in place.
+        """
+        rng = random.Random()
+        rng.setstate(self._rng.getstate())
+        copy = GameState.__new__(GameState)
+        copy._rng = rng  # pylint: disable=protected-access
+
+        state = dict(self.state)
+        state["players"] = list(state["players"])
+        state["bots"] = list(state["bots"])
+        # Games saved by older releases may lack the keys added since.
+        state["bot_strategies"] = dict(state.get("bot_strategies", {}))
+        state["afk_counts"] = dict(state["afk_counts"])
+        state["hands"] = {
+            user_id: _copy_cards(hand) for user_id, hand in state["hands"].items()
+        }
+        state["deck"] = _copy_cards(state["deck"])
+        state["discard"] = _copy_cards(state["discard"])
+        if state.get("unseen") is not None:
+            state["unseen"] = state["unseen"].copy()
+        copy.state = state
+        return copy
+
     # Getters
     def phase(self) -> Phase:
         """
@@ -185,6 +224,45 @@ class GameState:
         discard = self.state["discard"]
         return discard[-1] if discard else None
 
+    def unseen_cards(self, observer: int) -> memoryview:
+        """
+        Returns a read-only view, indexed by card face, of how many copies of each card the observer
+        has not seen (the deck minus their hand minus the discard pile).
+        """
+        return self._unseen().view(observer)
+
+    def unseen_cards_consistent(self) -> bool:
+        """
+        Checks the incrementally maintained unseen card counts against a full recount.
+        """
+        return is_consistent(self._unseen(), self.state["hands"], self.state["discard"])
+
+    def endgame_applicable(self) -> bool:
+        """
+        Returns whether bots should switch to the exact endgame solver: two players are left with at
+        most `endgame.MAX_CARDS` cards between them.
+        """
+        players = self.state["players"]
+        return (
+            self.state.get("endgame_solver", True)
+            and self.phase() == Phase.PLAYING
+            and len(players) == 2
+            and self.top_card() is not None
+            and sum(len(self.state["hands"][p]) for p in players) <= endgame.MAX_CARDS
+        )
+
+    def bot_strategy(self, user_id: int) -> bot.Strategy:
+        """
+        Returns the strategy a bot plays with.
+        """
+        return self.state.get("bot_strategies", {}).get(user_id, bot.Strategy.RANDOM)
+
+    def next_hand_size(self) -> int:
+        """
+        Returns how many cards the player after the current one holds.
+        """
+        return len(self.state["hands"][self._peek_next_player_id()])
+
     def turn_count(self) -> int:
         """
         Returns how many turns have passed.
@@ -258,6 +336,8 @@ class GameState:
         self.state["hands"].pop(user_id, None)
 
         self.state["afk_counts"].pop(user_id, None)
+        if self.state.get("unseen") is not None:
+            self.state["unseen"].remove_observer(user_id)
 
         # If only one player remains, end the game
         if len(players) <= 1:
@@ -274,9 +354,9 @@ class GameState:
         elif idx == turn_index:
             self.state["turn_index"] %= len(players)
 
-    def add_bot(self) -> None:
+    def add_bot(self, strategy: bot.Strategy = bot.Strategy.RANDOM) -> None:
         """
-        Adds a new bot to the game (with a negative user ID)
+        Adds a new bot to the game (with a negative user ID) which plays with the given strategy.
         """
         # Choose a new negative user ID less than any existing bot
         m = 0
@@ -284,6 +364,7 @@ class GameState:
             m = min(m, user_id)
 
         self.add_player(m - 1)
+        self.state.setdefault("bot_strategies", {})[m - 1] = strategy
 
     def start_game(self) -> None:
         """
@@ -297,6 +378,8 @@ class GameState:
         deck = Deck()
         deck.add_default_cards()
         draw_pile: list[Card] = list(deck.cards)
+        # Put the deck in a fixed order first so a seeded game always deals the same cards.
+        draw_pile.sort(key=card_face)
         self._rng.shuffle(draw_pile)
 
         hands = _deal_starting_hands(self.state["players"], draw_pile)
@@ -306,6 +389,7 @@ class GameState:
         self.state["hands"] = hands
         self.state["deck"] = draw_pile
         self.state["discard"] = discard_pile
+        self.state["unseen"] = UnseenCards(hands, discard_pile)
         self.state["turn_index"] = 0
         self.state["direction"] = Direction.CLOCKWISE
         self.state["winner"] = None
@@ -363,8 +447,12 @@ class GameState:
                 private=True,
             )
 
+        # Counts rebuilt for an older game must be taken before the card moves, or it is counted
+        # as played twice.
+        unseen = self._unseen()
         played = hand.pop(card_index)
         self.state["discard"].append(played)
+        unseen.on_play(user_id, played)
         self._start_uno_window_if_needed(user_id)
 
         res = PlayResult(
@@ -387,9 +475,13 @@ class GameState:
         res.next_player = self.current_player()
         return res
 
-    def play_bot(self):
+    def play_bot(
+        self, decision: tuple[int | None, Color | None] | None = None
+    ) -> tuple[int | None, Color | None]:
         """
-        Chooses a card for the bot to play based on a bot strategy and plays it with `play`.
+        Chooses a card for the bot to play based on a bot strategy and plays it with `play`. A
+        decision made elsewhere (for example by a batched scheduler) may be passed in instead, in
+        the `(index, color)` form returned by `bot.play_card`. Returns the decision that was played.
         """
         if not self.is_bot(self.current_player()):
             raise GameError("Current player isn't a bot")
@@ -398,13 +490,34 @@ class GameState:
         top = self.top_card()
 
         hand = self.state["hands"][user_id]
-        index, color = bot.play_card(bot.Strategy.RANDOM, hand, top)
+        if decision is None and self.endgame_applicable():
+            players = self.state["players"]
+            opponent = players[0] if players[1] == user_id else players[1]
+            decision = endgame.decide(
+                endgame.shared_solver(),
+                hand,
+                self.state["hands"][opponent],
+                top,
+                self.state["deck"],
+            )
+        if decision is None:
+            decision = bot.play_card(
+                self.bot_strategy(user_id),
+                hand,
+                top,
+                unseen=self.unseen_cards(user_id),
+                rng=self._rng,
+                next_hand_size=self.next_hand_size(),
+            )
+        index, color = decision
 
         if index is None:
             self.draw_and_pass(user_id)
         else:
             self.play(user_id, index, color)
 
+        return decision
+
     def draw_and_pass(self, user_id: int, amt: int = 1) -> DrawResult:
         """
         Adds `amt` cards to a user's hand and skips their turn. The game must be active.
@@ -538,6 +651,7 @@ class GameState:
         discard_pile: list[Card] = self.state["discard"]
         hand: list[Card] = self.state["hands"][user_id]
 
+        unseen = self._unseen()
         drawn: list[Card] = []
         for _ in range(count):
             card = self._draw_one(draw_pile, discard_pile)
@@ -545,6 +659,7 @@ class GameState:
                 break
             hand.append(card)
             drawn.append(card)
+            unseen.on_draw(user_id, card)
 
         return drawn
 
@@ -564,6 +679,7 @@ class GameState:
             if isinstance(c, (Wild, DrawFourWild)):
                 c.color = None
 
+        self._unseen().on_recycle(refill)
         self._rng.shuffle(refill)
         draw_pile.extend(refill)
 
@@ -587,6 +703,14 @@ class GameState:
         self.state["winner"] = None
         self.state["ended_in_draw"] = True
 
+    def _unseen(self) -> UnseenCards:
+        # Games saved before unseen cards were tracked get their counts rebuilt on first use.
+        if self.state.get("unseen") is None:
+            self.state["unseen"] = UnseenCards(
+                self.state["hands"], self.state["discard"]
+            )
+        return self.state["unseen"]
+
     def _dir_sign(self) -> int:
         return 1 if self.state["direction"] == Direction.CLOCKWISE else -1
 
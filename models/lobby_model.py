@@ -3,7 +3,7 @@ Provides a model to represent a lobby.
 """
 
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any
 
 from models.game_state import GameState
@@ -51,9 +51,13 @@ class LobbyUser:
 @dataclass
 class Lobby:
     """
-    A lobby, including the user that created it, the game state, and the message ID.
+    A lobby, including the user that created it, the game state, and the message ID. `guild_id` is
+    the guild the lobby's channel is in, which decides the gateway shard that owns it; lobbies
+    saved before it was recorded have None.
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     user: LobbyUser
     game: GameState
     main_message: int | None
@@ -61,3 +65,10 @@ class Lobby:
     last_move: Any | None = None
     solo_timer_message: int | None = None
     solo_expires_at: datetime | None = None
+    guild_id: int | None = None
+
+    def snapshot(self) -> "Lobby":
+        """
+        Returns a copy that later changes to this lobby won't affect. See `GameState.snapshot`.
+        """
+        return replace(self, game=self.game.snapshot())
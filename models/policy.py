@@ -0,0 +1,281 @@
+"""
+Provides the lookup table behind the POLICY bot strategy. Game states are reduced to a compact
+abstraction (how many cards of each color the bot holds, the top card's color and kind, and how
+many cards the next player holds) and the table stores a score for every move in every abstract
+state. The table is built offline from self-play by `tools.train_policy`.
+
+The table file is memory-mapped read-only, so every bot process on a machine shares one copy of
+its pages and a lookup is a couple of indexing operations.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from models.deck import (
+    COLORS,
+    NO_COLOR,
+    Card,
+    Color,
+    DrawFourWild,
+    DrawTwo,
+    Number,
+    Reverse,
+    Skip,
+    Wild,
+)
+
+# Kinds of card, in the order used by state and move indices.
+NUMBER_KIND = 0
+SKIP_KIND = 1
+DRAW_TWO_KIND = 2
+REVERSE_KIND = 3
+WILD_KIND = 4
+DRAW_FOUR_KIND = 5
+NUM_KINDS = 6
+
+# Held cards of each color are counted up to this many.
+COLOR_COUNT_CAP = 3
+# Upper bounds of the next player's hand size buckets: 1, 2, 3-4, 5-7 and 8 or more cards.
+HAND_SIZE_BUCKETS = (1, 2, 4, 7)
+
+NUM_TOPS = (len(COLORS) + 1) * NUM_KINDS
+NUM_STATES = (
+    (COLOR_COUNT_CAP + 1) ** len(COLORS) * NUM_TOPS * (len(HAND_SIZE_BUCKETS) + 1)
+)
+# Colored cards are one move per (color, kind); wilds are one move per chosen color.
+NUM_MOVES = len(COLORS) * WILD_KIND + 2 * len(COLORS)
+
+# Scores are unsigned 16 bit: 0 means the move was never seen in that state, otherwise higher is
+# better.
+UNSEEN_SCORE = 0
+MAX_SCORE = 0xFFFF
+
+_MAGIC = b"UNOPOL01"
+_HEADER = struct.Struct("<8sII")
+
+_KINDS = {
+    Number: NUMBER_KIND,
+    Skip: SKIP_KIND,
+    DrawTwo: DRAW_TWO_KIND,
+    Reverse: REVERSE_KIND,
+    Wild: WILD_KIND,
+    DrawFourWild: DRAW_FOUR_KIND,
+}
+_COLOR_INDICES = {color: i for i, color in enumerate(COLORS)}
+_COUNT_WEIGHTS = tuple((COLOR_COUNT_CAP + 1) ** i for i in range(len(COLORS)))
+_WILD_MOVES = {
+    WILD_KIND: len(COLORS) * WILD_KIND,
+    DRAW_FOUR_KIND: len(COLORS) * WILD_KIND + len(COLORS),
+}
+
+
+class PolicyError(Exception):
+    """
+    An error that occurs when a policy table file is missing or malformed.
+    """
+
+    def __init__(self, msg: str):
+        super().__init__(msg)
+
+
+def state_index(
+    color_counts: list[int], top_color: int, top_kind: int, next_hand_size: int
+) -> int:
+    """
+    Returns the abstract state index for the bot's held cards per color (wilds excluded), the top
+    card's color index and kind, and the next player's hand size.
+    """
+    counts = 0
+    for count, weight in zip(color_counts, _COUNT_WEIGHTS):
+        counts += (count if count < COLOR_COUNT_CAP else COLOR_COUNT_CAP) * weight
+    top = top_color * NUM_KINDS + top_kind
+    bucket = bisect_left(HAND_SIZE_BUCKETS, next_hand_size)
+    return (counts * NUM_TOPS + top) * (len(HAND_SIZE_BUCKETS) + 1) + bucket
+
+
+def move_index(kind: int, color: int) -> int:
+    """
+    Returns the move index for playing a card of the given kind. `color` is the card's color, or
+    the color chosen for a wild.
+    """
+    if kind < WILD_KIND:
+        return color * WILD_KIND + kind
+    return len(COLORS) * WILD_KIND + (kind - WILD_KIND) * len(COLORS) + color
+
+
+class PolicyTable:
+    """
+    A read-only, memory-mapped table of move scores with `NUM_MOVES` scores per state.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        try:
+            with self.path.open("rb") as table_file:
+                self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise PolicyError(f"Can't open policy table {self.path}: {e}") from e
+
+        if len(self._map) < _HEADER.size:
+            self._map.close()
+            raise PolicyError(f"{self.path} is not a policy table")
+        magic, states, moves = _HEADER.unpack_from(self._map)
+        expected = _HEADER.size + states * moves * 2
+        if (
+            magic != _MAGIC
+            or (states, moves) != (NUM_STATES, NUM_MOVES)
+            or len(self._map) != expected
+        ):
+            self._map.close()
+            raise PolicyError(
+                f"{self.path} was built for a different state abstraction; retrain it"
+            )
+
+        scores = memoryview(self._map)[_HEADER.size :]
+        if sys.byteorder == "little":
+            self._scores = scores.cast("H")
+        else:
+            # The file is little endian, so big endian hosts need their own swapped copy.
+            swapped = array("H", scores.tobytes())
+            swapped.byteswap()
+            scores.release()
+            self._scores = memoryview(swapped)
+
+    def score(self, state: int, move: int) -> int:
+        """
+        Returns the score of a move in a state, or `UNSEEN_SCORE` if training never saw it.
+        """
+        return self._scores[state * NUM_MOVES + move]
+
+    def row(self, state: int) -> memoryview:
+        """
+        Returns the scores of every move in a state, indexed by move.
+        """
+        start = state * NUM_MOVES
+        return self._scores[start : start + NUM_MOVES]
+
+    def close(self) -> None:
+        """
+        Unmaps the table. It can't be used afterwards.
+        """
+        self._scores.release()
+        self._map.close()
+
+
+def write_table(path: str | Path, scores) -> None:
+    """
+    Writes `NUM_STATES * NUM_MOVES` scores, state by state, as a policy table file. The file is
+    replaced atomically so running bots never map a half-written table.
+    """
+    data = array("H", scores)
+    if len(data) != NUM_STATES * NUM_MOVES:
+        raise PolicyError(f"Expected {NUM_STATES * NUM_MOVES} scores, got {len(data)}")
+    if sys.byteorder != "little":
+        data.byteswap()
+
+    path = Path(path)
+    # Each writer gets its own temporary file, so concurrent trainers can't mix their tables.
+    with NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as table_file:
+        table_file.write(_HEADER.pack(_MAGIC, NUM_STATES, NUM_MOVES))
+        data.tofile(table_file)
+        temp_path = Path(table_file.name)
+    temp_path.replace(path)
+
+
+_DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "policy.tbl"
+
+
+def default_path() -> str | Path:
+    """
+    Returns where the POLICY strategy looks for its table: `$UNO_POLICY_TABLE` if set, otherwise
+    `data/policy.tbl`.
+    """
+    return os.getenv("UNO_POLICY_TABLE") or _DEFAULT_PATH
+
+
+_tables: dict[str, tuple[int, PolicyTable]] = {}
+
+
+def load_table(path: str | Path) -> PolicyTable | None:
+    """
+    Maps the table at `path` once per version of the file, returning None if there is no usable
+    table. A table written after the last call, or replacing the mapped one, is picked up by the
+    next call.
+    """
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    key = str(path)
+    cached = _tables.get(key)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+
+    try:
+        table = PolicyTable(path)
+    except PolicyError:
+        return None
+    # The replaced table stays mapped until the bots still using it let go of it.
+    _tables[key] = (modified, table)
+    return table
+
+
+def clear_tables() -> None:
+    """
+    Forgets the tables mapped by `load_table`, so the next call maps them again.
+    """
+    _tables.clear()
+
+
+# pylint: disable=too-many-locals
+def choose(
+    table: PolicyTable,
+    hand: list[Card],
+    valid_cards: list[int],
+    top: Card,
+    next_hand_size: int,
+) -> tuple[int, list[Color]] | None:
+    """
+    Picks the best scored playable card, returning its index and the colors to choose for a wild
+    in order of preference. Returns None if the table has no score for any playable card.
+    """
+    # This runs on every POLICY decision, so it avoids helper calls in its loops.
+    held = [0] * len(COLORS)
+    for card in hand:
+        color = _COLOR_INDICES.get(card.color)
+        if color is not None and _KINDS[type(card)] < WILD_KIND:
+            held[color] += 1
+
+    top_color = _COLOR_INDICES.get(top.color, NO_COLOR)
+    state = state_index(held, top_color, _KINDS[type(top)], next_hand_size)
+    scores = table.row(state)
+
+    best_index, best_color, best_score = None, 0, UNSEEN_SCORE
+    for index in valid_cards:
+        card = hand[index]
+        kind = _KINDS[type(card)]
+        if kind < WILD_KIND:
+            color = _COLOR_INDICES[card.color]
+            score = scores[color * WILD_KIND + kind]
+            if score > best_score:
+                best_index, best_color, best_score = index, color, score
+            continue
+
+        first = _WILD_MOVES[kind]
+        for color in range(len(COLORS)):
+            score = scores[first + color]
+            if score > best_score:
+                best_index, best_color, best_score = index, color, score
+
+    if best_index is None:
+        return None
+    best = COLORS[best_color]
+    return best_index, [best] + [color for color in COLORS if color != best]
@@ -0,0 +1,139 @@
+"""
+Provides a headless simulation engine which plays whole games between bots. It is used for
+self-play datasets, training bot policies and tournaments.
+"""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+
+from models import bot
+from models.deck import Card, Color, card_face, color_index
+from models.game_state import Direction, GameError, GameState, Phase
+
+
+@dataclass
+class DecisionRecord:
+    """
+    What a bot saw and did on one turn. `hand` and `top` are captured before the move is played,
+    and `opponent_hand_sizes` lists the other players in turn order starting with the next player.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    turn: int
+    player: int
+    strategy: bot.Strategy
+    hand: list[Card]
+    top: Card
+    opponent_hand_sizes: list[int]
+    index: int | None
+    color: Color | None
+    elapsed: float
+
+    @property
+    def action_face(self) -> int | None:
+        """
+        Returns the face of the card that was played, or None if the bot drew and passed.
+        """
+        return None if self.index is None else card_face(self.hand[self.index])
+
+    @property
+    def action_color(self) -> int:
+        """
+        Returns the color index chosen for the move, see `models.deck.color_index`.
+        """
+        if self.color is not None:
+            return color_index(self.color)
+        if self.index is None:
+            return color_index(None)
+        return color_index(self.hand[self.index].color)
+
+
+@dataclass
+class GameResult:
+    """
+    The outcome of a simulated game. `winner` is None for a tie or a game cut off at `max_turns`.
+    """
+
+    seed: int
+    players: list[int]
+    strategies: dict[int, bot.Strategy]
+    winner: int | None
+    turns: int
+    decision_times: dict[int, list[float]] = field(default_factory=dict)
+
+
+def _opponent_hand_sizes(game: GameState, player: int) -> list[int]:
+    players = game.state["players"]
+    n = len(players)
+    start = players.index(player)
+    sign = 1 if game.state["direction"] == Direction.CLOCKWISE else -1
+    return [
+        len(game.state["hands"][players[(start + sign * step) % n]])
+        for step in range(1, n)
+    ]
+
+
+# pylint: disable=too-many-locals
+def play_game(
+    strategies: list[bot.Strategy],
+    seed: int,
+    on_decision: Callable[[DecisionRecord], None] | None = None,
+    max_turns: int = 2_000,
+    endgame_solver: bool = True,
+) -> GameResult:
+    """
+    Plays a game between bots using the given strategies in seat order. The seed fully determines
+    the game. `on_decision` is called with a record of each bot turn as it is played. With
+    `endgame_solver` off, bots follow their strategy to the end of two player games instead of
+    switching to the much slower exact search.
+    """
+    game = GameState(seed=seed)
+    game.state["endgame_solver"] = endgame_solver
+    for strategy in strategies:
+        game.add_bot(strategy)
+    game.start_game()
+
+    players = game.players()
+    decision_times: dict[int, list[float]] = {p: [] for p in players}
+
+    turns = 0
+    while game.phase() == Phase.PLAYING and turns < max_turns:
+        player = game.current_player()
+        hand = game.hand(player)
+        # Copy the top card: a wild's color is reset if the discard pile is recycled later.
+        top = replace(game.top_card())
+        opponents = _opponent_hand_sizes(game, player)
+
+        start = time.perf_counter()
+        try:
+            index, color = game.play_bot()
+        except GameError:
+            break
+        elapsed = time.perf_counter() - start
+        decision_times[player].append(elapsed)
+
+        if on_decision is not None:
+            on_decision(
+                DecisionRecord(
+                    turn=turns,
+                    player=player,
+                    strategy=game.bot_strategy(player),
+                    hand=hand,
+                    top=top,
+                    opponent_hand_sizes=opponents,
+                    index=index,
+                    color=color,
+                    elapsed=elapsed,
+                )
+            )
+        turns += 1
+
+    return GameResult(
+        seed=seed,
+        players=players,
+        strategies={p: game.bot_strategy(p) for p in players},
+        winner=game.state["winner"] if game.phase() == Phase.FINISHED else None,
+        turns=turns,
+        decision_times=decision_times,
+    )
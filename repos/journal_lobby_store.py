@@ -0,0 +1,184 @@
+"""
+Provides a lobby store which appends every change to a journal and only occasionally writes a
+full snapshot.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import time
+import zlib
+from pathlib import Path
+
+from repos.lobby_store import (
+    LobbyStore,
+    StoredLobby,
+    atomic_write,
+    load_pickle_file,
+)
+
+# Each journal entry is a header (operation, channel ID, payload length, CRC32 of the payload)
+# followed by the payload, which is the record for a put and empty for a delete.
+_HEADER = struct.Struct("<BqII")
+_PUT = 1
+_DELETE = 2
+
+
+class JournalLobbyStore(LobbyStore):
+    """
+    Persists each write as small entries appended to `journal.log`, so the cost of a save is the
+    size of the lobbies that changed. Appends are fsynced in groups: once `fsync_every` entries or
+    `fsync_interval` seconds have built up since the last fsync. After `compact_every` entries the
+    current state is written to `snapshot.pkl` and the journal starts over. Loading replays the
+    journal on top of the snapshot and drops a torn entry at the end left by a crash.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        directory: str | Path,
+        fsync_every: int = 64,
+        fsync_interval: float = 0.05,
+        compact_every: int = 10_000,
+    ):
+        self.directory = Path(directory)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.fsyncs = 0
+        self.compactions = 0
+        self._records: dict[int, bytes] = {}
+        self._journal = None
+        self._entries = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @property
+    def snapshot_path(self) -> Path:
+        """
+        Returns the path of the latest full snapshot.
+        """
+        return self.directory / "snapshot.pkl"
+
+    @property
+    def journal_path(self) -> Path:
+        """
+        Returns the path of the journal of changes since the snapshot.
+        """
+        return self.directory / "journal.log"
+
+    def load_all(self) -> dict[int, bytes]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._records = (
+            load_pickle_file(self.snapshot_path) if self.snapshot_path.exists() else {}
+        )
+
+        self._entries = self._replay()
+        self._open_journal()
+        return dict(self._records)
+
+    def _replay(self) -> int:
+        if not self.journal_path.exists():
+            return 0
+
+        data = self.journal_path.read_bytes()
+        offset = entries = 0
+        while offset + _HEADER.size <= len(data):
+            operation, lobby_id, length, checksum = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            payload = data[start : start + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+
+            if operation == _PUT:
+                self._records[lobby_id] = payload
+            elif operation == _DELETE:
+                self._records.pop(lobby_id, None)
+            else:
+                break
+            offset = start + length
+            entries += 1
+
+        if offset != len(data):
+            # Drop the partial entry a crash left behind so new entries follow valid ones.
+            with self.journal_path.open("r+b") as journal_file:
+                journal_file.truncate(offset)
+        return entries
+
+    def _open_journal(self) -> None:
+        if self._journal is None:
+            self._journal = self.journal_path.open("ab")
+
+    def write(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        if not records and not deleted:
+            return
+        if self._journal is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._open_journal()
+
+        entries = []
+        for lobby_id, record in records.items():
+            entries.append(_entry(_PUT, lobby_id, record.data))
+            self._records[lobby_id] = record.data
+        for lobby_id in deleted:
+            entries.append(_entry(_DELETE, lobby_id, b""))
+            self._records.pop(lobby_id, None)
+
+        self._journal.write(b"".join(entries))
+        self._journal.flush()
+        self._entries += len(entries)
+        self._unsynced += len(entries)
+
+        if self._entries >= self.compact_every:
+            self.compact()
+        elif (
+            self._unsynced >= self.fsync_every
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Forces appended entries to disk.
+        """
+        if self._journal is None or self._unsynced == 0:
+            return
+        os.fsync(self._journal.fileno())
+        self.fsyncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self) -> None:
+        """
+        Writes the current state as a new snapshot and empties the journal. The snapshot's rename
+        is on disk before the journal is emptied, and a crash in between is safe: replaying the
+        old journal over the new snapshot gives the same state.
+        """
+        atomic_write(
+            self.snapshot_path,
+            pickle.dumps(self._records, protocol=pickle.HIGHEST_PROTOCOL),
+            fsync=True,
+        )
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = self.journal_path.open("wb")
+        self._entries = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.compactions += 1
+
+    def close(self) -> None:
+        if self._journal is None:
+            return
+        self.sync()
+        self._journal.close()
+        self._journal = None
+
+
+def _entry(operation: int, lobby_id: int, payload: bytes) -> bytes:
+    return (
+        _HEADER.pack(operation, lobby_id, len(payload), zlib.crc32(payload)) + payload
+    )
@@ -0,0 +1,212 @@
+"""
+Provides an append-only archive for finished lobbies, so they can be dropped from the repository
+while staying readable.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from models.lobby_model import Lobby
+from repos.lobby_codec import Codec, Compression, decode_lobby, encode_lobby
+
+# Written to the log before each record: channel ID, archive time, record length, CRC32.
+_HEADER = struct.Struct("<qdII")
+# One per record in the index: channel ID, archive time, offset of the record, record length.
+_INDEX_ENTRY = struct.Struct("<qdQI")
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """
+    Where an archived lobby's record is in the log, and when it was archived.
+    """
+
+    channel_id: int
+    archived_at: float
+    offset: int
+    length: int
+
+    @property
+    def end(self) -> int:
+        """
+        Returns the offset just past the record.
+        """
+        return self.offset + self.length
+
+
+class LobbyArchive:
+    """
+    Appends each archived lobby to `archive.log` as a compressed record after a small header, and
+    never rewrites what is already there. `archive.idx` holds a fixed-size entry per record with
+    its channel, time and position, so opening the archive only reads the index. Entries the index
+    is missing after a crash are recovered from the log's headers, and a torn record at the end of
+    the log is cut off.
+    """
+
+    def __init__(
+        self, directory: str | Path, compression: Compression = Compression(Codec.ZLIB)
+    ):
+        self.directory = Path(directory)
+        self.compression = compression
+        self._by_channel: dict[int, list[ArchiveEntry]] = {}
+        self._by_time: list[ArchiveEntry] = []
+        self._size = 0
+        self._log = None
+        self._index = None
+        self._open()
+
+    @property
+    def log_path(self) -> Path:
+        """
+        Returns the path of the log holding the records.
+        """
+        return self.directory / "archive.log"
+
+    @property
+    def index_path(self) -> Path:
+        """
+        Returns the path of the index of the log.
+        """
+        return self.directory / "archive.idx"
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        log_size = self.log_path.stat().st_size if self.log_path.exists() else 0
+
+        entries = []
+        index_data = self.index_path.read_bytes() if self.index_path.exists() else b""
+        usable = len(index_data) - len(index_data) % _INDEX_ENTRY.size
+        for fields in _INDEX_ENTRY.iter_unpack(index_data[:usable]):
+            entry = ArchiveEntry(*fields)
+            if entry.end > log_size:
+                break
+            entries.append(entry)
+        indexed = len(entries) * _INDEX_ENTRY.size
+
+        end = entries[-1].end if entries else 0
+        recovered, end = self._scan(end, log_size)
+        if end != log_size:
+            with self.log_path.open("r+b") as log_file:
+                log_file.truncate(end)
+        if indexed != len(index_data):
+            with self.index_path.open("r+b") as index_file:
+                index_file.truncate(indexed)
+
+        self._log = self.log_path.open("ab")
+        self._index = self.index_path.open("ab")
+        self._size = end
+        for entry in entries:
+            self._add(entry)
+        for entry in recovered:
+            self._write_index(entry)
+            self._add(entry)
+
+    def _scan(self, start: int, log_size: int) -> tuple[list[ArchiveEntry], int]:
+        """
+        Reads complete records after `start` that have no index entry, returning them and the end
+        of the last one.
+        """
+        entries: list[ArchiveEntry] = []
+        if start >= log_size:
+            return entries, start
+
+        with self.log_path.open("rb") as log_file:
+            log_file.seek(start)
+            data = log_file.read()
+
+        position = 0
+        while position + _HEADER.size <= len(data):
+            channel_id, archived_at, length, checksum = _HEADER.unpack_from(
+                data, position
+            )
+            record = data[position + _HEADER.size : position + _HEADER.size + length]
+            if len(record) != length or zlib.crc32(record) != checksum:
+                break
+            offset = start + position + _HEADER.size
+            entries.append(ArchiveEntry(channel_id, archived_at, offset, length))
+            position += _HEADER.size + length
+        return entries, start + position
+
+    def _add(self, entry: ArchiveEntry) -> None:
+        self._by_channel.setdefault(entry.channel_id, []).append(entry)
+        if self._by_time and entry.archived_at < self._by_time[-1].archived_at:
+            bisect.insort(self._by_time, entry, key=lambda e: e.archived_at)
+        else:
+            self._by_time.append(entry)
+
+    def _write_index(self, entry: ArchiveEntry) -> None:
+        self._index.write(
+            _INDEX_ENTRY.pack(
+                entry.channel_id, entry.archived_at, entry.offset, entry.length
+            )
+        )
+        self._index.flush()
+
+    def append(self, channel_id: int, lobby: Lobby, archived_at: float) -> ArchiveEntry:
+        """
+        Adds a lobby to the archive.
+        """
+        record = encode_lobby(lobby, self.compression)
+        self._log.write(
+            _HEADER.pack(channel_id, archived_at, len(record), zlib.crc32(record))
+            + record
+        )
+        self._log.flush()
+
+        entry = ArchiveEntry(
+            channel_id, archived_at, self._size + _HEADER.size, len(record)
+        )
+        self._size = entry.end
+        self._write_index(entry)
+        self._add(entry)
+        return entry
+
+    def entries(self, channel_id: int) -> list[ArchiveEntry]:
+        """
+        Returns the archived lobbies of a channel, oldest first.
+        """
+        return sorted(self._by_channel.get(channel_id, []), key=lambda e: e.archived_at)
+
+    def between(self, start: float, end: float) -> list[ArchiveEntry]:
+        """
+        Returns the lobbies archived at or after `start` and before `end`, oldest first.
+        """
+        low = bisect.bisect_left(self._by_time, start, key=lambda e: e.archived_at)
+        high = bisect.bisect_left(self._by_time, end, key=lambda e: e.archived_at)
+        return self._by_time[low:high]
+
+    def read(self, entry: ArchiveEntry) -> Lobby | None:
+        """
+        Decodes an archived lobby, or returns None if its record is unreadable.
+        """
+        with self.log_path.open("rb") as log_file:
+            log_file.seek(entry.offset)
+            record = log_file.read(entry.length)
+        return decode_lobby(record, entry.channel_id)
+
+    def latest(self, channel_id: int) -> Lobby | None:
+        """
+        Returns the most recently archived lobby of a channel, if there is one.
+        """
+        entries = self.entries(channel_id)
+        return self.read(entries[-1]) if entries else None
+
+    def sync(self) -> None:
+        """
+        Forces the log, then the index, to disk.
+        """
+        os.fsync(self._log.fileno())
+        os.fsync(self._index.fileno())
+
+    def close(self) -> None:
+        """
+        Closes the archive's files.
+        """
+        self._log.close()
+        self._index.close()
@@ -0,0 +1,205 @@
+"""
+Provides the encoding used for a single stored lobby. Each record starts with a header giving the
+schema version of the lobby inside it. Records written before versioning are bare pickles and count
+as version 0. Decoding an older record runs the registered migrations in order, once, and the
+repository then rewrites it, so records at the current version are decoded without any checks.
+
+Records may be compressed. A compressed record has its own header naming the codec, so records
+written with different settings can be read side by side.
+"""
+
+from __future__ import annotations
+
+import bz2
+import lzma
+import os
+import pickle
+import struct
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+from models.lobby_model import Lobby, LobbyUser
+
+MAGIC = b"UNOL"
+COMPRESSED_MAGIC = b"UNOZ"
+SCHEMA_VERSION = 1
+
+_HEADER = struct.Struct("<4sH")
+_COMPRESSED_HEADER = struct.Struct("<4sHB")
+
+
+class Codec(Enum):
+    """
+    A standard library compressor a record can be written with.
+    """
+
+    NONE = 0
+    ZLIB = 1
+    LZMA = 2
+    BZ2 = 3
+
+
+@dataclass(frozen=True)
+class Compression:
+    """
+    How records are compressed. A `level` of None uses the codec's default: 6 for zlib and lzma,
+    9 for bz2.
+    """
+
+    codec: Codec = Codec.NONE
+    level: int | None = None
+
+    @classmethod
+    def parse(cls, setting: str) -> "Compression":
+        """
+        Parses a setting such as `zlib`, `lzma:3` or `none`.
+        """
+        name, _, level = setting.strip().partition(":")
+        if not name:
+            return cls()
+        try:
+            codec = Codec[name.upper()]
+        except KeyError as error:
+            raise ValueError(f"Unknown compression codec {name!r}") from error
+        return cls(codec, int(level) if level else None)
+
+    @classmethod
+    def from_env(cls) -> "Compression":
+        """
+        Reads the setting from `$UNO_LOBBY_COMPRESSION`, which defaults to no compression.
+        """
+        return cls.parse(os.getenv("UNO_LOBBY_COMPRESSION", ""))
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses data with this codec and level.
+        """
+        if self.codec == Codec.ZLIB:
+            return zlib.compress(data, -1 if self.level is None else self.level)
+        if self.codec == Codec.LZMA:
+            return lzma.compress(data, preset=self.level)
+        if self.codec == Codec.BZ2:
+            return bz2.compress(data, 9 if self.level is None else self.level)
+        return data
+
+
+_DECOMPRESSORS: dict[int, Callable[[bytes], bytes]] = {
+    Codec.ZLIB.value: zlib.decompress,
+    Codec.LZMA.value: lzma.decompress,
+    Codec.BZ2.value: bz2.decompress,
+}
+
+Migration = Callable[[Lobby, int], Lobby]
+_MIGRATIONS: dict[int, Migration] = {}
+
+
+def migration(from_version: int) -> Callable[[Migration], Migration]:
+    """
+    Registers a function which upgrades a lobby decoded at `from_version` to the next version. It
+    is given the lobby and its channel ID and returns the upgraded lobby.
+    """
+
+    def register(upgrade: Migration) -> Migration:
+        if from_version in _MIGRATIONS:
+            raise ValueError(f"A migration from version {from_version} already exists")
+        _MIGRATIONS[from_version] = upgrade
+        return upgrade
+
+    return register
+
+
+@migration(0)
+def _fill_unversioned_fields(lobby: Lobby, lobby_id: int) -> Lobby:
+    """
+    Unversioned records may hold a Discord user rather than a snapshot, and may predate fields and
+    game state keys that were added later.
+    """
+    if not isinstance(lobby.user, LobbyUser):
+        lobby.user = LobbyUser.from_user(lobby.user)
+
+    if not hasattr(lobby, "channel_id") or lobby.channel_id is None:
+        lobby.channel_id = int(lobby_id)
+
+    if not hasattr(lobby, "last_move"):
+        lobby.last_move = None
+
+    if not hasattr(lobby, "solo_timer_message"):
+        lobby.solo_timer_message = None
+
+    if not hasattr(lobby, "solo_expires_at"):
+        lobby.solo_expires_at = None
+
+    # Games from before bot strategies, the endgame solver and unseen card counts were added.
+    state = lobby.game.state
+    state.setdefault("bot_strategies", {})
+    state.setdefault("endgame_solver", True)
+    state.setdefault("unseen", None)
+
+    return lobby
+
+
+def encode_lobby(lobby: Lobby, compression: Compression = Compression()) -> bytes:
+    """
+    Encodes a lobby as a self-contained record at the current schema version.
+    """
+    payload = pickle.dumps(lobby, protocol=pickle.HIGHEST_PROTOCOL)
+    if compression.codec == Codec.NONE:
+        return _HEADER.pack(MAGIC, SCHEMA_VERSION) + payload
+    return _COMPRESSED_HEADER.pack(
+        COMPRESSED_MAGIC, SCHEMA_VERSION, compression.codec.value
+    ) + compression.compress(payload)
+
+
+def record_version(data: bytes) -> int:
+    """
+    Returns the schema version a record was written at.
+    """
+    magic = data[: len(MAGIC)]
+    if magic == MAGIC:
+        return _HEADER.unpack_from(data)[1]
+    if magic == COMPRESSED_MAGIC:
+        return _COMPRESSED_HEADER.unpack_from(data)[1]
+    return 0
+
+
+def _payload(data: bytes) -> bytes | memoryview | None:
+    magic = data[: len(MAGIC)]
+    if magic == MAGIC:
+        return memoryview(data)[_HEADER.size :]
+    if magic == COMPRESSED_MAGIC:
+        codec = _COMPRESSED_HEADER.unpack_from(data)[2]
+        decompress = _DECOMPRESSORS.get(codec)
+        if decompress is None:
+            return None
+        try:
+            return decompress(memoryview(data)[_COMPRESSED_HEADER.size :])
+        except (zlib.error, lzma.LZMAError, OSError, EOFError, ValueError):
+            return None
+    return data
+
+
+def decode_lobby(data: bytes, lobby_id: int) -> Lobby | None:
+    """
+    Decodes a record written by `encode_lobby`, upgrading it to the current schema version. Returns
+    None if the record is unreadable or was written by a newer release.
+    """
+    version = record_version(data)
+    if version > SCHEMA_VERSION:
+        return None
+
+    payload = _payload(data)
+    if payload is None:
+        return None
+    try:
+        lobby = pickle.loads(payload)
+    except (pickle.PickleError, EOFError, AttributeError, TypeError, ValueError):
+        return None
+
+    if not isinstance(lobby, Lobby):
+        return None
+
+    for from_version in range(version, SCHEMA_VERSION):
+        lobby = _MIGRATIONS[from_version](lobby, lobby_id)
+    return lobby
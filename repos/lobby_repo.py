@@ -4,105 +4,623 @@ Provides storage for lobbies.
 
 from __future__ import annotations
 
-import pickle
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import Any
+from typing import Any, Callable, Iterable
 
-from models.game_state import GameState
+from models.game_state import GameState, Phase
 from models.lobby_model import Lobby, LobbyUser
+from repos.journal_lobby_store import JournalLobbyStore
+from repos.lobby_archive import LobbyArchive
+from repos.lobby_codec import (
+    SCHEMA_VERSION,
+    Compression,
+    decode_lobby,
+    encode_lobby,
+    record_version,
+)
+from repos.lobby_store import (
+    FsyncPolicy,
+    LobbyStore,
+    LobbySummary,
+    PickleFileStore,
+    ShardedFileStore,
+    StoredLobby,
+    shard_for_guild,
+)
+from repos.socket_lobby_store import SocketLobbyStore
+from repos.sqlite_lobby_store import SqliteLobbyStore
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@dataclass
+class PersistenceStats:
+    """
+    Counters describing how well saves are being coalesced, how many lobbies were loaded on
+    demand, how many records were upgraded from an older schema version, and how many finished
+    lobbies were archived.
+    """
+
+    requests: int = 0
+    flushes: int = 0
+    lobbies_written: int = 0
+    bytes_written: int = 0
+    lobbies_loaded: int = 0
+    lobbies_migrated: int = 0
+    lobbies_archived: int = 0
 
 
 class LobbyRepository:
     """
-    The lobby repository which stores, provides, modifies, and removes lobbies.
+    The lobby repository which stores, provides, modifies, and removes lobbies. Lobbies are kept
+    in memory and persisted through a `LobbyStore`: by default one file per channel under
+    `data/lobbies`, or a single pickle file if `storage_path` is given. If the store has an index,
+    only the index is read at startup and each lobby is loaded the first time it is used, and
+    `evict` drops a lobby's full state again so only hot lobbies stay in memory.
+
+    Changed lobbies are marked dirty by `save` and written by `flush`. With a `max_staleness` of 0
+    every save is written immediately. Otherwise saves made inside an event loop are coalesced and
+    flushed in the background at most `max_staleness` seconds after the first unsaved change, and
+    `close` must be called on shutdown to write what is left. Background flushes and
+    `flush_async` only snapshot the dirty lobbies on the event loop; encoding and writing happen on
+    a single writer thread, so writes never interleave and reach the store in order.
+
+    `fsync` decides when the store is asked to force writes to disk: never, after every flush, or
+    after a flush once `fsync_interval` seconds have passed since the last one. Records are
+    compressed as `compression` says, or as `$UNO_LOBBY_COMPRESSION` says if it isn't given.
+
+    With an `archive`, `archive_finished` moves lobbies that have been finished for
+    `archive_after` seconds out of the repository and into the archive, where `archived` can
+    still read them. `archive_finished_async` does the same work on the writer thread.
     """
 
-    def __init__(self, storage_path: str | Path | None = None):
-        self._storage_path = (
-            Path(storage_path) if storage_path else self._default_path()
+    # pylint: disable=too-many-instance-attributes,too-many-arguments,too-many-public-methods
+    def __init__(
+        self,
+        storage_path: str | Path | None = None,
+        max_staleness: float = 0.0,
+        store: LobbyStore | None = None,
+        *,
+        fsync: FsyncPolicy = FsyncPolicy.NONE,
+        fsync_interval: float = 1.0,
+        compression: Compression | None = None,
+        archive: LobbyArchive | None = None,
+        archive_after: float = 600.0,
+    ):
+        if store is None:
+            store = (
+                PickleFileStore(storage_path) if storage_path else self._default_store()
+            )
+        self._store = store
+        self.max_staleness = max_staleness
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compression = (
+            Compression.from_env() if compression is None else compression
         )
-        self.lobbies: dict[int, Lobby] = self._load()
+        self.archive = archive
+        self.archive_after = archive_after
+        self.stats = PersistenceStats()
+        self.lobbies: dict[int, Lobby] = {}
+        self._index: dict[int, LobbySummary] = {}
+        self._finished_at: dict[int, float] = {}
+        self._dirty: set[int] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._writer: ThreadPoolExecutor | None = None
+        self._last_write: Future | None = None
+        self._last_sync = time.monotonic()
+        self._load()
 
     @staticmethod
-    def _default_path() -> Path:
-        return Path(__file__).resolve().parent.parent / "data" / "lobbies.pkl"
+    def _default_store() -> LobbyStore:
+        """
+        Picks the store from `$UNO_LOBBY_STORE`: `sqlite` for `data/lobbies.sqlite3`, `journal`
+        for an append-only journal in `data/journal`, `server` for a lobby store server listening
+        on `$UNO_LOBBY_SOCKET` or `data/lobbies.sock`, otherwise one file per lobby.
+        """
+        kind = os.getenv("UNO_LOBBY_STORE", "").lower()
+        if kind == "sqlite":
+            return SqliteLobbyStore(DATA_DIR / "lobbies.sqlite3")
+        if kind == "server":
+            return SocketLobbyStore(
+                os.getenv("UNO_LOBBY_SOCKET", DATA_DIR / "lobbies.sock")
+            )
+        if kind == "journal":
+            return JournalLobbyStore(DATA_DIR / "journal")
+        return ShardedFileStore(
+            DATA_DIR / "lobbies", legacy_path=DATA_DIR / "lobbies.pkl"
+        )
+
+    def _load(self) -> None:
+        index = self._store.load_index()
+        if index is not None:
+            self._index = index
+            return
 
-    def _load(self) -> dict[int, Lobby]:
-        if not self._storage_path.exists():
-            return {}
+        for lobby_id, record in self._store.load_all().items():
+            lobby = decode_lobby(record, lobby_id)
+            if lobby is not None:
+                self.lobbies[lobby_id] = lobby
+                self._track_finished(lobby_id)
+                if record_version(record) < SCHEMA_VERSION:
+                    self._dirty.add(lobby_id)
+                    self.stats.lobbies_migrated += 1
+        if self._store.INDEXED:
+            # The store can keep an index but doesn't have one yet, so write every lobby again.
+            self._dirty.update(self.lobbies)
+        # Rewrite upgraded records in one pass so they aren't migrated again next time.
+        self.flush()
+
+    def _load_lobby(self, lobby_id: int) -> Lobby:
+        """
+        Loads the full state of a lobby that so far is only known from the index, or, with a
+        shared store, one another process may have created since the index was read.
+        """
+        summary = self._index.pop(lobby_id, None)
+        if summary is None and not self._store.SHARED:
+            raise KeyError(lobby_id)
+        lobby = None
+        record = self._store.read(lobby_id)
+        if record is not None:
+            lobby = decode_lobby(record, lobby_id)
+        if lobby is None and summary is None:
+            raise KeyError(lobby_id)
+        if lobby is None:
+            # The record is missing or unreadable, so the lobby can't be restored.
+            self.save(lobby_id)
+            raise KeyError(lobby_id)
+
+        self.lobbies[lobby_id] = lobby
+        self.stats.lobbies_loaded += 1
+        self._track_finished(lobby_id, None if summary is None else summary.updated_at)
+        if record_version(record) < SCHEMA_VERSION:
+            self.stats.lobbies_migrated += 1
+            self.save(lobby_id)
+        return lobby
+
+    def save(self, lobby_id: int | None = None) -> None:
+        """
+        Marks a lobby as changed, or every lobby if no ID is given, and writes it out immediately
+        or schedules a background flush depending on `max_staleness`.
+        """
+        self._mark_dirty(lobby_id)
+        self._write_or_schedule()
+
+    def save_many(self, lobby_ids: Iterable[int]) -> None:
+        """
+        Marks several lobbies as changed as one request, so they are written together however
+        `max_staleness` is set.
+        """
+        self.stats.requests += 1
+        for lobby_id in lobby_ids:
+            self._dirty.add(lobby_id)
+            self._track_finished(lobby_id)
+        self._write_or_schedule()
+
+    def _write_or_schedule(self) -> None:
+        if self.max_staleness <= 0:
+            self.flush()
+            return
 
         try:
-            with self._storage_path.open("rb") as storage_file:
-                data = pickle.load(storage_file)
-        except (pickle.PickleError, EOFError, OSError, AttributeError, TypeError):
-            return {}
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Nothing would run a scheduled flush, so write through.
+            self.flush()
+            return
 
-        if not isinstance(data, dict):
-            return {}
+        self._schedule_flush()
 
-        lobbies: dict[int, Lobby] = {}
-        for lobby_id, lobby in data.items():
-            if not isinstance(lobby, Lobby):
-                continue
+    async def save_async(self, lobby_id: int | None = None) -> None:
+        """
+        Marks a lobby as changed, or every lobby if no ID is given, and waits until it has been
+        written without blocking the event loop.
+        """
+        self._mark_dirty(lobby_id)
+        await self.flush_async()
+
+    def _mark_dirty(self, lobby_id: int | None) -> None:
+        self.stats.requests += 1
+        if lobby_id is None:
+            self._dirty.update(self.lobbies)
+            for loaded_id in self.lobbies:
+                self._track_finished(loaded_id)
+        else:
+            self._dirty.add(lobby_id)
+            self._track_finished(lobby_id)
+
+    def _track_finished(self, lobby_id: int, since: float | None = None) -> None:
+        """
+        Remembers when a lobby was first seen finished, which starts its archive grace period.
+        """
+        lobby = self.lobbies.get(lobby_id)
+        if lobby is not None and lobby.game.phase() == Phase.FINISHED:
+            self._finished_at.setdefault(
+                lobby_id, time.time() if since is None else since
+            )
+        else:
+            self._finished_at.pop(lobby_id, None)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.max_staleness, self._start_background_flush
+            )
+
+    def _start_background_flush(self) -> None:
+        self._flush_handle = None
+        self._flush_task = asyncio.get_running_loop().create_task(
+            self._background_flush()
+        )
+
+    async def _background_flush(self) -> None:
+        try:
+            await self.flush_async()
+        except OSError:
+            # The lobbies are still dirty, so try again after another interval.
+            self._schedule_flush()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # The lobbies stay dirty and are retried by the next save or flush.
+            print(f"Flush Error: {e}")
+
+    def dirty(self) -> set[int]:
+        """
+        Returns the IDs of lobbies with changes that haven't been written yet.
+        """
+        return set(self._dirty)
 
-            if not isinstance(lobby.user, LobbyUser):
-                lobby.user = LobbyUser.from_user(lobby.user)
+    def flush(self) -> None:
+        """
+        Writes out all pending changes now, blocking until they and any writes already queued by
+        `flush_async` are done.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
 
-            if not hasattr(lobby, "channel_id") or lobby.channel_id is None:
-                lobby.channel_id = int(lobby_id)
+        dirty = self._take_dirty()
+        if not dirty:
+            return
 
-            if not hasattr(lobby, "last_move"):
-                lobby.last_move = None
+        try:
+            if self._last_write is None or self._last_write.done():
+                self._write(self.lobbies, dirty)
+            else:
+                # Queue behind the earlier writes so they can't overwrite this newer state.
+                self._submit(self.lobbies, dirty).result()
+        except BaseException:
+            self._dirty |= dirty
+            raise
 
-            if not hasattr(lobby, "solo_timer_message"):
-                lobby.solo_timer_message = None
+    async def flush_async(self) -> None:
+        """
+        Writes out all pending changes without blocking the event loop. The dirty lobbies are
+        snapshotted here, then encoded and written on the writer thread.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
 
-            if not hasattr(lobby, "solo_expires_at"):
-                lobby.solo_expires_at = None
+        dirty = self._take_dirty()
+        if not dirty:
+            return
 
-            lobbies[int(lobby_id)] = lobby
+        try:
+            snapshots = {
+                lobby_id: self.lobbies[lobby_id].snapshot()
+                for lobby_id in dirty
+                if lobby_id in self.lobbies
+            }
+            await asyncio.wrap_future(self._submit(snapshots, dirty))
+        except BaseException:
+            self._dirty |= dirty
+            raise
 
-        return lobbies
+    def _take_dirty(self) -> set[int]:
+        # A lobby only known from the index hasn't been loaded, so it can't have changed.
+        dirty = self._dirty - self._index.keys()
+        self._dirty = set()
+        return dirty
 
-    def save(self) -> None:
+    def close(self) -> None:
         """
-        Flushes the current lobby state to disk.
+        Flushes pending changes on shutdown. Later saves are written immediately.
         """
-        self._storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_staleness = 0.0
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown()
+            self._writer = None
+        if self.fsync != FsyncPolicy.NONE:
+            self._store.sync()
+        self._store.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def _submit(self, lobbies: dict[int, Lobby], dirty: set[int]) -> Future:
+        self._last_write = self._run_on_writer(self._write, lobbies, dirty)
+        return self._last_write
 
-        with NamedTemporaryFile(
-            mode="wb", dir=self._storage_path.parent, delete=False
-        ) as temp_file:
-            pickle.dump(self.lobbies, temp_file)
-            temp_path = Path(temp_file.name)
+    def _run_on_writer(self, function: Callable[..., Any], *args: Any) -> Future:
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="lobby-writer"
+            )
+        return self._writer.submit(function, *args)
 
-        temp_path.replace(self._storage_path)
+    def _write(self, lobbies: dict[int, Lobby], dirty: set[int]) -> None:
+        now = time.time()
+        records = {
+            lobby_id: _stored(lobbies[lobby_id], now, self.compression)
+            for lobby_id in dirty
+            if lobby_id in lobbies
+        }
+        deleted = {lobby_id for lobby_id in dirty if lobby_id not in lobbies}
+        self._store.write(records, deleted)
+
+        if self.fsync == FsyncPolicy.PER_FLUSH or (
+            self.fsync == FsyncPolicy.INTERVAL
+            and time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self._store.sync()
+            self._last_sync = time.monotonic()
+
+        self.stats.flushes += 1
+        self.stats.lobbies_written += len(records)
+        self.stats.bytes_written += sum(len(record.data) for record in records.values())
 
     def get(self, lobby_id: int) -> Lobby:
         """
-        Returns a lobby based on its ID.
+        Returns a lobby based on its ID, loading its full state from the store on first use.
         """
-        return self.lobbies[lobby_id]
+        lobby = self.lobbies.get(lobby_id)
+        if lobby is None:
+            lobby = self._load_lobby(lobby_id)
+        return lobby
 
-    def set(self, lobby_id: int, user: Any, game: GameState) -> None:
+    def evict(self, lobby_id: int) -> None:
+        """
+        Writes a loaded lobby if it has changed and drops its full state from memory, so only
+        hot lobbies stay cached. It is loaded again the next time it is used.
+        """
+        lobby = self.lobbies.get(lobby_id)
+        if lobby is None:
+            return
+        if lobby_id in self._dirty:
+            self.flush()
+        del self.lobbies[lobby_id]
+        # A finished lobby keeps its archive grace period.
+        updated_at = self._finished_at.pop(lobby_id, time.time())
+        self._index[lobby_id] = LobbySummary(
+            lobby.game.phase().name, lobby.main_message, updated_at, lobby.guild_id
+        )
+
+    def cache(self, lobby_id: int, lobby: Lobby) -> None:
+        """
+        Holds a lobby that another process has already written, without writing it again.
+        """
+        self._index.pop(lobby_id, None)
+        self._dirty.discard(lobby_id)
+        self.lobbies[lobby_id] = lobby
+        self._track_finished(lobby_id)
+
+    def forget(self, lobby_id: int) -> None:
+        """
+        Drops a lobby that another process has already deleted, without writing anything.
+        """
+        self.lobbies.pop(lobby_id, None)
+        self._index.pop(lobby_id, None)
+        self._dirty.discard(lobby_id)
+        self._finished_at.pop(lobby_id, None)
+
+    def ids(self) -> list[int]:
+        """
+        Returns the IDs of every lobby, whether or not its full state has been loaded.
+        """
+        return sorted(self.lobbies.keys() | self._index.keys())
+
+    def by_recent_activity(self, lobby_ids: Iterable[int]) -> list[int]:
+        """
+        Orders lobby IDs from the most to the least recently written, using the index. Lobbies
+        whose full state is loaded are in use, so they come first.
+        """
+        now = time.time()
+
+        def updated_at(lobby_id: int) -> float:
+            summary = self._index.get(lobby_id)
+            return now if summary is None else summary.updated_at
+
+        return sorted(lobby_ids, key=updated_at, reverse=True)
+
+    def set(
+        self, lobby_id: int, user: Any, game: GameState, guild_id: int | None = None
+    ) -> None:
         """
         Stores a lobby by ID.
         """
+        self._index.pop(lobby_id, None)
         self.lobbies[lobby_id] = Lobby(
-            LobbyUser.from_user(user), game, None, channel_id=lobby_id
+            LobbyUser.from_user(user),
+            game,
+            None,
+            channel_id=lobby_id,
+            guild_id=guild_id,
         )
-        self.save()
+        self.save(lobby_id)
 
     def delete(self, lobby_id: int) -> None:
         """
         Deletes a lobby by ID.
         """
-        del self.lobbies[lobby_id]
-        self.save()
+        if self.lobbies.pop(lobby_id, None) is None:
+            del self._index[lobby_id]
+        self.save(lobby_id)
+
+    def archive_finished(self, now: float | None = None) -> list[int]:
+        """
+        Moves lobbies that have been finished for longer than the grace period to the archive and
+        drops them from the repository, returning their IDs.
+        """
+        if self.archive is None:
+            return []
+
+        now = time.time() if now is None else now
+        archived = []
+        for lobby_id in self._due_for_archive(now):
+            try:
+                lobby = self.get(lobby_id)
+            except KeyError:
+                continue
+            if lobby.game.phase() == Phase.FINISHED:
+                self.archive.append(lobby_id, lobby, now)
+                archived.append(lobby_id)
+
+        if archived:
+            # The archive must be durable before the lobbies are deleted from the store.
+            self.archive.sync()
+            self._drop_archived(archived)
+        return archived
+
+    async def archive_finished_async(self, now: float | None = None) -> list[int]:
+        """
+        Does what `archive_finished` does without blocking the event loop. Loaded lobbies are
+        snapshotted here; reading the others, encoding and syncing the archive happen on the
+        writer thread, after any writes already queued. A lobby that is no longer finished by
+        the time the archive is durable is left in place.
+        """
+        if self.archive is None:
+            return []
+
+        now = time.time() if now is None else now
+        due = self._due_for_archive(now)
+        if not due:
+            return []
+
+        loaded = {
+            lobby_id: self.lobbies[lobby_id].snapshot()
+            for lobby_id in due
+            if lobby_id in self.lobbies
+        }
+        unloaded = [lobby_id for lobby_id in due if lobby_id not in loaded]
+        archived = await asyncio.wrap_future(
+            self._run_on_writer(self._archive, loaded, unloaded, now)
+        )
+        archived = [lobby_id for lobby_id in archived if self._finished(lobby_id)]
+        self._drop_archived(archived)
+        return archived
+
+    def _due_for_archive(self, now: float) -> list[int]:
+        cutoff = now - self.archive_after
+        due = [
+            lobby_id
+            for lobby_id, finished_at in self._finished_at.items()
+            if finished_at <= cutoff
+        ]
+        due.extend(
+            lobby_id
+            for lobby_id, summary in self._index.items()
+            if summary.phase == Phase.FINISHED.name and summary.updated_at <= cutoff
+        )
+        return due
+
+    def _archive(
+        self, loaded: dict[int, Lobby], unloaded: list[int], now: float
+    ) -> list[int]:
+        lobbies = dict(loaded)
+        for lobby_id in unloaded:
+            record = self._store.read(lobby_id)
+            lobby = None if record is None else decode_lobby(record, lobby_id)
+            if lobby is not None:
+                lobbies[lobby_id] = lobby
+
+        archived = []
+        for lobby_id, lobby in lobbies.items():
+            if lobby.game.phase() == Phase.FINISHED:
+                self.archive.append(lobby_id, lobby, now)
+                archived.append(lobby_id)
+        if archived:
+            self.archive.sync()
+        return archived
+
+    def _finished(self, lobby_id: int) -> bool:
+        lobby = self.lobbies.get(lobby_id)
+        if lobby is not None:
+            return lobby.game.phase() == Phase.FINISHED
+        summary = self._index.get(lobby_id)
+        return summary is not None and summary.phase == Phase.FINISHED.name
+
+    def _drop_archived(self, archived: list[int]) -> None:
+        for lobby_id in archived:
+            self.delete(lobby_id)
+        self.stats.lobbies_archived += len(archived)
+
+    def archived(self, lobby_id: int) -> Lobby | None:
+        """
+        Returns the most recently archived lobby of a channel, if there is one.
+        """
+        return None if self.archive is None else self.archive.latest(lobby_id)
 
     def exists(self, lobby_id: int) -> bool:
         """
         Returns whether or not a lobby exists by ID.
         """
-        return lobby_id in self.lobbies
+        return lobby_id in self.lobbies or lobby_id in self._index
+
+    def ids_in_phase(self, phase: Phase) -> list[int]:
+        """
+        Returns the IDs of lobbies in a phase, using the store's index when it has one.
+        """
+        self.flush()
+        ids = self._store.ids_in_phase(phase.name)
+        if ids is None:
+            ids = sorted(
+                [
+                    lobby_id
+                    for lobby_id, lobby in self.lobbies.items()
+                    if lobby.game.phase() == phase
+                ]
+                + [
+                    lobby_id
+                    for lobby_id, summary in self._index.items()
+                    if summary.phase == phase.name
+                ]
+            )
+        return ids
+
+    def ids_in_shard(self, shard_id: int, shard_count: int) -> list[int]:
+        """
+        Returns the IDs of lobbies whose guild is on a gateway shard, using the store's index
+        when it has one. Lobbies with no recorded guild are on shard 0.
+        """
+        self.flush()
+        ids = self._store.ids_in_shard(shard_id, shard_count)
+        if ids is None:
+            ids = sorted(
+                [
+                    lobby_id
+                    for lobby_id, lobby in self.lobbies.items()
+                    if shard_for_guild(lobby.guild_id, shard_count) == shard_id
+                ]
+                + [
+                    lobby_id
+                    for lobby_id, summary in self._index.items()
+                    if shard_for_guild(summary.guild_id, shard_count) == shard_id
+                ]
+            )
+        return ids
+
+
+def _stored(lobby: Lobby, now: float, compression: Compression) -> StoredLobby:
+    return StoredLobby(
+        encode_lobby(lobby, compression),
+        phase=lobby.game.phase().name,
+        main_message=lobby.main_message,
+        updated_at=now,
+        guild_id=lobby.guild_id,
+    )
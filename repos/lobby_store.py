@@ -0,0 +1,409 @@
+"""
+Provides the storage backends a `LobbyRepository` keeps its lobbies in. A store holds one encoded
+record per channel ID and knows nothing about what is inside it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+from dataclasses import astuple, dataclass
+from enum import Enum, auto
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+
+@dataclass
+class StoredLobby:
+    """
+    An encoded lobby to be written, with a few fields copied out of it so stores can index them
+    without decoding the record.
+    """
+
+    data: bytes
+    phase: str = ""
+    main_message: int | None = None
+    updated_at: float = 0.0
+    guild_id: int | None = None
+
+    def summary(self) -> LobbySummary:
+        """
+        Returns the fields of this record that go in a store's index.
+        """
+        return LobbySummary(
+            self.phase, self.main_message, self.updated_at, self.guild_id
+        )
+
+
+@dataclass(frozen=True)
+class LobbySummary:
+    """
+    What a store's index knows about a lobby without decoding its record: its phase, the ID of
+    its main message, when it was last written, and the guild its channel is in.
+    """
+
+    phase: str
+    main_message: int | None
+    updated_at: float
+    guild_id: int | None = None
+
+
+def shard_for_guild(guild_id: int | None, shard_count: int) -> int:
+    """
+    Returns the gateway shard Discord sends a guild's events to. Lobbies with no recorded guild
+    count as shard 0, which is where Discord sends direct messages.
+    """
+    if guild_id is None or shard_count <= 1:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+
+class FsyncPolicy(Enum):
+    """
+    When a repository asks its store to force written records to disk.
+    """
+
+    NONE = auto()  # leave it to the operating system
+    PER_FLUSH = auto()  # after every flush
+    INTERVAL = auto()  # after a flush once enough time has passed since the last one
+
+
+class LobbyStore:
+    """
+    The interface every storage backend implements. Stores with an index set `INDEXED` and
+    implement `load_index` and `read`, which lets a repository load lobbies only when they are
+    used. Stores that other processes write to as well set `SHARED`, so a repository looks up
+    lobbies its index doesn't know about yet.
+    """
+
+    INDEXED = False
+    SHARED = False
+
+    def load_all(self) -> dict[int, bytes]:
+        """
+        Returns every stored record by channel ID.
+        """
+        raise NotImplementedError
+
+    def write(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        """
+        Stores changed records and removes deleted ones.
+        """
+        raise NotImplementedError
+
+    def load_index(self) -> dict[int, LobbySummary] | None:
+        """
+        Returns a summary of every stored lobby by channel ID, or None if the store has no index
+        and every record must be loaded with `load_all`.
+        """
+        return None
+
+    # pylint: disable=unused-argument
+    def read(self, lobby_id: int) -> bytes | None:
+        """
+        Returns one stored record, or None if there isn't one. Only needed by stores with an
+        index.
+        """
+        return None
+
+    def ids_in_phase(self, phase: str) -> list[int] | None:
+        """
+        Returns the channel IDs of stored lobbies in a phase, or None if the store can't answer
+        without loading every record.
+        """
+        return None
+
+    def ids_in_shard(self, shard_id: int, shard_count: int) -> list[int] | None:
+        """
+        Returns the channel IDs of stored lobbies whose guild is on a gateway shard, or None if
+        the store can't answer without loading every record.
+        """
+        return None
+
+    def sync(self) -> None:
+        """
+        Forces records written so far to disk.
+        """
+
+    def close(self) -> None:
+        """
+        Releases any resources held by the store.
+        """
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False) -> None:
+    """
+    Replaces a file's contents so that readers see either the old or the new version. With
+    `fsync` the new contents are on disk before the replace, and the replace itself is on disk
+    before this returns.
+    """
+    with NamedTemporaryFile(mode="wb", dir=path.parent, delete=False) as temp_file:
+        temp_file.write(data)
+        if fsync:
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        temp_path = Path(temp_file.name)
+
+    temp_path.replace(path)
+    if fsync:
+        fsync_directory(path.parent)
+
+
+def fsync_directory(directory: Path) -> None:
+    """
+    Forces a directory's entries to disk, so files created, renamed or removed in it stay that
+    way after a crash.
+    """
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+def fsync_paths(paths: set[Path], directory: Path) -> None:
+    """
+    Forces files that were written, and the directory entries that name them, to disk.
+    """
+    for path in paths:
+        try:
+            with path.open("rb") as synced_file:
+                os.fsync(synced_file.fileno())
+        except FileNotFoundError:
+            continue
+
+    fsync_directory(directory)
+
+
+def load_pickle_file(path: Path) -> dict[int, bytes]:
+    """
+    Reads a single-file store. Files from older releases hold lobby objects rather than records;
+    those are re-pickled so they decode the same way.
+    """
+    try:
+        with path.open("rb") as storage_file:
+            data = pickle.load(storage_file)
+    except (pickle.PickleError, EOFError, OSError, AttributeError, TypeError):
+        return {}
+
+    if not isinstance(data, dict):
+        return {}
+
+    records = {}
+    for lobby_id, value in data.items():
+        if not isinstance(value, bytes):
+            value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        records[int(lobby_id)] = value
+    return records
+
+
+class PickleFileStore(LobbyStore):
+    """
+    Keeps every record in one pickle file, which is rewritten in full on every write.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._records: dict[int, bytes] = {}
+        self._unsynced = False
+
+    def load_all(self) -> dict[int, bytes]:
+        self._records = load_pickle_file(self.path) if self.path.exists() else {}
+        return dict(self._records)
+
+    def write(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        for lobby_id, record in records.items():
+            self._records[lobby_id] = record.data
+        for lobby_id in deleted:
+            self._records.pop(lobby_id, None)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(
+            self.path, pickle.dumps(self._records, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        self._unsynced = True
+
+    def sync(self) -> None:
+        if self._unsynced:
+            fsync_paths({self.path}, self.path.parent)
+            self._unsynced = False
+
+
+class ShardedFileStore(LobbyStore):
+    """
+    Keeps one file per channel, so a write only touches the lobbies that changed. If
+    `legacy_path` points at a single-file store, its lobbies are split into shards the first time
+    the store is loaded and the old file is renamed with a `.migrated` suffix.
+
+    The index is a log in `index.log` with one JSON line per written or deleted lobby, so keeping
+    it up to date costs an append. It is rewritten without the superseded lines when it is loaded
+    and has grown to more than twice the number of lobbies. Index lines are written before the
+    shards they describe, so a crash can leave an entry whose shard is missing or stale, but never
+    a shard the index doesn't know about. A line torn by a crash is cut off when the index is
+    loaded; if lines follow a damaged one, the index is rebuilt from the shards instead.
+    """
+
+    INDEXED = True
+    SUFFIX = ".lobby"
+
+    def __init__(self, directory: str | Path, legacy_path: str | Path | None = None):
+        self.directory = Path(directory)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self._unsynced: set[Path] = set()
+        self._summaries: dict[int, LobbySummary] | None = None
+
+    @property
+    def index_path(self) -> Path:
+        """
+        Returns the path of the index log.
+        """
+        return self.directory / "index.log"
+
+    def shard_path(self, lobby_id: int) -> Path:
+        """
+        Returns the file a channel's record is stored in.
+        """
+        return self.directory / f"{lobby_id}{self.SUFFIX}"
+
+    def load_index(self) -> dict[int, LobbySummary] | None:
+        self.migrate_legacy()
+        if not self.index_path.exists():
+            if self.directory.exists() and any(self.directory.glob(f"*{self.SUFFIX}")):
+                # Shards written before the index existed; the caller rebuilds it.
+                return None
+            self._summaries = {}
+            return {}
+
+        summaries: dict[int, LobbySummary] = {}
+        data = self.index_path.read_bytes()
+        offset = lines = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn line")
+                entry = json.loads(line)
+                if len(entry) == 1:
+                    summaries.pop(entry[0], None)
+                else:
+                    summaries[entry[0]] = LobbySummary(*entry[1:])
+            except (ValueError, TypeError, IndexError):
+                break
+            offset += len(line)
+            lines += 1
+
+        if offset != len(data):
+            if data.find(b"\n", offset) not in (-1, len(data) - 1):
+                # Lines were appended after a damaged one, so the log can't be trusted; the
+                # caller rebuilds the index from the shards.
+                self.index_path.unlink()
+                return None
+            # Drop the partial line a crash left behind so new lines follow valid ones.
+            with self.index_path.open("r+b") as index_file:
+                index_file.truncate(offset)
+
+        if lines > 2 * len(summaries) + 64:
+            atomic_write(
+                self.index_path,
+                "".join(
+                    _index_line(lobby_id, summary)
+                    for lobby_id, summary in summaries.items()
+                ).encode("utf-8"),
+            )
+        self._summaries = summaries
+        return dict(summaries)
+
+    def read(self, lobby_id: int) -> bytes | None:
+        try:
+            return self.shard_path(lobby_id).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def ids_in_phase(self, phase: str) -> list[int] | None:
+        if self._summaries is None:
+            return None
+        return sorted(
+            lobby_id
+            for lobby_id, summary in self._summaries.items()
+            if summary.phase == phase
+        )
+
+    def ids_in_shard(self, shard_id: int, shard_count: int) -> list[int] | None:
+        if self._summaries is None:
+            return None
+        return sorted(
+            lobby_id
+            for lobby_id, summary in self._summaries.items()
+            if shard_for_guild(summary.guild_id, shard_count) == shard_id
+        )
+
+    def load_all(self) -> dict[int, bytes]:
+        self.migrate_legacy()
+        if not self.directory.exists():
+            return {}
+
+        records = {}
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                lobby_id = int(path.stem)
+                records[lobby_id] = path.read_bytes()
+            except (ValueError, OSError):
+                continue
+        return records
+
+    def write(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._append_index(records, deleted)
+        for lobby_id, record in records.items():
+            path = self.shard_path(lobby_id)
+            atomic_write(path, record.data)
+            self._unsynced.add(path)
+        for lobby_id in deleted:
+            path = self.shard_path(lobby_id)
+            path.unlink(missing_ok=True)
+            self._unsynced.add(path)
+
+    def _append_index(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        lines = [
+            _index_line(lobby_id, record.summary())
+            for lobby_id, record in records.items()
+        ]
+        lines.extend(json.dumps([lobby_id]) + "\n" for lobby_id in deleted)
+        with self.index_path.open("a", encoding="utf-8") as index_file:
+            index_file.write("".join(lines))
+        self._unsynced.add(self.index_path)
+
+        if self._summaries is not None:
+            for lobby_id, record in records.items():
+                self._summaries[lobby_id] = record.summary()
+            for lobby_id in deleted:
+                self._summaries.pop(lobby_id, None)
+
+    def sync(self) -> None:
+        if self._unsynced:
+            fsync_paths(self._unsynced, self.directory)
+            self._unsynced.clear()
+
+    def migrate_legacy(self) -> int:
+        """
+        Splits the legacy single-file store into shards, returning how many lobbies were moved.
+        The legacy file has no index, so the migrated shards are left unindexed and `load_index`
+        asks for the index to be rebuilt.
+        """
+        if self.legacy_path is None or not self.legacy_path.exists():
+            return 0
+
+        records = load_pickle_file(self.legacy_path)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for lobby_id, data in records.items():
+            atomic_write(self.shard_path(lobby_id), data)
+        self.index_path.unlink(missing_ok=True)
+        os.replace(
+            self.legacy_path,
+            self.legacy_path.with_name(self.legacy_path.name + ".migrated"),
+        )
+        return len(records)
+
+
+def _index_line(lobby_id: int, summary: LobbySummary) -> str:
+    return json.dumps([lobby_id, *astuple(summary)]) + "\n"
@@ -0,0 +1,253 @@
+"""
+Provides a small server that keeps lobbies in a local store and shares them with bot processes over
+a Unix domain socket, using the protocol of `SocketLobbyStore`.
+
+Usage: python3 -m repos.lobby_store_server --socket data/lobbies.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import sqlite3
+import time
+from dataclasses import astuple
+from pathlib import Path
+from typing import Callable
+
+from repos.lobby_repo import DATA_DIR
+from repos.lobby_store import LobbyStore, LobbySummary, shard_for_guild
+from repos.socket_lobby_store import (
+    FRAME,
+    decode_header,
+    encode_frame,
+    split_records,
+)
+from repos.sqlite_lobby_store import SqliteLobbyStore
+
+Reply = tuple[dict, bytes]
+
+
+class LobbyStoreServer:
+    """
+    Serves the lobbies in `store`, which must keep an index, to any number of connections.
+    Requests are handled one at a time on the event loop, so a compare-and-set can't interleave
+    with another write. Versions are only kept in memory; they start from the time the server
+    started, so a version read from an earlier run never matches.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, path: str | Path, store: LobbyStore):
+        self.path = Path(path)
+        self.store = store
+        summaries = store.load_index()
+        if summaries is None:
+            raise ValueError("The lobby store server needs a store with an index")
+        self._summaries: dict[int, LobbySummary] = summaries
+        self._initial_version = time.time_ns()
+        self._next_version = self._initial_version
+        self._versions: dict[int, int] = {}
+        self._server: asyncio.AbstractServer | None = None
+        self._stopped: asyncio.Event | None = None
+        self.requests = 0
+
+    def version(self, lobby_id: int) -> int:
+        """
+        Returns the current version of a lobby, or 0 if it isn't stored.
+        """
+        if lobby_id not in self._summaries:
+            return 0
+        return self._versions.get(lobby_id, self._initial_version)
+
+    async def start(self) -> None:
+        """
+        Starts listening. A socket file left behind by an earlier run is replaced.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_unix_server(self._serve, path=str(self.path))
+        # Only processes running as the same user may connect.
+        os.chmod(self.path, 0o600)
+
+    def stop(self) -> None:
+        """
+        Asks a running `run` to return.
+        """
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def run(self) -> None:
+        """
+        Serves until `stop` is called, then closes the socket and the store.
+        """
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """
+        Stops listening, removes the socket file and closes the store.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            self.path.unlink(missing_ok=True)
+        self.store.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                header_length, body_length = FRAME.unpack(
+                    await reader.readexactly(FRAME.size)
+                )
+                header = await reader.readexactly(header_length)
+                body = await reader.readexactly(body_length)
+                reply, reply_body = self.handle(header, body)
+                writer.write(encode_frame(reply, reply_body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def handle(self, header: bytes, body: bytes) -> Reply:
+        """
+        Answers one request.
+        """
+        self.requests += 1
+        try:
+            request = decode_header(header)
+            handler = self._HANDLERS.get(request.get("op"))
+            if handler is None:
+                return {"error": f"Unknown operation {request.get('op')!r}"}, b""
+            return handler(self, request, body)
+        except (KeyError, TypeError, ValueError) as error:
+            return {"error": f"Bad request: {error!r}"}, b""
+        except (OSError, sqlite3.Error) as error:
+            return {"error": f"Store failed: {error!r}"}, b""
+
+    def _index(self, _request: dict, _body: bytes) -> Reply:
+        return {
+            "lobbies": [
+                [lobby_id, *astuple(summary)]
+                for lobby_id, summary in self._summaries.items()
+            ]
+        }, b""
+
+    def _get(self, request: dict, _body: bytes) -> Reply:
+        lobby_id = int(request["id"])
+        version = self.version(lobby_id)
+        record = self.store.read(lobby_id) if version else None
+        if record is None:
+            return {"version": 0}, b""
+        return {"version": version}, record
+
+    def _compare_and_set(self, request: dict, body: bytes) -> Reply:
+        lobby_id = int(request["id"])
+        version = self.version(lobby_id)
+        if version != request["expected"]:
+            return {"ok": False, "version": version}, b""
+
+        if "record" in request:
+            record = split_records([request["record"]], body)[lobby_id]
+            self._write({lobby_id: record}, set())
+        elif version:
+            self._write({}, {lobby_id})
+        return {"ok": True, "version": self.version(lobby_id)}, b""
+
+    def _write_batch(self, request: dict, body: bytes) -> Reply:
+        records = split_records(request["records"], body)
+        self._write(records, {int(lobby_id) for lobby_id in request["deleted"]})
+        return {"ok": True}, b""
+
+    def _write(self, records: dict, deleted: set[int]) -> None:
+        self.store.write(records, deleted)
+        for lobby_id, record in records.items():
+            self._next_version += 1
+            self._versions[lobby_id] = self._next_version
+            self._summaries[lobby_id] = record.summary()
+        for lobby_id in deleted:
+            self._versions.pop(lobby_id, None)
+            self._summaries.pop(lobby_id, None)
+
+    def _ids_in_phase(self, request: dict, _body: bytes) -> Reply:
+        phase = request["phase"]
+        return {
+            "ids": sorted(
+                lobby_id
+                for lobby_id, summary in self._summaries.items()
+                if summary.phase == phase
+            )
+        }, b""
+
+    def _ids_in_shard(self, request: dict, _body: bytes) -> Reply:
+        shard_id, shard_count = int(request["shard"]), int(request["count"])
+        return {
+            "ids": sorted(
+                lobby_id
+                for lobby_id, summary in self._summaries.items()
+                if shard_for_guild(summary.guild_id, shard_count) == shard_id
+            )
+        }, b""
+
+    def _sync(self, _request: dict, _body: bytes) -> Reply:
+        self.store.sync()
+        return {"ok": True}, b""
+
+    _HANDLERS: dict[str, Callable[["LobbyStoreServer", dict, bytes], Reply]] = {
+        "index": _index,
+        "get": _get,
+        "cas": _compare_and_set,
+        "write": _write_batch,
+        "phase": _ids_in_phase,
+        "shard": _ids_in_shard,
+        "sync": _sync,
+    }
+
+
+async def serve(path: str | Path, store: LobbyStore) -> None:
+    """
+    Runs a server until the process is interrupted or terminated.
+    """
+    server = LobbyStoreServer(path, store)
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, server.stop)
+    await server.run()
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=Path(os.getenv("UNO_LOBBY_SOCKET", DATA_DIR / "lobbies.sock")),
+        help="path of the Unix domain socket to listen on",
+    )
+    parser.add_argument(
+        "--database",
+        type=Path,
+        default=DATA_DIR / "lobbies.sqlite3",
+        help="SQLite database the lobbies are kept in",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Serves the lobbies in a SQLite database.
+    """
+    args = _parse_args(argv)
+    asyncio.run(serve(args.socket, SqliteLobbyStore(args.database)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Provides a lobby store that is a client of a `LobbyStoreServer` on a Unix domain socket, so several
+bot processes can share one set of lobbies. Each process only keeps the lobbies it uses in memory.
+
+Every message is a frame: the lengths of a JSON header and of a binary body, then the two of them.
+Records travel in the body, so they are never parsed as JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from repos.lobby_store import LobbyStore, LobbySummary, StoredLobby
+
+# Before each message: the length of its JSON header, then the length of its body.
+FRAME = struct.Struct("<II")
+
+
+class LobbyStoreError(OSError):
+    """
+    Raised when the server rejects a request or can't be reached.
+    """
+
+
+@dataclass(frozen=True)
+class VersionedRecord:
+    """
+    A stored record with the version the server gave it. Every write gives a lobby a new, larger
+    version, and a lobby that isn't stored has version 0.
+    """
+
+    version: int
+    data: bytes
+
+
+def encode_frame(header: dict, body: bytes = b"") -> bytes:
+    """
+    Encodes a message as a frame.
+    """
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return FRAME.pack(len(encoded), len(body)) + encoded + body
+
+
+def decode_header(data: bytes) -> dict:
+    """
+    Decodes the header of a frame.
+    """
+    header = json.loads(data)
+    if not isinstance(header, dict):
+        raise ValueError("A frame header must be an object")
+    return header
+
+
+def record_entry(lobby_id: int, record: StoredLobby) -> list:
+    """
+    Returns how a record is described in a header; its data follows in the body.
+    """
+    return [
+        lobby_id,
+        record.phase,
+        record.main_message,
+        record.updated_at,
+        record.guild_id,
+        len(record.data),
+    ]
+
+
+def split_records(entries: list, body: bytes) -> dict[int, StoredLobby]:
+    """
+    Rebuilds records from their header entries and the body holding their data.
+    """
+    records = {}
+    offset = 0
+    for lobby_id, phase, main_message, updated_at, guild_id, length in entries:
+        records[int(lobby_id)] = StoredLobby(
+            body[offset : offset + length], phase, main_message, updated_at, guild_id
+        )
+        offset += length
+    if offset != len(body):
+        raise ValueError("Record lengths don't match the body")
+    return records
+
+
+class SocketLobbyStore(LobbyStore):
+    """
+    Sends every operation to the server over one connection, which is opened on first use and
+    shared by the repository's threads one request at a time. A `write` of many lobbies is a
+    single request. `read_versioned` and `compare_and_set` let a process change a lobby only if no
+    other process has written it since it was read.
+    """
+
+    INDEXED = True
+    SHARED = True
+
+    def __init__(self, path: str | Path, timeout: float = 10.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket: socket.socket | None = None
+
+    def _connect(self) -> socket.socket:
+        if self._socket is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            try:
+                connection.connect(str(self.path))
+            except OSError:
+                connection.close()
+                raise
+            self._socket = connection
+        return self._socket
+
+    def _request(self, header: dict, body: bytes = b"") -> tuple[dict, bytes]:
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.sendall(encode_frame(header, body))
+                header_length, body_length = FRAME.unpack(
+                    _receive(connection, FRAME.size)
+                )
+                reply = decode_header(_receive(connection, header_length))
+                reply_body = _receive(connection, body_length)
+            except (OSError, ValueError) as error:
+                # The connection may be half way through a frame, so start a new one next time.
+                self._disconnect()
+                raise LobbyStoreError(f"Lobby store request failed: {error}") from error
+
+        if "error" in reply:
+            raise LobbyStoreError(reply["error"])
+        return reply, reply_body
+
+    def _disconnect(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def load_all(self) -> dict[int, bytes]:
+        return {
+            lobby_id: record
+            for lobby_id in self.load_index()
+            if (record := self.read(lobby_id)) is not None
+        }
+
+    def load_index(self) -> dict[int, LobbySummary] | None:
+        reply, _ = self._request({"op": "index"})
+        return {entry[0]: LobbySummary(*entry[1:]) for entry in reply["lobbies"]}
+
+    def read(self, lobby_id: int) -> bytes | None:
+        record = self.read_versioned(lobby_id)
+        return None if record is None else record.data
+
+    def read_versioned(self, lobby_id: int) -> VersionedRecord | None:
+        """
+        Returns one stored record with its version, or None if there isn't one.
+        """
+        reply, body = self._request({"op": "get", "id": lobby_id})
+        return VersionedRecord(reply["version"], body) if reply["version"] else None
+
+    def compare_and_set(
+        self, lobby_id: int, expected_version: int, record: StoredLobby | None
+    ) -> int | None:
+        """
+        Writes a record, or deletes the lobby if `record` is None, but only if the lobby's version
+        is still `expected_version`; use 0 to create a lobby that must not exist yet. Returns the
+        new version, which is 0 after a delete, or None if the lobby was changed in the meantime.
+        """
+        header = {"op": "cas", "id": lobby_id, "expected": expected_version}
+        body = b""
+        if record is not None:
+            header["record"] = record_entry(lobby_id, record)
+            body = record.data
+        reply, _ = self._request(header, body)
+        return reply["version"] if reply["ok"] else None
+
+    def write(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        if not records and not deleted:
+            return
+
+        self._request(
+            {
+                "op": "write",
+                "records": [
+                    record_entry(lobby_id, record)
+                    for lobby_id, record in records.items()
+                ],
+                "deleted": sorted(deleted),
+            },
+            b"".join(record.data for record in records.values()),
+        )
+
+    def ids_in_phase(self, phase: str) -> list[int] | None:
+        reply, _ = self._request({"op": "phase", "phase": phase})
+        return reply["ids"]
+
+    def ids_in_shard(self, shard_id: int, shard_count: int) -> list[int] | None:
+        reply, _ = self._request(
+            {"op": "shard", "shard": shard_id, "count": shard_count}
+        )
+        return reply["ids"]
+
+    def sync(self) -> None:
+        self._request({"op": "sync"})
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+def _receive(connection: socket.socket, length: int) -> bytes:
+    chunks = []
+    while length:
+        chunk = connection.recv(min(length, 1 << 20))
+        if not chunk:
+            raise ConnectionError("The lobby store server closed the connection")
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b"".join(chunks)
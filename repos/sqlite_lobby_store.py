@@ -0,0 +1,141 @@
+"""
+Provides a lobby store backed by SQLite in WAL mode.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+from repos.lobby_store import LobbyStore, LobbySummary, StoredLobby
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lobbies (
+    channel_id INTEGER PRIMARY KEY,
+    phase TEXT NOT NULL,
+    main_message INTEGER,
+    updated_at REAL NOT NULL,
+    record BLOB NOT NULL,
+    guild_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS lobbies_by_phase ON lobbies (phase);
+"""
+
+_UPSERT = """
+INSERT INTO lobbies (channel_id, phase, main_message, updated_at, record, guild_id)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (channel_id) DO UPDATE SET
+    phase = excluded.phase,
+    main_message = excluded.main_message,
+    updated_at = excluded.updated_at,
+    record = excluded.record,
+    guild_id = excluded.guild_id
+"""
+
+
+class SqliteLobbyStore(LobbyStore):
+    """
+    Keeps one row per lobby, updated in place. Each `write` is a single transaction however many
+    lobbies it covers, so a flush of many dirty lobbies costs one commit. The write-ahead log
+    keeps commits cheap and the database consistent if the process dies mid-write.
+    """
+
+    INDEXED = True
+
+    def __init__(self, path: str | Path, synchronous: str = "NORMAL"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The connection is only used under the lock, so it may be shared with worker threads.
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.executescript(_SCHEMA)
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(lobbies)")
+        ]
+        if "guild_id" not in columns:
+            # Databases from before sharding have no guild column; their lobbies count as shard 0.
+            self._connection.execute("ALTER TABLE lobbies ADD COLUMN guild_id INTEGER")
+
+    def load_all(self) -> dict[int, bytes]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT channel_id, record FROM lobbies"
+            ).fetchall()
+        return {channel_id: bytes(record) for channel_id, record in rows}
+
+    def load_index(self) -> dict[int, LobbySummary] | None:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT channel_id, phase, main_message, updated_at, guild_id FROM lobbies"
+            ).fetchall()
+        return {row[0]: LobbySummary(*row[1:]) for row in rows}
+
+    def read(self, lobby_id: int) -> bytes | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT record FROM lobbies WHERE channel_id = ?", (lobby_id,)
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def write(self, records: dict[int, StoredLobby], deleted: set[int]) -> None:
+        if not records and not deleted:
+            return
+
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN")
+            try:
+                connection.executemany(
+                    _UPSERT,
+                    [
+                        (
+                            lobby_id,
+                            record.phase,
+                            record.main_message,
+                            record.updated_at,
+                            record.data,
+                            record.guild_id,
+                        )
+                        for lobby_id, record in records.items()
+                    ],
+                )
+                connection.executemany(
+                    "DELETE FROM lobbies WHERE channel_id = ?",
+                    [(lobby_id,) for lobby_id in deleted],
+                )
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def ids_in_phase(self, phase: str) -> list[int] | None:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT channel_id FROM lobbies WHERE phase = ? ORDER BY channel_id",
+                (phase,),
+            ).fetchall()
+        return [channel_id for (channel_id,) in rows]
+
+    def ids_in_shard(self, shard_id: int, shard_count: int) -> list[int] | None:
+        # The same sum as `shard_for_guild`, with no guild counting as shard 0.
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT channel_id FROM lobbies"
+                " WHERE (IFNULL(guild_id, 0) >> 22) % ? = ? ORDER BY channel_id",
+                (max(shard_count, 1), shard_id),
+            ).fetchall()
+        return [channel_id for (channel_id,) in rows]
+
+    def sync(self) -> None:
+        # Checkpointing fsyncs the write-ahead log, which `synchronous=NORMAL` skips on commit.
+        with self._lock:
+            self._connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,153 @@
+"""
+Provides a scheduler which batches bot decisions across every lobby.
+"""
+
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from models import bot_batch
+from models.bot import Strategy
+from models.bot_batch import Decision
+from models.deck import Card
+from models.game_state import GameState, Phase
+
+
+@dataclass
+class BotSchedulerStats:
+    """
+    Counters describing how well decisions are being batched.
+    """
+
+    decisions: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+
+
+@dataclass
+class _Pending:
+    hand: list[Card]
+    top: Card
+    strategy: Strategy
+    unseen: Sequence[int] | None
+    next_hand_size: int | None
+    future: asyncio.Future
+
+
+class BotScheduler:
+    """
+    Collects pending bot decisions from all lobbies for a short window and evaluates them as one
+    vectorized batch with `bot_batch.decide_batch`. Each lobby awaits its own decision, so results
+    are still applied per lobby.
+    """
+
+    def __init__(self, window: float = 0.005, max_batch: int = 10_000):
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = BotSchedulerStats()
+        self._pending: list[_Pending] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    async def decide(
+        self,
+        hand: list[Card],
+        top: Card,
+        strategy: Strategy = Strategy.RANDOM,
+        unseen: Sequence[int] | None = None,
+        next_hand_size: int | None = None,
+    ) -> Decision:
+        """
+        Queues a decision for the next batch and waits for its result.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(
+            _Pending(hand, top, strategy, unseen, next_hand_size, future)
+        )
+
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """
+        Evaluates every pending decision now.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        by_strategy: dict[Strategy, list[_Pending]] = {}
+        for item in pending:
+            by_strategy.setdefault(item.strategy, []).append(item)
+
+        for strategy, items in by_strategy.items():
+            self._evaluate(strategy, items)
+
+        self.stats.decisions += len(pending)
+        self.stats.batches += 1
+        self.stats.largest_batch = max(self.stats.largest_batch, len(pending))
+
+    @staticmethod
+    def _evaluate(strategy: Strategy, items: list[_Pending]) -> None:
+        try:
+            decisions = bot_batch.decide_batch(
+                [item.hand for item in items],
+                [item.top for item in items],
+                strategy,
+                unseen=[item.unseen for item in items],
+                next_hand_sizes=[item.next_hand_size for item in items],
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, decision in zip(items, decisions):
+            if not item.future.done():
+                item.future.set_result(decision)
+
+    async def play_bots(self, game: GameState) -> int:
+        """
+        Plays bot turns until a human is up or the game ends, returning how many bot turns were
+        played. Supports chains of several bots in a row.
+        """
+        moves = 0
+        while game.phase() == Phase.PLAYING and game.is_bot(game.current_player()):
+            if game.endgame_applicable():
+                # Endgames are searched exactly rather than batched.
+                game.play_bot()
+                moves += 1
+                continue
+
+            user_id = game.current_player()
+            turn = game.turn_count()
+
+            decision = await self.decide(
+                game.hand(user_id),
+                game.top_card(),
+                game.bot_strategy(user_id),
+                game.unseen_cards(user_id),
+                game.next_hand_size(),
+            )
+
+            # The game may have moved on (e.g. someone was kicked) while we waited.
+            if (
+                game.phase() != Phase.PLAYING
+                or game.current_player() != user_id
+                or game.turn_count() != turn
+            ):
+                continue
+
+            game.play_bot(decision)
+            moves += 1
+
+        return moves
@@ -0,0 +1,170 @@
+"""
+Provides per-channel actors, which apply the commands for each channel's lobby one at a time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+Command = Callable[[], Any]
+Render = Callable[[int], Awaitable[None]]
+
+
+@dataclass
+class ChannelActorStats:
+    """
+    Counters describing how many commands were applied, and how many renders batching saved.
+    """
+
+    commands: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+    renders: int = 0
+    render_requests: int = 0
+
+
+@dataclass
+class _Queued:
+    command: Command
+    render: bool
+    future: asyncio.Future
+
+
+@dataclass
+class _Actor:
+    channel_id: int
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    task: asyncio.Task | None = None
+    render_requested: bool = False
+    busy: bool = False
+
+
+class ChannelActors:
+    """
+    Gives each channel an actor: a task with its own queue which applies the channel's commands in
+    the order they were submitted, so two handlers never change the same lobby at once, even when
+    a command awaits Discord. Whatever is queued when the actor is free is applied as one batch,
+    after which the lobby is rendered once if any command in it asked to be. Channels share no
+    lock, so each progresses independently. An actor stops after `idle_timeout` seconds without
+    commands and is started again by the next one.
+    """
+
+    def __init__(self, render: Render | None = None, idle_timeout: float = 60.0):
+        self._render = render
+        self.idle_timeout = idle_timeout
+        self.stats = ChannelActorStats()
+        self._actors: dict[int, _Actor] = {}
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    async def run(self, channel_id: int, command: Command, render: bool = False) -> Any:
+        """
+        Applies a command on the channel's actor and returns its result, or raises what it raised.
+        A command may be a function or a coroutine function, and takes no arguments. With
+        `render`, the lobby is rendered before the result is returned.
+        """
+        actor = self._actors.get(channel_id)
+        if actor is not None and actor.task is asyncio.current_task():
+            # Called from one of this channel's own commands; queuing would wait on itself.
+            actor.render_requested |= render
+            self.stats.render_requests += render
+            return await _call(command)
+
+        if actor is None:
+            actor = _Actor(channel_id)
+            actor.task = asyncio.get_running_loop().create_task(self._serve(actor))
+            self._actors[channel_id] = actor
+
+        future = asyncio.get_running_loop().create_future()
+        actor.queue.put_nowait(_Queued(command, render, future))
+        return await future
+
+    def busy(self, channel_id: int) -> bool:
+        """
+        Returns whether a channel's actor is applying commands or rendering, so a change made
+        outside it now could land in the middle of one.
+        """
+        actor = self._actors.get(channel_id)
+        return actor is not None and (actor.busy or not actor.queue.empty())
+
+    async def _serve(self, actor: _Actor) -> None:
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(actor.queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if actor.queue.empty():
+                        return
+                    continue
+
+                batch = [first]
+                while not actor.queue.empty():
+                    batch.append(actor.queue.get_nowait())
+                actor.busy = True
+                try:
+                    await self._apply(actor, batch)
+                finally:
+                    actor.busy = False
+                    # Only left unresolved if the actor itself was cancelled mid-batch.
+                    for item in batch:
+                        item.future.cancel()
+        finally:
+            if self._actors.get(actor.channel_id) is actor:
+                del self._actors[actor.channel_id]
+            while not actor.queue.empty():
+                actor.queue.get_nowait().future.cancel()
+
+    async def _apply(self, actor: _Actor, batch: list[_Queued]) -> None:
+        outcomes = []
+        for item in batch:
+            if item.future.done():
+                # The caller gave up waiting, so the command no longer applies.
+                continue
+            try:
+                outcomes.append((item, await _call(item.command), None))
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                outcomes.append((item, None, e))
+                continue
+            actor.render_requested |= item.render
+            self.stats.render_requests += item.render
+
+        self.stats.commands += len(outcomes)
+        self.stats.batches += 1
+        self.stats.largest_batch = max(self.stats.largest_batch, len(outcomes))
+
+        if actor.render_requested and self._render is not None:
+            actor.render_requested = False
+            self.stats.renders += 1
+            try:
+                await self._render(actor.channel_id)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Render Error: {e}")
+
+        # Results are released after rendering, so follow-ups are sent after the lobby updates.
+        for item, result, error in outcomes:
+            if item.future.done():
+                continue
+            if error is None:
+                item.future.set_result(result)
+            else:
+                item.future.set_exception(error)
+
+    async def close(self) -> None:
+        """
+        Stops every actor, cancelling commands that haven't been applied.
+        """
+        tasks = [actor.task for actor in self._actors.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _call(command: Command) -> Any:
+    result = command()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
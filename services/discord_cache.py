@@ -0,0 +1,156 @@
+"""
+Provides a cache for the users and channels fetched from Discord, so each one costs a single REST
+call until it expires.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable
+
+import discord
+
+Fetch = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters describing how often a cache answered without fetching.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+    def hit_rate(self) -> float:
+        """
+        Returns the share of lookups answered without a fetch of their own.
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+
+class TtlCache:
+    """
+    Keeps fetched values for `ttl` seconds, holding at most `max_size` of them and dropping the
+    oldest first. Lookups that miss while the same key is already being fetched wait for that
+    fetch instead of starting another. Failed fetches aren't cached.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._values: dict[Hashable, tuple[float, Any]] = {}
+        self._pending: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    async def get(self, key: Hashable, fetch: Fetch) -> Any:
+        """
+        Returns the value cached for a key, calling `fetch` to get it if it has none.
+        """
+        entry = self._values.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.stats.hits += 1
+                return value
+            del self._values[key]
+            self.stats.expired += 1
+
+        task = self._pending.get(key)
+        if task is None:
+            self.stats.misses += 1
+            task = asyncio.get_running_loop().create_task(self._fetch(key, fetch))
+            self._pending[key] = task
+        else:
+            self.stats.coalesced += 1
+        # One caller giving up shouldn't cancel the fetch the others are waiting for.
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Drops a key's cached value, so the next lookup fetches it again.
+        """
+        self._values.pop(key, None)
+
+    async def _fetch(self, key: Hashable, fetch: Fetch) -> Any:
+        try:
+            value = await fetch()
+        finally:
+            del self._pending[key]
+        self._values[key] = (time.monotonic() + self.ttl, value)
+        if len(self._values) > self.max_size:
+            del self._values[next(iter(self._values))]
+            self.stats.evicted += 1
+        return value
+
+
+class DiscordCache:
+    """
+    Looks users, their DM channels and channels up in the client's own cache first, then in TTL
+    caches, and only fetches them over REST when neither has them. Sending a DM through a cached
+    DM channel skips fetching the user and opening the channel again.
+    """
+
+    def __init__(self, client: discord.Client, ttl: float = 600.0):
+        self.client = client
+        self.users = TtlCache(ttl)
+        self.dm_channels = TtlCache(ttl)
+        self.channels = TtlCache(ttl)
+
+    async def user(self, user_id: int) -> discord.User:
+        """
+        Gets a user.
+        """
+        user = self.client.get_user(user_id)
+        if user is not None:
+            return user
+        return await self.users.get(user_id, partial(self.client.fetch_user, user_id))
+
+    async def dm_channel(self, user_id: int) -> discord.DMChannel:
+        """
+        Gets the DM channel with a user, opening it if needed.
+        """
+
+        async def open_dm() -> discord.DMChannel:
+            user = await self.user(user_id)
+            return user.dm_channel or await user.create_dm()
+
+        return await self.dm_channels.get(user_id, open_dm)
+
+    async def send_dm(self, user_id: int, *args, **kwargs) -> discord.Message:
+        """
+        Sends a user a direct message.
+        """
+        channel = await self.dm_channel(user_id)
+        return await channel.send(*args, **kwargs)
+
+    async def channel(self, channel_id: int):
+        """
+        Gets a channel.
+        """
+        channel = self.client.get_channel(channel_id)
+        if channel is not None:
+            return channel
+        return await self.channels.get(
+            channel_id, partial(self.client.fetch_channel, channel_id)
+        )
+
+    def stats(self) -> dict[str, CacheStats]:
+        """
+        Returns the counters of each cache by name.
+        """
+        return {
+            "users": self.users.stats,
+            "dm_channels": self.dm_channels.stats,
+            "channels": self.channels.stats,
+        }
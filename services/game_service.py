@@ -2,23 +2,43 @@
 Provides services for interacting with various games.
 """
 
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from discord.interactions import User
 
 from models.deck import Color
 from models.game_state import Phase, GameError
+from models.lobby_model import Lobby
+from services.bot_scheduler import BotScheduler
 from services.lobby_service import LobbyService
 
 
+@dataclass(frozen=True)
+class AfkSkip:
+    """
+    What happened when a player's turn timed out: how many cards they drew, how many times they
+    have been AFK, and whether that got them kicked.
+    """
+
+    player_id: int
+    drawn: int
+    afk_count: int
+    kicked: bool
+
+
 class GameService:
     """
     The game service which provides a higher level interface for interacting with games within
     lobbies.
     """
 
-    def __init__(self, lobby_service: LobbyService):
+    def __init__(
+        self, lobby_service: LobbyService, bot_scheduler: BotScheduler | None = None
+    ):
         self.lobby_service = lobby_service
+        self.bot_scheduler = bot_scheduler
 
     def play_card(
         self, channel_id: int, user_id: int, card_index: int, color: Color | None
@@ -37,7 +57,26 @@ class GameService:
             lobby.game.play_bot()
 
         lobby.last_move = result
-        self.lobby_service.save()
+        self.lobby_service.save(channel_id)
+        return result
+
+    async def play_card_async(
+        self, channel_id: int, user_id: int, card_index: int, color: Color | None
+    ):
+        """
+        Like `play_card`, but when a bot scheduler is configured the bot turns that follow are
+        decided in batches together with bots from other lobbies.
+        """
+        if self.bot_scheduler is None:
+            return self.play_card(channel_id, user_id, card_index, color)
+
+        lobby = self.lobby_service.get_lobby(channel_id)
+        result = lobby.game.play(user_id, card_index, color)
+
+        await self.bot_scheduler.play_bots(lobby.game)
+
+        lobby.last_move = result
+        self.lobby_service.save(channel_id)
         return result
 
     def draw(self, channel_id: int, user_id: int):
@@ -52,16 +91,99 @@ class GameService:
             "player": user_id,
             "count": len(result.drawn),
         }
-        self.lobby_service.save()
+        self.lobby_service.save(channel_id)
         return result
 
+    def skip_afk_turn(
+        self, channel_id: int, player_id: int, start_turn_count: int
+    ) -> tuple[int, int] | None:
+        """
+        Draws for a player whose turn timed out and skips them, returning how many cards they drew
+        and how many times they have been AFK, or None if they have played since.
+        """
+        lobby = self.lobby_service.get_lobby(channel_id)
+        skipped = _skip_afk_turn(lobby, player_id, start_turn_count)
+        if skipped is None:
+            return None
+        self.lobby_service.save(channel_id)
+        return skipped
+
+    def skip_afk_turns(
+        self, turns: list[tuple[int, int, int]], kick_after: int = 5
+    ) -> dict[int, AfkSkip]:
+        """
+        Applies every timed out turn of a timer tick, given as (channel, player, turn count), and
+        persists the lobbies that changed as one write. A player who reaches `kick_after` AFK
+        turns is kicked as part of the same pass. Returns what happened in each channel whose
+        player hadn't played since.
+        """
+        skips = {}
+        for channel_id, player_id, start_turn_count in turns:
+            try:
+                lobby = self.lobby_service.get_lobby(channel_id)
+                skipped = _skip_afk_turn(lobby, player_id, start_turn_count)
+            except GameError:
+                # The lobby was disbanded, or the turn can't be skipped; the rest still apply.
+                continue
+            if skipped is None:
+                continue
+
+            drawn, afk_count = skipped
+            kicked = afk_count >= kick_after and lobby.game.phase() == Phase.PLAYING
+            if kicked:
+                lobby.game.kick_player(player_id)
+            skips[channel_id] = AfkSkip(player_id, drawn, afk_count, kicked)
+
+        if skips:
+            self.lobby_service.save_many(skips)
+        return skips
+
+    def catch_up(
+        self,
+        channel_id: int,
+        now: datetime,
+        kick_after: int = 5,
+        turn_seconds: float = 60.0,
+    ) -> list[AfkSkip]:
+        """
+        Applies what the AFK timer would have done to a game while the bot was offline: every
+        turn whose deadline passed before `now` is skipped, each starting a new `turn_seconds`
+        window, and players reaching `kick_after` AFK turns are kicked. The game is saved once
+        and its deadline is left where the timer would have it. Returns the skips in order.
+        """
+        lobby = self.lobby_service.get_lobby(channel_id)
+        game = lobby.game
+        deadline = game.afk_deadline()
+        if deadline is None:
+            return []
+        if deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=timezone.utc)
+
+        skips = []
+        while game.phase() == Phase.PLAYING and deadline <= now:
+            player_id = game.current_player()
+            skipped = _skip_afk_turn(lobby, player_id, game.turn_count())
+            if skipped is None:
+                break
+            drawn, afk_count = skipped
+            kicked = afk_count >= kick_after and game.phase() == Phase.PLAYING
+            if kicked:
+                game.kick_player(player_id)
+            skips.append(AfkSkip(player_id, drawn, afk_count, kicked))
+            deadline += timedelta(seconds=turn_seconds)
+            game.state["afk_deadline"] = deadline
+
+        if skips:
+            self.lobby_service.save(channel_id)
+        return skips
+
     def call_uno(self, channel_id: int, caller_id: int) -> dict[str, Any]:
         """
         Instructs the game to process a Call UNO button press.
         """
         lobby = self.lobby_service.get_lobby(channel_id)
         result = lobby.game.call_uno(caller_id)
-        self.lobby_service.save()
+        self.lobby_service.save(channel_id)
         return result
 
     def end_game(self, channel_id: int) -> None:
@@ -71,7 +193,7 @@ class GameService:
         lobby = self.lobby_service.get_lobby(channel_id)
         lobby.game.reset()
         lobby.last_move = None
-        self.lobby_service.save()
+        self.lobby_service.save(channel_id)
 
     def delete_game(self, channel_id: int, caller: User) -> None:
         """
@@ -85,7 +207,7 @@ class GameService:
         """
         lobby = self.lobby_service.get_lobby(channel_id)
         lobby.game.kick_player(target_id)
-        self.lobby_service.save()
+        self.lobby_service.save(channel_id)
 
     def leave_player(self, channel_id: int, user_id: int):
         """
@@ -99,5 +221,28 @@ class GameService:
             lobby.game.kick_player(user_id)
         else:
             raise GameError("You can't leave a finished game.")
-        self.lobby_service.save()
+        self.lobby_service.save(channel_id)
         return phase
+
+
+def _skip_afk_turn(
+    lobby: Lobby, player_id: int, start_turn_count: int
+) -> tuple[int, int] | None:
+    game = lobby.game
+    if (
+        game.phase() != Phase.PLAYING
+        or game.current_player() != player_id
+        or game.turn_count() != start_turn_count
+    ):
+        return None
+
+    result = game.draw_and_pass(player_id)
+    lobby.last_move = {
+        "type": "draw",
+        "player": player_id,
+        "count": len(result.drawn),
+    }
+
+    afk_counts = game.state["afk_counts"]
+    afk_counts[player_id] = afk_counts.get(player_id, 0) + 1
+    return len(result.drawn), afk_counts[player_id]
@@ -0,0 +1,534 @@
+"""
+Provides an optional pool of worker processes which run game logic, so CPU-heavy bots and big
+lobbies spread across cores. Each worker owns the lobbies whose channel IDs hash into its range
+and applies every change to them; the bot's own process keeps only Discord work and a read-only
+copy of each lobby for rendering.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import multiprocessing
+import time
+import zlib
+from collections.abc import Iterable
+from datetime import datetime
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+from models.deck import Color
+from models.game_state import GameError
+from models.lobby_model import Lobby, LobbyUser
+from repos.lobby_repo import LobbyRepository
+from repos.lobby_store import LobbyStore
+from services.game_service import AfkSkip, GameService
+from services.lobby_service import LobbyService
+
+HASH_SPACE = 1 << 32
+
+# The service methods a worker may be asked to run.
+_METHODS = {
+    "lobby": {
+        "create_lobby",
+        "start_lobby",
+        "join_lobby",
+        "leave_lobby",
+        "disband_lobby",
+    },
+    "game": {
+        "play_card",
+        "draw",
+        "skip_afk_turn",
+        "skip_afk_turns",
+        "catch_up",
+        "call_uno",
+        "end_game",
+        "delete_game",
+        "kick_player",
+        "leave_player",
+    },
+}
+
+# Lobby fields the bot's process may change itself, such as the ID of a message it sent.
+_LOCAL_FIELDS = ("main_message", "solo_timer_message", "solo_expires_at", "guild_id")
+
+
+def channel_hash(channel_id: int) -> int:
+    """
+    Returns where a channel falls in the hash space that is split between workers.
+    """
+    return zlib.crc32(channel_id.to_bytes(8, "little", signed=True))
+
+
+@dataclass(frozen=True)
+class ShardRanges:
+    """
+    Splits the hash space into one contiguous range per worker. `bounds` holds where each range
+    after the first begins.
+    """
+
+    bounds: tuple[int, ...] = ()
+
+    @property
+    def workers(self) -> int:
+        """
+        Returns how many ranges there are.
+        """
+        return len(self.bounds) + 1
+
+    def worker_for(self, channel_id: int) -> int:
+        """
+        Returns the index of the worker owning a channel.
+        """
+        return bisect.bisect_right(self.bounds, channel_hash(channel_id))
+
+    @classmethod
+    def even(cls, workers: int) -> "ShardRanges":
+        """
+        Splits the hash space into equal ranges.
+        """
+        return cls(tuple(HASH_SPACE * index // workers for index in range(1, workers)))
+
+    @classmethod
+    def balanced(cls, channel_ids: Iterable[int], workers: int) -> "ShardRanges":
+        """
+        Splits the hash space so each worker owns about as many of `channel_ids` as the others,
+        falling back to equal ranges when there are too few channels to go by.
+        """
+        hashes = sorted(channel_hash(channel_id) for channel_id in channel_ids)
+        if len(hashes) < workers * 8:
+            return cls.even(workers)
+        return cls(
+            tuple(hashes[len(hashes) * index // workers] for index in range(1, workers))
+        )
+
+
+@dataclass
+class WorkerLoad:
+    """
+    What one worker has been asked to do: calls sent and failed, calls still waiting for a reply,
+    seconds spent running them, and how many lobbies it holds in memory.
+    """
+
+    worker: int
+    calls: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    busy_seconds: float = 0.0
+    lobbies: int = 0
+
+
+class GameWorkerPool:
+    """
+    Starts `workers` processes, each with its own repository over the store `store_factory`
+    opens, or the default store if it is None; several processes share it, so it should be SQLite
+    or a lobby store server. `call` sends a service call to the worker owning the channel and
+    resolves with its result and the lobby as it was left. Ranges are balanced over `channel_ids`,
+    the lobbies already stored, when the pool starts.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        workers: int,
+        store_factory: Callable[[], LobbyStore] | None = None,
+        channel_ids: Iterable[int] = (),
+    ):
+        self.ranges = ShardRanges.balanced(channel_ids, workers)
+        self.loads = [WorkerLoad(index) for index in range(workers)]
+        self._pending: dict[int, tuple[int, asyncio.Future]] = {}
+        self._next_call = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connections: list[Connection] = []
+        self._processes = []
+
+        # Spawned rather than forked, so workers don't inherit the event loop or Discord client.
+        context = multiprocessing.get_context("spawn")
+        for index in range(workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=_serve_worker,
+                args=(worker_connection, store_factory),
+                name=f"game-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+        # Each worker says when it has loaded its repository.
+        for connection in self._connections:
+            connection.recv()
+
+    def rebalance(self, channel_ids: Iterable[int]) -> None:
+        """
+        Moves the ranges so the given channels are spread evenly. Workers drop the lobbies they
+        hold, writing any changes first, so each is loaded again by its new owner. Only call this
+        while no calls are in flight, such as at startup.
+        """
+        if self._pending:
+            raise RuntimeError("Can't rebalance workers with calls in flight")
+        self.ranges = ShardRanges.balanced(channel_ids, len(self._connections))
+        for connection in self._connections:
+            connection.send((None, "evict", "", 0, ()))
+            connection.recv()
+
+    def call(self, channel_id: int, service: str, method: str, *args) -> asyncio.Future:
+        """
+        Sends a call to the worker owning a channel right away, so calls reach each worker in the
+        order they were made. The future resolves with the call's result and the lobby as the
+        worker left it, or None if it was deleted.
+        """
+        loop = asyncio.get_running_loop()
+        self._watch(loop)
+        worker = self.ranges.worker_for(channel_id)
+        call_id = self._next_call
+        self._next_call += 1
+
+        future = loop.create_future()
+        self._pending[call_id] = (worker, future)
+        self._connections[worker].send((call_id, service, method, channel_id, args))
+        self.loads[worker].calls += 1
+        self.loads[worker].in_flight += 1
+        return future
+
+    def _watch(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is loop:
+            return
+        self._loop = loop
+        for worker, connection in enumerate(self._connections):
+            loop.add_reader(connection.fileno(), self._receive, worker)
+
+    def _receive(self, worker: int) -> None:
+        connection = self._connections[worker]
+        while connection.poll():
+            try:
+                reply = connection.recv()
+            except (EOFError, OSError):
+                self._worker_died(worker)
+                return
+
+            call_id, outcome, value, lobby, busy_seconds, lobbies = reply
+            load = self.loads[worker]
+            load.in_flight -= 1
+            load.busy_seconds += busy_seconds
+            load.lobbies = lobbies
+            _, future = self._pending.pop(call_id)
+            if future.done():
+                continue
+            if outcome == "ok":
+                future.set_result((value, lobby))
+            elif outcome == "game_error":
+                load.errors += 1
+                message, private, title = value
+                future.set_exception(GameError(message, private=private, title=title))
+            else:
+                load.errors += 1
+                future.set_exception(RuntimeError(f"Game worker failed: {value}"))
+
+    def _worker_died(self, worker: int) -> None:
+        self._loop.remove_reader(self._connections[worker].fileno())
+        for call_id, (owner, future) in list(self._pending.items()):
+            if owner == worker:
+                del self._pending[call_id]
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Game worker {worker} died"))
+
+    def close(self) -> None:
+        """
+        Asks every worker to write its changes and exit, and waits for them.
+        """
+        for worker, connection in enumerate(self._connections):
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(connection.fileno())
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._processes[worker].join(10)
+            connection.close()
+
+
+def _serve_worker(
+    connection: Connection, store_factory: Callable[[], LobbyStore] | None
+) -> None:
+    """
+    Runs in a worker process, applying calls in the order they arrive until told to stop.
+    """
+    repo = (
+        LobbyRepository()
+        if store_factory is None
+        else LobbyRepository(store=store_factory())
+    )
+    lobby_service = LobbyService(repo)
+    services = {"lobby": lobby_service, "game": GameService(lobby_service)}
+    connection.send("ready")
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        call_id, service, method, channel_id, args = request
+        start = time.perf_counter()
+        outcome, value = _apply_call(repo, services, service, method, channel_id, args)
+
+        lobby = None
+        if method != "evict" and repo.exists(channel_id):
+            try:
+                lobby = repo.get(channel_id)
+            except KeyError:
+                pass
+        connection.send(
+            (
+                call_id,
+                outcome,
+                value,
+                lobby,
+                time.perf_counter() - start,
+                len(repo.lobbies),
+            )
+        )
+
+    repo.close()
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def _apply_call(
+    repo: LobbyRepository,
+    services: dict[str, Any],
+    service: str,
+    method: str,
+    channel_id: int,
+    args: tuple,
+) -> tuple[str, Any]:
+    """
+    Runs one call, returning whether it succeeded and its result or error.
+    """
+    try:
+        if method == "evict":
+            for lobby_id in list(repo.lobbies):
+                repo.evict(lobby_id)
+            return "ok", None
+        if method == "set_fields":
+            _set_fields(services["lobby"], channel_id, args[0])
+            return "ok", None
+        if method not in _METHODS.get(service, ()):
+            raise ValueError(f"Unknown call {service}.{method}")
+        return "ok", getattr(services[service], method)(*args)
+    except GameError as e:
+        return "game_error", (str(e), e.private, e.title)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return "error", repr(e)
+
+
+def _set_fields(lobby_service: LobbyService, channel_id: int, fields: dict) -> None:
+    lobby = lobby_service.get_lobby(channel_id)
+    for name, value in fields.items():
+        if name == "afk_deadline":
+            lobby.game.state["afk_deadline"] = value
+        else:
+            setattr(lobby, name, value)
+    lobby_service.save(channel_id)
+
+
+def _local_fields(lobby: Lobby) -> dict[str, Any]:
+    fields = {name: getattr(lobby, name) for name in _LOCAL_FIELDS}
+    fields["afk_deadline"] = lobby.game.state.get("afk_deadline")
+    return fields
+
+
+class RemoteLobbyService(LobbyService):
+    """
+    A lobby service whose changes are applied by the worker owning each channel. Lobbies are read
+    from `repo` as usual, which holds the copy each worker last sent back and is never written
+    from this process. Copies are updated in place, so a lobby object held across a call sees
+    its result. `save` sends the fields this process changes itself, such as message IDs, to the
+    owning worker.
+    """
+
+    # pylint: disable=invalid-overridden-method
+
+    def __init__(self, repo: LobbyRepository, pool: GameWorkerPool):
+        super().__init__(repo)
+        self.pool = pool
+        self._sent: dict[int, dict[str, Any]] = {}
+
+    async def call(self, channel_id: int, service: str, method: str, *args) -> Any:
+        """
+        Runs a service method on the worker owning a channel and keeps its copy of the lobby.
+        """
+        value, lobby = await self.pool.call(channel_id, service, method, *args)
+        cached = self._install(channel_id, lobby)
+        # The reply was pickled as a whole, so a returned lobby is the lobby that was sent.
+        return cached if lobby is not None and value is lobby else value
+
+    def _install(self, channel_id: int, lobby: Lobby | None) -> Lobby | None:
+        repo = self._lobby_repo
+        if lobby is None:
+            repo.forget(channel_id)
+            self._sent.pop(channel_id, None)
+            return None
+
+        cached = repo.lobbies.get(channel_id)
+        if cached is None:
+            repo.cache(channel_id, lobby)
+            cached = lobby
+        else:
+            vars(cached.game).update(vars(lobby.game))
+            lobby.game = cached.game
+            vars(cached).update(vars(lobby))
+            repo.cache(channel_id, cached)
+        self._sent[channel_id] = _local_fields(cached)
+        return cached
+
+    def save(self, channel_id: int | None = None) -> None:
+        channel_ids = (
+            list(self._lobby_repo.lobbies) if channel_id is None else [channel_id]
+        )
+        for lobby_id in channel_ids:
+            lobby = self._lobby_repo.lobbies.get(lobby_id)
+            if lobby is None:
+                continue
+            sent = self._sent.setdefault(lobby_id, {})
+            changed = {
+                name: value
+                for name, value in _local_fields(lobby).items()
+                if name not in sent or sent[name] != value
+            }
+            if changed:
+                sent.update(changed)
+                future = self.pool.call(lobby_id, "lobby", "set_fields", changed)
+                future.add_done_callback(_report_failure)
+
+    def save_many(self, channel_ids: Iterable[int]) -> None:
+        for channel_id in channel_ids:
+            self.save(channel_id)
+
+    async def create_lobby(
+        self, channel_id: int, user, guild_id: int | None = None
+    ) -> Lobby:
+        return await self.call(
+            channel_id,
+            "lobby",
+            "create_lobby",
+            channel_id,
+            LobbyUser.from_user(user),
+            guild_id,
+        )
+
+    async def start_lobby(self, channel_id: int) -> Lobby:
+        return await self.call(channel_id, "lobby", "start_lobby", channel_id)
+
+    async def join_lobby(self, channel_id: int, user) -> Lobby:
+        return await self.call(
+            channel_id, "lobby", "join_lobby", channel_id, LobbyUser.from_user(user)
+        )
+
+    async def leave_lobby(self, channel_id: int, user) -> Lobby:
+        return await self.call(
+            channel_id, "lobby", "leave_lobby", channel_id, LobbyUser.from_user(user)
+        )
+
+    async def disband_lobby(self, channel_id: int, user) -> None:
+        return await self.call(
+            channel_id, "lobby", "disband_lobby", channel_id, LobbyUser.from_user(user)
+        )
+
+
+class RemoteGameService(GameService):
+    """
+    A game service whose calls are run by the worker owning each channel. Workers have no bot
+    scheduler, so bot turns are decided one at a time, in parallel across workers.
+    """
+
+    # pylint: disable=invalid-overridden-method
+
+    def __init__(self, lobby_service: RemoteLobbyService):
+        super().__init__(lobby_service)
+        self.lobby_service: RemoteLobbyService = lobby_service
+
+    async def play_card(
+        self, channel_id: int, user_id: int, card_index: int, color: Color | None
+    ):
+        return await self.lobby_service.call(
+            channel_id, "game", "play_card", channel_id, user_id, card_index, color
+        )
+
+    async def play_card_async(
+        self, channel_id: int, user_id: int, card_index: int, color: Color | None
+    ):
+        return await self.play_card(channel_id, user_id, card_index, color)
+
+    async def draw(self, channel_id: int, user_id: int):
+        return await self.lobby_service.call(
+            channel_id, "game", "draw", channel_id, user_id
+        )
+
+    async def skip_afk_turn(
+        self, channel_id: int, player_id: int, start_turn_count: int
+    ) -> tuple[int, int] | None:
+        return await self.lobby_service.call(
+            channel_id, "game", "skip_afk_turn", channel_id, player_id, start_turn_count
+        )
+
+    async def skip_afk_turns(
+        self, turns: list[tuple[int, int, int]], kick_after: int = 5
+    ) -> dict[int, AfkSkip]:
+        # A worker's reply carries one channel's lobby, so each channel is its own call.
+        replies = await asyncio.gather(
+            *(
+                self.lobby_service.call(
+                    turn[0], "game", "skip_afk_turns", [turn], kick_after
+                )
+                for turn in turns
+            )
+        )
+        return {
+            channel_id: skip for reply in replies for channel_id, skip in reply.items()
+        }
+
+    async def catch_up(
+        self,
+        channel_id: int,
+        now: datetime,
+        kick_after: int = 5,
+        turn_seconds: float = 60.0,
+    ) -> list[AfkSkip]:
+        return await self.lobby_service.call(
+            channel_id, "game", "catch_up", channel_id, now, kick_after, turn_seconds
+        )
+
+    async def call_uno(self, channel_id: int, caller_id: int) -> dict[str, Any]:
+        return await self.lobby_service.call(
+            channel_id, "game", "call_uno", channel_id, caller_id
+        )
+
+    async def end_game(self, channel_id: int) -> None:
+        return await self.lobby_service.call(channel_id, "game", "end_game", channel_id)
+
+    async def delete_game(self, channel_id: int, caller) -> None:
+        return await self.lobby_service.call(
+            channel_id, "game", "delete_game", channel_id, LobbyUser.from_user(caller)
+        )
+
+    async def kick_player(self, channel_id: int, target_id: int):
+        return await self.lobby_service.call(
+            channel_id, "game", "kick_player", channel_id, target_id
+        )
+
+    async def leave_player(self, channel_id: int, user_id: int):
+        return await self.lobby_service.call(
+            channel_id, "game", "leave_player", channel_id, user_id
+        )
+
+
+def _report_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Game worker error: {future.exception()}")
@@ -2,6 +2,8 @@
 Provides a lobby manager.
 """
 
+from typing import Iterable
+
 from discord.interactions import User
 
 from models.game_state import GameError, GameState, Phase
@@ -18,15 +20,23 @@ class LobbyService:
     def __init__(self, repo: LobbyRepository):
         self._lobby_repo = repo
 
-    def save(self) -> None:
+    def save(self, channel_id: int | None = None) -> None:
+        """
+        Persists a lobby after it changed, or every lobby if no channel is given.
+        """
+        self._lobby_repo.save(channel_id)
+
+    def save_many(self, channel_ids: Iterable[int]) -> None:
         """
-        Persists the current lobby state to disk.
+        Persists several lobbies that changed together, writing them as one batch.
         """
-        self._lobby_repo.save()
+        self._lobby_repo.save_many(channel_ids)
 
-    def create_lobby(self, channel_id: int, user: User) -> Lobby:
+    def create_lobby(
+        self, channel_id: int, user: User, guild_id: int | None = None
+    ) -> Lobby:
         """
-        Creates a lobby in a channel.
+        Creates a lobby in a channel, recording the guild the channel is in.
         """
 
         if self._lobby_repo.exists(channel_id):
@@ -44,9 +54,9 @@ class LobbyService:
                     title="Lobby Exists",
                 )
 
-        self._lobby_repo.set(channel_id, user, GameState())
+        self._lobby_repo.set(channel_id, user, GameState(), guild_id)
         self._lobby_repo.get(channel_id).game.add_player(user.id)
-        self.save()
+        self.save(channel_id)
 
         return self._lobby_repo.get(channel_id)
 
@@ -57,7 +67,7 @@ class LobbyService:
 
         lobby = self._lobby_repo.get(channel_id)
         lobby.game.start_game()
-        self.save()
+        self.save(channel_id)
 
         return self._lobby_repo.get(channel_id)
 
@@ -90,7 +100,7 @@ class LobbyService:
             )
 
         game.add_player(user.id)
-        self.save()
+        self.save(channel_id)
 
         return lobby
 
@@ -121,7 +131,7 @@ class LobbyService:
             )
 
         game.remove_player(user.id)
-        self.save()
+        self.save(channel_id)
 
         return lobby
 
@@ -0,0 +1,178 @@
+"""
+Provides a hierarchical timer wheel, which keeps the deadlines of every channel and fires them
+from a single task.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import math
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+Expired = list[tuple[Hashable, Any]]
+Handler = Callable[[Expired], Awaitable[None] | None]
+
+
+@dataclass
+class TimerWheelStats:
+    """
+    Counters describing how many timers were set, replaced and fired, and how they were batched.
+    """
+
+    scheduled: int = 0
+    rescheduled: int = 0
+    cancelled: int = 0
+    fired: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+
+
+class TimerWheel:
+    """
+    Keeps one deadline per key in two levels of slots. The inner level has `slots` slots, each
+    `tick` seconds wide; deadlines further away wait in an outer level of `outer_slots` slots, each
+    as wide as the whole inner level, and move inward when the inner level comes round to them.
+    Setting, replacing and cancelling a deadline are a dict insert or delete, and a pending timer
+    is only its key and a small tuple.
+
+    Deadlines are rounded up to a whole tick. Everything due by a tick is passed to `handler` as
+    one list of `(key, value)` pairs, which is awaited before the next tick is processed, so a
+    slow handler makes later timers fire together rather than late one by one. The task sleeps
+    while nothing is scheduled.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        handler: Handler,
+        tick: float = 0.5,
+        slots: int = 256,
+        outer_slots: int = 64,
+    ):
+        self._handler = handler
+        self.tick = tick
+        self.stats = TimerWheelStats()
+        self._inner: list[dict[Hashable, tuple[int, Any]]] = [{} for _ in range(slots)]
+        self._outer: list[dict[Hashable, tuple[int, Any]]] = [
+            {} for _ in range(outer_slots)
+        ]
+        self._where: dict[Hashable, dict[Hashable, tuple[int, Any]]] = {}
+        self._origin = 0.0
+        self._now = 0
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, delay: float, value: Any = None) -> None:
+        """
+        Sets a key to fire with `value` after `delay` seconds, replacing any deadline it had.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._origin = loop.time()
+            self._now = 0
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        elif not self._where:
+            # Nothing was pending, so the idle ticks can be skipped without processing them.
+            self._now = max(self._now, self._tick_at(loop.time()))
+
+        if self.cancel(key, count=False):
+            self.stats.rescheduled += 1
+        self.stats.scheduled += 1
+        due = math.ceil((loop.time() + max(delay, 0.0) - self._origin) / self.tick)
+        self._place(key, max(due, self._now + 1), value)
+        self._wakeup.set()
+
+    def cancel(self, key: Hashable, count: bool = True) -> bool:
+        """
+        Drops a key's deadline, returning whether it had one.
+        """
+        slot = self._where.pop(key, None)
+        if slot is None:
+            return False
+        del slot[key]
+        self.stats.cancelled += count
+        return True
+
+    def _tick_at(self, when: float) -> int:
+        return math.floor((when - self._origin) / self.tick)
+
+    def _place(self, key: Hashable, due: int, value: Any) -> None:
+        slots = len(self._inner)
+        if due - self._now < slots:
+            slot = self._inner[due % slots]
+        else:
+            # The furthest outer slot is cascaded first and placed again, so clamping is safe.
+            block = min(due // slots, self._now // slots + len(self._outer))
+            slot = self._outer[block % len(self._outer)]
+        slot[key] = (due, value)
+        self._where[key] = slot
+
+    def _advance(self, until: int) -> Expired:
+        """
+        Processes every tick up to `until` and returns what fell due.
+        """
+        slots = len(self._inner)
+        expired: Expired = []
+        while self._now < until and self._where:
+            self._now += 1
+            if self._now % slots == 0:
+                outer = self._outer[(self._now // slots) % len(self._outer)]
+                cascading = list(outer.items())
+                outer.clear()
+                for key, (due, value) in cascading:
+                    self._place(key, due, value)
+
+            inner = self._inner[self._now % slots]
+            for key, (_due, value) in inner.items():
+                del self._where[key]
+                expired.append((key, value))
+            inner.clear()
+        self._now = max(self._now, until)
+        return expired
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._where:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            next_tick = self._origin + (self._now + 1) * self.tick
+            await asyncio.sleep(max(next_tick - loop.time(), 0.0))
+            expired = self._advance(self._tick_at(loop.time()))
+            if expired:
+                await self._fire(expired)
+
+    async def _fire(self, expired: Expired) -> None:
+        self.stats.fired += len(expired)
+        self.stats.batches += 1
+        self.stats.largest_batch = max(self.stats.largest_batch, len(expired))
+        try:
+            result = self._handler(expired)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Timer Error: {e}")
+
+    async def close(self) -> None:
+        """
+        Stops the wheel's task. Pending deadlines are dropped.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for slot in self._where.values():
+            slot.clear()
+        self._where.clear()
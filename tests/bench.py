@@ -0,0 +1,658 @@
+"""
+Benchmarks performance-sensitive parts of the bot. Like the fuzzer, this is not run by pytest.
+
+Usage: python3 tests/bench.py <benchmark> [<benchmark> ...]
+"""
+
+#!/usr/bin/python3
+
+import asyncio
+import multiprocessing
+from functools import partial
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from models import bot, bot_batch, endgame, policy
+from models.deck import Color, Deck
+from models.game_state import GameError, GameState, Phase, PlayResult
+from models.lobby_model import Lobby, LobbyUser
+from repos.journal_lobby_store import JournalLobbyStore
+from repos.lobby_repo import LobbyRepository
+from repos.lobby_codec import Compression, encode_lobby
+from repos.lobby_store import PickleFileStore, ShardedFileStore, StoredLobby
+from repos.lobby_store_server import serve
+from repos.socket_lobby_store import SocketLobbyStore
+from repos.sqlite_lobby_store import SqliteLobbyStore
+from services.bot_scheduler import BotScheduler
+from services.channel_actors import ChannelActors
+from services.game_service import GameService
+from services.game_workers import GameWorkerPool, RemoteGameService, RemoteLobbyService
+from services.lobby_service import LobbyService
+from services.timer_wheel import TimerWheel
+
+
+def _report(name: str, count: int, elapsed: float, unit: str) -> None:
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"  {name:<28} {count:>7} {unit:<10} {elapsed * 1000:>10.2f} ms {rate:>14,.0f}/s"
+    )
+
+
+def _random_decisions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    deck = Deck()
+    deck.add_default_cards()
+    cards = deck.cards
+    hands = [rng.sample(cards, rng.randint(1, 12)) for _ in range(count)]
+    tops = [rng.choice(cards[:-8]) for _ in range(count)]
+    return hands, tops
+
+
+def bench_bot_batch() -> None:
+    """
+    Compares deciding N pending bot moves one at a time with one vectorized batch, and measures the
+    async scheduler end to end.
+    """
+    if not bot_batch.numpy_available():
+        print(
+            "  numpy is not installed; the batch path falls back to the sequential one"
+        )
+
+    for count in (1, 100, 10_000):
+        hands, tops = _random_decisions(count)
+
+        start = time.perf_counter()
+        for hand, top in zip(hands, tops):
+            bot.play_card(bot.Strategy.RANDOM, hand, top)
+        _report(
+            f"sequential ({count})", count, time.perf_counter() - start, "decisions"
+        )
+
+        start = time.perf_counter()
+        bot_batch.decide_batch(hands, tops)
+        _report(f"batched ({count})", count, time.perf_counter() - start, "decisions")
+
+        async def run_scheduler(hands=hands, tops=tops):
+            scheduler = BotScheduler(window=0.001)
+            await asyncio.gather(
+                *(scheduler.decide(hand, top) for hand, top in zip(hands, tops))
+            )
+
+        start = time.perf_counter()
+        asyncio.run(run_scheduler())
+        _report(f"scheduler ({count})", count, time.perf_counter() - start, "decisions")
+
+
+def bench_endgame() -> None:
+    """
+    Solves random two player endgames with 4 to 10 cards in play and reports nodes/sec.
+    """
+    rng = random.Random(7)
+    deck = Deck()
+    deck.add_default_cards()
+
+    for cards, pile_size in ((4, 0), (6, 5), (8, 20), (10, 80)):
+        solver = endgame.EndgameSolver()
+        for _ in range(20):
+            cards_used = rng.sample(deck.cards, cards + pile_size + 1)
+            top = next(c for c in cards_used if c.color is not None)
+            cards_used.remove(top)
+            position = endgame.position_for(
+                cards_used[: cards // 2],
+                cards_used[cards // 2 : cards],
+                top,
+                cards_used[cards:],
+            )
+            solver.solve(position)
+
+        stats = solver.total
+        _report(
+            f"{cards} cards, {pile_size} in pile", stats.nodes, stats.elapsed, "nodes"
+        )
+        print(
+            f"    {stats.table_hits} table hits, budget exhausted: {stats.budget_exhausted}"
+        )
+
+
+def bench_policy() -> None:
+    """
+    Measures per-decision latency of each strategy's `bot.play_card`. POLICY uses the table at
+    `$UNO_POLICY_TABLE`, or a table of random scores if that isn't set.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if not os.getenv("UNO_POLICY_TABLE"):
+            rng = random.Random(3)
+            path = Path(temp_dir) / "policy.tbl"
+            size = policy.NUM_STATES * policy.NUM_MOVES
+            policy.write_table(
+                path, array("H", (rng.randrange(policy.MAX_SCORE) for _ in range(size)))
+            )
+            os.environ["UNO_POLICY_TABLE"] = str(path)
+
+        hands, tops = _random_decisions(20_000)
+        sizes = [random.Random(i).randint(1, 12) for i in range(len(hands))]
+        for strategy in bot.Strategy:
+            start = time.perf_counter()
+            for hand, top, size in zip(hands, tops, sizes):
+                bot.play_card(strategy, hand, top, next_hand_size=size)
+            elapsed = time.perf_counter() - start
+            _report(strategy.name.lower(), len(hands), elapsed, "decisions")
+            print(f"    {elapsed / len(hands) * 1e6:.2f} us per decision")
+
+        # Unmap before the temporary table is removed.
+        table = policy.load_table(policy.default_path())
+        if table is not None:
+            table.close()
+        policy.clear_tables()
+
+
+def _bot_lobby(channel_id: int) -> Lobby:
+    game = GameState(seed=channel_id)
+    game.state["endgame_solver"] = False
+    for _ in range(4):
+        game.add_bot()
+    game.start_game()
+    return Lobby(LobbyUser(channel_id, "Host"), game, channel_id, channel_id=channel_id)
+
+
+def _play_move(repo: LobbyRepository, channel_id: int) -> None:
+    lobby = repo.get(channel_id)
+    try:
+        lobby.game.play_bot()
+    except GameError:
+        pass
+    if lobby.game.phase() != Phase.PLAYING:
+        repo.lobbies[channel_id] = _bot_lobby(channel_id)
+    repo.save(channel_id)
+
+
+def bench_persistence() -> None:
+    """
+    Measures how many moves per second can be persisted when every move saves its lobby, for
+    each store. `single file` is the full pickle rewrite every save used to do.
+    """
+    lobby_count, moves = 200, 2_000
+    stores = {
+        "single file": lambda path: PickleFileStore(path / "lobbies.pkl"),
+        "file per lobby": lambda path: ShardedFileStore(path / "lobbies"),
+        "sqlite": lambda path: SqliteLobbyStore(path / "lobbies.sqlite3"),
+        "journal, fsync each": lambda path: JournalLobbyStore(
+            path / "journal", fsync_every=1, fsync_interval=0
+        ),
+        "journal, group fsync": lambda path: JournalLobbyStore(path / "journal"),
+    }
+    for name, make_store in stores.items():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = LobbyRepository(store=make_store(Path(temp_dir)))
+            for channel_id in range(lobby_count):
+                repo.lobbies[channel_id] = _bot_lobby(channel_id)
+            repo.save()
+
+            rng = random.Random(0)
+            written = repo.stats.bytes_written
+            start = time.perf_counter()
+            for _ in range(moves):
+                _play_move(repo, rng.randrange(lobby_count))
+            repo.close()
+            elapsed = time.perf_counter() - start
+            _report(name, moves, elapsed, "moves")
+            written = repo.stats.bytes_written - written
+            print(f"    {written / moves:,.0f} bytes per move")
+
+
+def _fleet(count: int) -> list[Lobby]:
+    """
+    Builds lobbies part way through bot games, each with the last move recorded as the bot
+    would.
+    """
+    rng = random.Random(count)
+    lobbies = []
+    for channel_id in range(count):
+        lobby = _bot_lobby(channel_id)
+        game = lobby.game
+        for _ in range(rng.randrange(40)):
+            player = game.current_player()
+            try:
+                game.play_bot()
+            except GameError:
+                break
+            if game.phase() != Phase.PLAYING:
+                break
+            lobby.last_move = PlayResult(
+                player, game.top_card(), next_player=game.current_player()
+            )
+        lobbies.append(lobby)
+    return lobbies
+
+
+def bench_compression() -> None:
+    """
+    Reports bytes on disk, save latency and load latency for fleets of lobbies stored one file per
+    lobby with each compression setting.
+    """
+    settings = ["none", "zlib:1", "zlib:6", "zlib:9", "bz2:9", "lzma:0", "lzma:6"]
+    fleet = _fleet(10_000)
+    for count in (100, 1_000, 10_000):
+        for setting in settings:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                directory = Path(temp_dir) / "lobbies"
+                repo = LobbyRepository(
+                    store=ShardedFileStore(directory),
+                    compression=Compression.parse(setting),
+                )
+                repo.lobbies.update(enumerate(fleet[:count]))
+
+                start = time.perf_counter()
+                repo.save()
+                saved = time.perf_counter() - start
+                repo.close()
+                size = sum(path.stat().st_size for path in directory.glob("*.lobby"))
+
+                start = time.perf_counter()
+                reloaded = LobbyRepository(store=ShardedFileStore(directory))
+                for lobby_id in reloaded.ids():
+                    reloaded.get(lobby_id)
+                loaded = time.perf_counter() - start
+
+                print(
+                    f"  {setting + f' ({count})':<20} {size / count:>8,.0f} bytes/lobby"
+                    f" {size / 2**20:>9,.2f} MiB"
+                    f" save {saved / count * 1e6:>7,.0f} us/lobby"
+                    f" load {loaded / count * 1e6:>7,.0f} us/lobby"
+                )
+
+
+def bench_startup() -> None:
+    """
+    Measures how long constructing a repository takes, and how much memory it holds afterwards,
+    as the number of stored lobbies grows. Indexed stores only read their index at startup.
+    """
+    stores = {
+        "single file": lambda path: PickleFileStore(path / "lobbies.pkl"),
+        "file per lobby": lambda path: ShardedFileStore(path / "lobbies"),
+        "sqlite": lambda path: SqliteLobbyStore(path / "lobbies.sqlite3"),
+    }
+    for count in (1_000, 10_000, 30_000):
+        record = StoredLobby(encode_lobby(_bot_lobby(0)), phase="PLAYING")
+        for name, make_store in stores.items():
+            with tempfile.TemporaryDirectory() as temp_dir:
+                store = make_store(Path(temp_dir))
+                store.write(dict.fromkeys(range(count), record), set())
+                store.close()
+
+                start = time.perf_counter()
+                repo = LobbyRepository(store=make_store(Path(temp_dir)))
+                elapsed = time.perf_counter() - start
+                repo.close()
+
+                # Measured separately since tracing allocations slows startup down.
+                tracemalloc.start()
+                repo = LobbyRepository(store=make_store(Path(temp_dir)))
+                memory = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                repo.close()
+                _report(f"{name} ({count})", count, elapsed, "lobbies")
+                print(f"    {memory / 2**20:,.1f} MiB held after startup")
+
+
+def _run_store_server(socket_path: Path, database_path: Path) -> None:
+    asyncio.run(serve(socket_path, SqliteLobbyStore(database_path)))
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def _store_client(
+    socket_path: Path, worker: int, moves: int, batch: int, start, results
+) -> None:
+    """
+    Plays bot moves in lobbies of its own through the store server, flushing every `batch`
+    moves, and reports how long they took.
+    """
+    repo = LobbyRepository(
+        store=SocketLobbyStore(socket_path), max_staleness=60.0 if batch > 1 else 0.0
+    )
+    channel_ids = range(worker * 1_000, worker * 1_000 + 50)
+    for channel_id in channel_ids:
+        repo.lobbies[channel_id] = _bot_lobby(channel_id)
+    repo.save()
+
+    async def play() -> None:
+        rng = random.Random(worker)
+        for move in range(1, moves + 1):
+            _play_move(repo, rng.choice(channel_ids))
+            if move % batch == 0:
+                await repo.flush_async()
+        await repo.flush_async()
+
+    start.wait()
+    began = time.perf_counter()
+    asyncio.run(play())
+    results.put(time.perf_counter() - began)
+    repo.close()
+
+
+def bench_store_server() -> None:
+    """
+    Measures how many moves per second N client processes can persist through one lobby store
+    server backed by SQLite, saving every move or flushing in batches of 16.
+    """
+    moves = 1_000
+    for batch in (1, 16):
+        for clients in (1, 2, 4):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                socket_path = Path(temp_dir) / "lobbies.sock"
+                server = multiprocessing.Process(
+                    target=_run_store_server,
+                    args=(socket_path, Path(temp_dir) / "lobbies.sqlite3"),
+                )
+                server.start()
+                while not socket_path.exists():
+                    time.sleep(0.01)
+
+                start = multiprocessing.Barrier(clients + 1)
+                results = multiprocessing.Queue()
+                workers = [
+                    multiprocessing.Process(
+                        target=_store_client,
+                        args=(socket_path, worker, moves, batch, start, results),
+                    )
+                    for worker in range(clients)
+                ]
+                for worker in workers:
+                    worker.start()
+                start.wait()
+                elapsed = max(results.get() for _ in workers)
+                for worker in workers:
+                    worker.join()
+                server.terminate()
+                server.join()
+                _report(
+                    f"{clients} clients, batch {batch}",
+                    clients * moves,
+                    elapsed,
+                    "moves",
+                )
+
+
+def bench_actors() -> None:
+    """
+    Measures how quickly many channels apply concurrent bot moves when each move awaits a
+    simulated Discord call and is followed by a re-render, comparing one global lock with a
+    per-channel actor that batches renders.
+    """
+    channels, moves_per_channel = 200, 5
+    call_latency, render_latency = 0.002, 0.005
+
+    def fresh_lobbies() -> dict[int, Lobby]:
+        return {channel_id: _bot_lobby(channel_id) for channel_id in range(channels)}
+
+    async def move(lobby: Lobby) -> None:
+        try:
+            lobby.game.play_bot()
+        except GameError:
+            pass
+        await asyncio.sleep(call_latency)
+
+    async def with_lock() -> str:
+        lobbies, lock = fresh_lobbies(), asyncio.Lock()
+
+        async def handle(channel_id: int) -> None:
+            async with lock:
+                await move(lobbies[channel_id])
+                await asyncio.sleep(render_latency)
+
+        await asyncio.gather(
+            *(
+                handle(channel_id)
+                for channel_id in range(channels)
+                for _ in range(moves_per_channel)
+            )
+        )
+        return f"{channels * moves_per_channel:,} renders"
+
+    async def with_actors() -> str:
+        lobbies = fresh_lobbies()
+
+        async def render(_channel_id: int) -> None:
+            await asyncio.sleep(render_latency)
+
+        actors = ChannelActors(render)
+        await asyncio.gather(
+            *(
+                actors.run(
+                    channel_id,
+                    lambda channel_id=channel_id: move(lobbies[channel_id]),
+                    render=True,
+                )
+                for channel_id in range(channels)
+                for _ in range(moves_per_channel)
+            )
+        )
+        await actors.close()
+        return f"{actors.stats.renders:,} renders"
+
+    for name, run in (("global lock", with_lock), ("per-channel actors", with_actors)):
+        start = time.perf_counter()
+        renders = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        _report(name, channels * moves_per_channel, elapsed, "moves")
+        print(f"    {renders}")
+
+
+def bench_timers() -> None:
+    """
+    Compares AFK timers as one sleeping task per channel, cancelled and recreated on every move,
+    with one timer wheel, measuring the cost of a move's reschedule and the memory per pending
+    timer.
+    """
+    channels, moves = 10_000, 50_000
+    rng = random.Random(0)
+    movers = [rng.randrange(channels) for _ in range(moves)]
+
+    async def with_tasks() -> tuple[float, int]:
+        async def afk_timer(delay: float) -> None:
+            await asyncio.sleep(delay)
+
+        tracemalloc.start()
+        timers = {
+            channel_id: asyncio.create_task(afk_timer(60))
+            for channel_id in range(channels)
+        }
+        await asyncio.sleep(0)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for channel_id in movers:
+            timers[channel_id].cancel()
+            timers[channel_id] = asyncio.create_task(afk_timer(60))
+        await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+        for task in timers.values():
+            task.cancel()
+        await asyncio.gather(*timers.values(), return_exceptions=True)
+        return elapsed, memory
+
+    async def with_wheel() -> tuple[float, int]:
+        wheel = TimerWheel(lambda expired: None)
+        tracemalloc.start()
+        for channel_id in range(channels):
+            wheel.schedule(("afk", channel_id), 60, (channel_id, 0))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for turn, channel_id in enumerate(movers):
+            wheel.schedule(("afk", channel_id), 60, (channel_id, turn))
+        elapsed = time.perf_counter() - start
+        await wheel.close()
+        return elapsed, memory
+
+    for name, run in (("task per channel", with_tasks), ("timer wheel", with_wheel)):
+        elapsed, memory = asyncio.run(run())
+        _report(name, moves, elapsed, "moves")
+        print(f"    {memory / channels:,.0f} bytes per pending timer")
+
+
+HUMAN = 1
+
+
+def _human_lobby(channel_id: int) -> Lobby:
+    """
+    Builds a started game of one human against five bots, on the human's turn.
+    """
+    game = GameState(seed=channel_id)
+    game.add_player(HUMAN)
+    for _ in range(5):
+        game.add_bot()
+    game.start_game()
+    while game.phase() == Phase.PLAYING and game.is_bot(game.current_player()):
+        game.play_bot()
+    return Lobby(LobbyUser(HUMAN, "Host"), game, None, channel_id=channel_id)
+
+
+def bench_afk_expiry() -> None:
+    """
+    Measures a mass AFK event, where every game's turn times out in the same tick, comparing a
+    save per skipped turn with skipping them all and saving once.
+    """
+    channels = 500
+    stores = {
+        "single file": lambda path: PickleFileStore(path / "lobbies.pkl"),
+        "sqlite": lambda path: SqliteLobbyStore(path / "lobbies.sqlite3"),
+    }
+    for store_name, make_store in stores.items():
+        for mode in ("per turn", "batched"):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                repo = LobbyRepository(store=make_store(Path(temp_dir)))
+                for channel_id in range(channels):
+                    repo.lobbies[channel_id] = _human_lobby(channel_id)
+                repo.save()
+                game_service = GameService(LobbyService(repo))
+                turns = [
+                    (channel_id, HUMAN, lobby.game.turn_count())
+                    for channel_id, lobby in repo.lobbies.items()
+                ]
+
+                flushes = repo.stats.flushes
+                start = time.perf_counter()
+                if mode == "batched":
+                    game_service.skip_afk_turns(turns)
+                else:
+                    for turn in turns:
+                        game_service.skip_afk_turn(*turn)
+                elapsed = time.perf_counter() - start
+                _report(f"{store_name}, {mode}", channels, elapsed, "turns")
+                print(f"    {repo.stats.flushes - flushes:,} flushes")
+                repo.close()
+
+
+def _playable_index(game: GameState) -> int | None:
+    for index in range(len(game.hand(HUMAN))):
+        try:
+            game.snapshot().play(HUMAN, index, Color.RED)
+        except GameError:
+            continue
+        return index
+    return None
+
+
+def bench_workers() -> None:  # pylint: disable=too-many-locals
+    """
+    Measures how many human moves per second are applied, each followed by the bots' replies,
+    when every channel plays at once in this process or through game worker processes.
+    """
+    channels, moves_per_channel = 200, 20
+
+    async def play_all(lobby_service, play) -> int:
+        async def play_channel(channel_id: int) -> int:
+            moves = 0
+            while moves < moves_per_channel:
+                game = lobby_service.get_lobby(channel_id).game
+                if game.phase() != Phase.PLAYING or game.current_player() != HUMAN:
+                    break
+                index = _playable_index(game)
+                if index is None:
+                    break
+                await play(channel_id, HUMAN, index, Color.RED)
+                moves += 1
+            return moves
+
+        return sum(
+            await asyncio.gather(*(play_channel(cid) for cid in range(channels)))
+        )
+
+    for workers in (0, 1, 2, 4):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Path(temp_dir) / "lobbies.sqlite3"
+            repo = LobbyRepository(store=SqliteLobbyStore(database))
+            for channel_id in range(channels):
+                repo.lobbies[channel_id] = _human_lobby(channel_id)
+            repo.save()
+
+            if workers == 0:
+                lobby_service = LobbyService(repo)
+                game_service = GameService(lobby_service)
+
+                async def play(*args, service=game_service):
+                    return service.play_card(*args)
+
+                name = "in process"
+            else:
+                pool = GameWorkerPool(
+                    workers, partial(SqliteLobbyStore, database), repo.ids()
+                )
+                lobby_service = RemoteLobbyService(repo, pool)
+                play = RemoteGameService(lobby_service).play_card
+                name = f"{workers} workers"
+
+            start = time.perf_counter()
+            moves = asyncio.run(play_all(lobby_service, play))
+            elapsed = time.perf_counter() - start
+            _report(name, moves, elapsed, "moves")
+            if workers:
+                pool.close()
+                busy = ", ".join(f"{load.busy_seconds:.2f}" for load in pool.loads)
+                print(f"    busy seconds per worker: {busy}")
+            repo.close()
+
+
+BENCHMARKS = {
+    "actors": bench_actors,
+    "afk-expiry": bench_afk_expiry,
+    "bot-batch": bench_bot_batch,
+    "compression": bench_compression,
+    "endgame": bench_endgame,
+    "persistence": bench_persistence,
+    "policy": bench_policy,
+    "startup": bench_startup,
+    "store-server": bench_store_server,
+    "timers": bench_timers,
+    "workers": bench_workers,
+}
+
+
+def main() -> None:
+    """
+    Runs the benchmarks named on the command line, or all of them.
+    """
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise SystemExit(
+                f"Unknown benchmark {name!r}. Choose from: {', '.join(BENCHMARKS)}"
+            )
+        print(f"{name}:")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
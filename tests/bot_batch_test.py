@@ -0,0 +1,116 @@
+"""
+Tests batched bot decisions and the bot scheduler.
+"""
+
+import asyncio
+import random
+
+from models import bot_batch
+from models.deck import (
+    Color,
+    Deck,
+    DrawFourWild,
+    Number,
+    Skip,
+    Wild,
+    can_play_card,
+    card_face,
+    face_card,
+    NUM_FACES,
+)
+from models.game_state import GameState, Phase
+from services.bot_scheduler import BotScheduler
+
+
+def test_card_faces_round_trip():
+    """
+    Every face index should decode to a card that encodes back to the same index.
+    """
+    for face in range(NUM_FACES):
+        assert card_face(face_card(face)) == face
+
+
+def test_batch_only_chooses_playable_cards():
+    """
+    Batched decisions should always pick a playable card, or None when there isn't one.
+    """
+    rng = random.Random(1)
+    deck = Deck()
+    deck.add_default_cards()
+    hands = [rng.sample(deck.cards, rng.randint(1, 10)) for _ in range(500)]
+    tops = [rng.choice([c for c in deck.cards if isinstance(c, Number)]) for _ in hands]
+
+    decisions = bot_batch.decide_batch(hands, tops, seed=3)
+
+    for hand, top, (index, color) in zip(hands, tops, decisions):
+        if index is None:
+            assert not any(can_play_card(top, card) for card in hand)
+            continue
+        assert can_play_card(top, hand[index])
+        assert (color is not None) == isinstance(hand[index], (Wild, DrawFourWild))
+
+
+def test_batch_matches_rules_for_colored_wild_top():
+    """
+    A wild on top should only accept its chosen color or another wild.
+    """
+    hands = [[Number(Color.RED, 1)], [Number(Color.BLUE, 1), Wild()]]
+    tops = [Wild(Color.BLUE), Wild(Color.BLUE)]
+
+    decisions = bot_batch.decide_batch(hands, tops)
+
+    assert decisions[0] == (None, None)
+    assert decisions[1][0] in (0, 1)
+
+
+def test_batch_does_not_modify_hands():
+    """
+    Unlike bot.play_card, the batch should leave wild colors in hands alone.
+    """
+    hand = [Wild(), Skip(Color.RED)]
+
+    bot_batch.decide_batch([hand], [Number(Color.GREEN, 3)])
+
+    assert hand[0].color is None
+
+
+def test_scheduler_batches_concurrent_decisions():
+    """
+    Decisions requested at the same time should be evaluated as one batch.
+    """
+
+    async def run():
+        scheduler = BotScheduler(window=0.01)
+        top = Number(Color.RED, 5)
+        results = await asyncio.gather(
+            *(scheduler.decide([Number(Color.RED, i % 10)], top) for i in range(50))
+        )
+        return scheduler, results
+
+    scheduler, results = asyncio.run(run())
+
+    assert results == [(0, None)] * 50
+    assert scheduler.stats.batches == 1
+    assert scheduler.stats.largest_batch == 50
+
+
+def test_scheduler_plays_bot_chains():
+    """
+    The scheduler should keep playing until a human is up or the game is over.
+    """
+    g = GameState()
+    g.add_player(1)
+    g.add_bot()
+    g.add_bot()
+    g.start_game()
+    g.state["hands"][1] = [Number(Color.RED, 2), Number(Color.RED, 3)]
+    g.state["hands"][-1] = [Number(Color.RED, 4), Number(Color.RED, 5)]
+    g.state["hands"][-2] = [Number(Color.RED, 6), Number(Color.RED, 7)]
+    g.state["discard"] = [Number(Color.RED, 1)]
+    g.play(1, 0)
+
+    moves = asyncio.run(BotScheduler(window=0).play_bots(g))
+
+    assert moves == 2
+    assert g.phase() == Phase.PLAYING
+    assert g.current_player() == 1
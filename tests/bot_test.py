@@ -32,3 +32,32 @@ def test_invalid_bot_strategy():
         bot.play_card(100, hand, top)
 
     assert str(e.value) == "Invalid bot strategy chosen"
+
+
+def test_counting_prefers_scarce_colors():
+    """
+    The counting bot should play toward the color with the fewest unseen cards.
+    """
+    top = Number(Color.RED, 3)
+    hand = [Number(Color.RED, 5), Number(Color.BLUE, 3)]
+    unseen = [2] * 54
+    for face in range(26, 39):  # blue is nearly all accounted for
+        unseen[face] = 0
+
+    index, color = bot.play_card(bot.Strategy.COUNTING, hand, top, unseen)
+
+    assert index == 1
+    assert color is None
+
+
+def test_counting_picks_held_color_for_wilds():
+    """
+    The counting bot should choose the color it holds most of for a wild.
+    """
+    top = Number(Color.RED, 3)
+    hand = [Wild(None), Number(Color.GREEN, 5), Number(Color.GREEN, 6)]
+
+    index, color = bot.play_card(bot.Strategy.COUNTING, hand, top)
+
+    assert index == 0
+    assert color == Color.GREEN
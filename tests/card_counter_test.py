@@ -0,0 +1,124 @@
+"""
+Tests the incrementally maintained unseen card counts.
+"""
+
+import pytest
+
+from models import bot
+from models.card_counter import full_deck_counts
+from models.deck import Color, Number, Wild, card_face
+from models.game_state import GameError, GameState
+
+
+def test_full_deck_counts_match_default_deck():
+    """
+    The default composition should add up to the 108 card deck.
+    """
+    assert sum(full_deck_counts()) == 108
+
+
+def test_counts_stay_consistent_through_bot_games():
+    """
+    Counts maintained across plays, draws and penalties should match a full recount every turn.
+    """
+    for _ in range(10):
+        g = GameState()
+        g.add_bot()
+        g.add_bot(bot.Strategy.COUNTING)
+        g.add_bot()
+        g.start_game()
+
+        for _ in range(200):
+            try:
+                g.play_bot()
+            except GameError:
+                break
+            assert g.unseen_cards_consistent()
+
+
+def test_counts_follow_discard_recycling():
+    """
+    Cards recycled from the discard pile into the deck become unseen again.
+    """
+    g = GameState()
+    g.add_player(1)
+    g.add_player(2)
+    g.start_game()
+    g.state["hands"][1] = [Number(Color.RED, 2)]
+    g.state["hands"][2] = [Number(Color.GREEN, 7)]
+    g.state["discard"] = [Number(Color.BLUE, 4), Number(Color.RED, 1)]
+    g.state["deck"] = []
+    g.state["unseen"] = None
+
+    g.draw_and_pass(1)
+
+    assert g.unseen_cards(2)[card_face(Number(Color.BLUE, 4))] == 2
+    assert g.unseen_cards(1)[card_face(Number(Color.BLUE, 4))] == 1
+    assert g.unseen_cards_consistent()
+
+
+def test_plays_are_seen_by_other_players():
+    """
+    A played card is no longer unseen for anyone.
+    """
+    g = GameState()
+    g.add_player(1)
+    g.add_player(2)
+    g.start_game()
+    g.state["hands"][1] = [Wild(), Number(Color.RED, 2)]
+    g.state["unseen"] = None
+    before = g.unseen_cards(2)[card_face(Wild())]
+
+    g.play(1, 0, Color.BLUE)
+
+    assert g.unseen_cards(2)[card_face(Wild())] == before - 1
+    assert g.unseen_cards_consistent()
+
+
+def test_plays_rebuild_missing_counts_before_the_card_moves():
+    """
+    Playing in a game without counts yet, as restored from an older release, should rebuild them
+    from before the play, so the played card is only taken off once.
+    """
+    g = GameState()
+    g.add_player(1)
+    g.add_player(2)
+    g.start_game()
+    g.state["hands"][1] = [Wild(), Number(Color.RED, 2)]
+    g.state["hands"][2] = [Number(Color.GREEN, 7)]
+    g.state["unseen"] = None
+
+    g.play(1, 0, Color.BLUE)
+
+    assert g.unseen_cards_consistent()
+    assert g.unseen_cards(2)[card_face(Wild())] == 3
+
+
+def test_draws_rebuild_missing_counts_before_the_card_moves():
+    """
+    Drawing in a game without counts yet should leave them consistent.
+    """
+    g = GameState()
+    g.add_player(1)
+    g.add_player(2)
+    g.start_game()
+    g.state["unseen"] = None
+
+    g.draw_and_pass(1)
+
+    assert g.unseen_cards_consistent()
+
+
+def test_unseen_view_is_read_only():
+    """
+    Bot strategies get a view they can't modify.
+    """
+    g = GameState()
+    g.add_player(1)
+    g.add_player(2)
+    g.start_game()
+
+    view = g.unseen_cards(1)
+
+    with pytest.raises(TypeError):
+        view[0] = 5
@@ -0,0 +1,158 @@
+"""
+Tests the exact endgame solver on hand-built endgame positions.
+"""
+
+# pylint: disable=protected-access
+
+from collections import OrderedDict
+
+from models import endgame
+from models.deck import Color, DrawFourWild, Number, Skip, Wild
+from models.game_state import GameState, Phase
+
+
+def _endgame(hand, opponent_hand, top, deck=None) -> GameState:
+    """
+    Sets up a two bot game where bot -1 is to move with the given cards.
+    """
+    g = GameState()
+    g.add_bot()
+    g.add_bot()
+    g.start_game()
+    g.state["hands"][-1] = hand
+    g.state["hands"][-2] = opponent_hand
+    g.state["discard"] = [top]
+    g.state["deck"] = deck if deck is not None else []
+    g.state["unseen"] = None
+    return g
+
+
+def test_plays_winning_card():
+    """
+    A bot holding a playable last card should play it.
+    """
+    solver = endgame.EndgameSolver()
+    position = endgame.position_for(
+        [Number(Color.RED, 5)], [Number(Color.BLUE, 1)], Number(Color.RED, 3), []
+    )
+
+    result = solver.solve(position)
+
+    assert result.move == (endgame.card_face(Number(Color.RED, 5)), 0)
+    assert result.value == 1.0
+
+
+def test_skip_before_last_card():
+    """
+    Playing the number first lets the opponent win; skipping first wins outright.
+    """
+    g = _endgame(
+        [Number(Color.RED, 1), Skip(Color.RED)],
+        [Number(Color.RED, 8)],
+        Number(Color.RED, 3),
+    )
+
+    assert g.endgame_applicable()
+    g.play_bot()
+
+    assert g.top_card() == Skip(Color.RED)
+    g.play_bot()
+    assert g.phase() == Phase.FINISHED
+    assert g.state["winner"] == -1
+
+
+def test_draw_four_into_chosen_color():
+    """
+    The solver should play a Draw Four and pick the color of its last card.
+    """
+    solver = endgame.EndgameSolver()
+    hand = [DrawFourWild(), Number(Color.GREEN, 2)]
+
+    index, color = endgame.decide(
+        solver,
+        hand,
+        [Number(Color.YELLOW, 5)],
+        Number(Color.YELLOW, 3),
+        [Number(Color.BLUE, 1), Number(Color.BLUE, 2), Number(Color.BLUE, 4)],
+    )
+
+    assert index == 0
+    assert color == Color.GREEN
+
+
+def test_tie_when_nobody_can_play():
+    """
+    Drawing from an empty pile with no playable cards anywhere ends in a tie.
+    """
+    solver = endgame.EndgameSolver()
+    position = endgame.position_for(
+        [Number(Color.BLUE, 1)], [Number(Color.GREEN, 2)], Wild(Color.RED), []
+    )
+
+    result = solver.solve(position)
+
+    assert result.move == endgame.DRAW
+    assert result.value == 0.5
+
+
+def test_node_budget_bounds_search():
+    """
+    Searches stop expanding nodes once the budget is spent.
+    """
+    solver = endgame.EndgameSolver(node_budget=50)
+    deck = [Number(color, n) for color in Color for n in range(1, 10)]
+    position = endgame.position_for(
+        [Number(Color.RED, 1), Number(Color.BLUE, 2), Skip(Color.GREEN)],
+        [Number(Color.YELLOW, 4), Number(Color.RED, 7)],
+        Number(Color.RED, 3),
+        deck,
+    )
+
+    result = solver.solve(position)
+
+    assert result.stats.budget_exhausted
+    assert result.stats.nodes <= 50
+    assert result.stats.nodes_per_sec > 0
+
+
+def test_transposition_table_is_bounded():
+    """
+    The transposition table evicts old entries beyond its size, and what it keeps is reused by
+    the next search.
+    """
+    sizes = []
+
+    class _Table(OrderedDict):
+        def __setitem__(self, key, value):
+            super().__setitem__(key, value)
+            sizes.append(len(self))
+
+    solver = endgame.EndgameSolver(table_size=200)
+    solver._table = _Table()
+    position = endgame.position_for(
+        [Number(Color.RED, 1), Number(Color.RED, 2), Number(Color.BLUE, 2)],
+        [Number(Color.RED, 8), Number(Color.GREEN, 8)],
+        Number(Color.RED, 3),
+        [Number(Color.GREEN, 5)],
+    )
+
+    first = solver.solve(position).stats.nodes
+    first_hits = solver.total.table_hits
+    second = solver.solve(position).stats.nodes
+
+    assert len(sizes) > 200
+    assert max(sizes) == 200
+    assert solver.total.table_hits > first_hits
+    assert second < first
+
+
+def test_not_applicable_with_many_cards():
+    """
+    Games with more than two players or many cards keep using the bot strategy.
+    """
+    g = GameState()
+    g.add_bot()
+    g.add_bot()
+    g.start_game()
+
+    assert not g.endgame_applicable()
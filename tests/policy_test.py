@@ -0,0 +1,194 @@
+"""
+Tests the policy table and the POLICY bot strategy.
+"""
+
+import os
+from array import array
+
+import pytest
+
+from models import bot, policy
+from models.deck import Color, DrawTwo, Number, Skip, Wild, face_card
+
+
+def _empty_scores() -> array:
+    return array("H", bytes(2 * policy.NUM_STATES * policy.NUM_MOVES))
+
+
+def _state(hand, top, next_hand_size):
+    counts = [0] * 4
+    for card in hand:
+        if not isinstance(card, Wild):
+            counts[
+                [Color.RED, Color.YELLOW, Color.BLUE, Color.GREEN].index(card.color)
+            ] += 1
+    top_kind = policy.SKIP_KIND if isinstance(top, Skip) else policy.NUMBER_KIND
+    top_color = [Color.RED, Color.YELLOW, Color.BLUE, Color.GREEN].index(top.color)
+    return policy.state_index(counts, top_color, top_kind, next_hand_size)
+
+
+def test_table_round_trips_through_file(tmp_path):
+    """
+    Scores written to a table file should be read back through the memory map.
+    """
+    scores = _empty_scores()
+    scores[5] = 1234
+    scores[-1] = policy.MAX_SCORE
+    path = tmp_path / "policy.tbl"
+    policy.write_table(path, scores)
+
+    table = policy.PolicyTable(path)
+    assert table.score(0, 5) == 1234
+    assert table.score(policy.NUM_STATES - 1, policy.NUM_MOVES - 1) == policy.MAX_SCORE
+    assert table.score(1, 0) == policy.UNSEEN_SCORE
+    table.close()
+
+
+def test_bad_tables_are_rejected(tmp_path):
+    """
+    Truncated or foreign files shouldn't be mapped, and a missing table loads as None.
+    """
+    path = tmp_path / "policy.tbl"
+    path.write_bytes(b"not a policy table at all")
+
+    with pytest.raises(policy.PolicyError):
+        policy.PolicyTable(path)
+    assert policy.load_table(tmp_path / "missing.tbl") is None
+
+
+def test_load_table_picks_up_new_tables(tmp_path):
+    """
+    A table written after a failed load, or replacing a loaded one, should be used by the next
+    load, while an unchanged table should be mapped only once.
+    """
+    path = tmp_path / "policy.tbl"
+    assert policy.load_table(path) is None
+
+    scores = _empty_scores()
+    scores[0] = 1
+    policy.write_table(path, scores)
+    first = policy.load_table(path)
+    assert first.score(0, 0) == 1
+    assert policy.load_table(path) is first
+
+    scores[0] = 2
+    policy.write_table(path, scores)
+    modified = path.stat().st_mtime_ns
+    os.utime(path, ns=(modified, modified + 1))
+    assert policy.load_table(path).score(0, 0) == 2
+    assert [file.name for file in tmp_path.iterdir()] == ["policy.tbl"]
+    policy.clear_tables()
+
+
+def test_move_indices_are_distinct():
+    """
+    Every kind and color should map to its own move.
+    """
+    moves = {
+        policy.move_index(kind, color)
+        for kind in range(policy.NUM_KINDS)
+        for color in range(4)
+    }
+    assert moves == set(range(policy.NUM_MOVES))
+
+
+def test_choose_plays_best_scored_card(tmp_path):
+    """
+    The playable card with the best score in the abstract state should be chosen.
+    """
+    hand = [Number(Color.RED, 3), DrawTwo(Color.RED), Wild(), Number(Color.BLUE, 5)]
+    top = Number(Color.RED, 7)
+    state = _state(hand, top, 3)
+
+    scores = _empty_scores()
+    scores[state * policy.NUM_MOVES + policy.move_index(policy.NUMBER_KIND, 0)] = 10
+    scores[state * policy.NUM_MOVES + policy.move_index(policy.DRAW_TWO_KIND, 0)] = 20
+    scores[state * policy.NUM_MOVES + policy.move_index(policy.WILD_KIND, 2)] = 30
+    path = tmp_path / "policy.tbl"
+    policy.write_table(path, scores)
+    table = policy.PolicyTable(path)
+
+    assert policy.choose(table, hand, [0, 1, 2], top, 3) == (
+        2,
+        [Color.BLUE, Color.RED, Color.YELLOW, Color.GREEN],
+    )
+    assert policy.choose(table, hand, [0, 1], top, 3)[0] == 1
+    # The same cards in another state are unknown to the table.
+    assert policy.choose(table, hand, [0, 1, 2], top, 12) is None
+    table.close()
+
+
+def test_policy_bot_falls_back_without_table(tmp_path, monkeypatch):
+    """
+    Without a table the POLICY bot should still play a valid card.
+    """
+    monkeypatch.setenv("UNO_POLICY_TABLE", str(tmp_path / "missing.tbl"))
+    hand = [Number(Color.GREEN, 1), Skip(Color.RED)]
+
+    index, color = bot.play_card(bot.Strategy.POLICY, hand, Number(Color.RED, 4))
+
+    assert index == 1
+    assert color is None
+
+
+def _expected_state(columns, row) -> int:
+    counts = [0] * 4
+    for face, copies in enumerate(columns["hand"][row].tolist()):
+        if face < 52:
+            counts[face // 13] += copies
+    top = face_card(int(columns["top_face"][row]))
+    return policy.state_index(
+        counts,
+        int(columns["top_color"][row]),
+        policy._KINDS[type(top)],  # pylint: disable=protected-access
+        int(columns["opponent_hand_sizes"][row, 0]),
+    )
+
+
+def test_trained_table_matches_runtime_states(tmp_path):
+    """
+    The trainer's vectorized state and move encoding should agree with the runtime lookup.
+    """
+    np = pytest.importorskip("numpy")
+    # pylint: disable=import-outside-toplevel
+    from tools import selfplay, train_policy
+
+    selfplay.main(["--games", "4", "--players", "3", "--out", str(tmp_path)])
+    with np.load(next(tmp_path.glob("worker*-*.npz"))) as loaded:
+        columns = {name: loaded[name] for name in loaded.files}
+
+    states = train_policy.state_indices(columns)
+    moves = train_policy.move_indices(columns)
+    for row in range(0, len(states), 7):
+        assert states[row] == _expected_state(columns, row)
+
+        face = int(columns["action_face"][row])
+        if face == selfplay.DRAW_ACTION:
+            assert moves[row] == -1
+        else:
+            card = face_card(face)
+            color = face // 13 if face < 52 else int(columns["action_color"][row])
+            assert moves[row] == policy.move_index(
+                policy._KINDS[type(card)], color  # pylint: disable=protected-access
+            )
+
+
+def test_policy_bot_plays_with_trained_table(tmp_path, monkeypatch):
+    """
+    A table trained from self-play should drive full games.
+    """
+    pytest.importorskip("numpy")
+    # pylint: disable=import-outside-toplevel
+    from models.simulation import play_game
+    from tools import selfplay, train_policy
+
+    data = tmp_path / "selfplay"
+    table = tmp_path / "policy.tbl"
+    selfplay.main(["--games", "20", "--players", "3", "--out", str(data)])
+    train_policy.main(["--data", str(data), "--out", str(table), "--min-visits", "1"])
+    monkeypatch.setenv("UNO_POLICY_TABLE", str(table))
+
+    result = play_game([bot.Strategy.POLICY, bot.Strategy.RANDOM], seed=3)
+
+    assert policy.load_table(str(table)) is not None
+    assert result.turns > 0
@@ -0,0 +1,160 @@
+"""
+Tests the per-channel actors that apply lobby commands.
+"""
+
+import asyncio
+
+import pytest
+
+from models.game_state import GameError
+from services.channel_actors import ChannelActors
+
+
+def test_commands_for_a_channel_apply_in_order():
+    """
+    A command that awaits should finish before the channel's next command starts.
+    """
+    log = []
+
+    async def command(name: str, delay: float):
+        log.append(f"{name} start")
+        await asyncio.sleep(delay)
+        log.append(f"{name} end")
+        return name
+
+    async def run():
+        actors = ChannelActors()
+        results = await asyncio.gather(
+            actors.run(1, lambda: command("slow", 0.02)),
+            actors.run(1, lambda: command("fast", 0)),
+        )
+        await actors.close()
+        return results
+
+    assert asyncio.run(run()) == ["slow", "fast"]
+    assert log == ["slow start", "slow end", "fast start", "fast end"]
+
+
+def test_channels_progress_independently():
+    """
+    A slow command in one channel shouldn't hold up another channel.
+    """
+    finished = []
+
+    async def run():
+        actors = ChannelActors()
+        blocked = asyncio.Event()
+
+        async def wait_for_other():
+            await blocked.wait()
+            finished.append(1)
+
+        waiting = asyncio.create_task(actors.run(1, wait_for_other))
+        await actors.run(2, lambda: finished.append(2))
+        assert actors.busy(1)
+        assert not actors.busy(2)
+        blocked.set()
+        await waiting
+        await actors.close()
+
+    asyncio.run(run())
+    assert finished == [2, 1]
+
+
+def test_queued_commands_share_one_render():
+    """
+    Commands queued while the actor is busy should be applied together and rendered once.
+    """
+    renders = []
+
+    async def render(channel_id: int):
+        renders.append(channel_id)
+
+    async def run():
+        actors = ChannelActors(render)
+        await asyncio.gather(
+            *(actors.run(7, lambda: asyncio.sleep(0), render=True) for _ in range(10))
+        )
+        await actors.close()
+        return actors.stats
+
+    stats = asyncio.run(run())
+    assert renders == [7]
+    assert stats.commands == 10
+    assert stats.render_requests == 10
+    assert stats.renders == 1
+
+
+def test_errors_reach_the_caller_and_results_wait_for_the_render():
+    """
+    A command's error should be raised to its caller without stopping the actor, and a result
+    should only be returned once the lobby has been rendered.
+    """
+    log = []
+
+    async def render(_channel_id: int):
+        log.append("render")
+
+    def fail():
+        raise GameError("Not your turn!")
+
+    async def run():
+        actors = ChannelActors(render)
+        with pytest.raises(GameError):
+            await actors.run(1, fail, render=True)
+        await actors.run(1, lambda: log.append("played"), render=True)
+        log.append("returned")
+        await actors.close()
+
+    asyncio.run(run())
+    assert log == ["played", "render", "returned"]
+
+
+def test_nested_commands_and_idle_actors():
+    """
+    A command may run another on its own channel, and an idle actor should stop.
+    """
+
+    async def run():
+        actors = ChannelActors(idle_timeout=0.01)
+
+        async def outer():
+            return await actors.run(3, lambda: "inner")
+
+        assert await actors.run(3, outer) == "inner"
+        assert len(actors) == 1
+        await asyncio.sleep(0.05)
+        assert len(actors) == 0
+        assert await actors.run(3, lambda: "again") == "again"
+        await actors.close()
+
+    asyncio.run(run())
+
+
+def test_commands_of_callers_that_gave_up_are_skipped():
+    """
+    A queued command whose caller was cancelled should not be applied.
+    """
+    applied = []
+
+    async def run():
+        actors = ChannelActors()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def block():
+            started.set()
+            await release.wait()
+
+        busy = asyncio.create_task(actors.run(1, block))
+        await started.wait()
+        stale = asyncio.create_task(actors.run(1, lambda: applied.append("stale")))
+        await asyncio.sleep(0)
+        stale.cancel()
+        release.set()
+        await busy
+        await actors.run(1, lambda: applied.append("fresh"))
+        await actors.close()
+
+    asyncio.run(run())
+    assert applied == ["fresh"]
@@ -0,0 +1,160 @@
+"""
+Tests the cache of users and channels fetched from Discord.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.discord_cache import DiscordCache, TtlCache
+
+
+class _FakeClient:
+    """
+    A client whose own cache is empty, recording every REST call made through it.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.sent = []
+
+    def get_user(self, _user_id: int):
+        """
+        Finds nothing, as if the user shared no cached guild with the bot.
+        """
+        return None
+
+    def get_channel(self, _channel_id: int):
+        """
+        Finds nothing, as if the channel wasn't cached.
+        """
+        return None
+
+    async def fetch_user(self, user_id: int):
+        """
+        Fetches a user, which has no DM channel open yet.
+        """
+        self.calls.append(("fetch_user", user_id))
+        await asyncio.sleep(0.01)
+        client = self
+
+        async def create_dm():
+            client.calls.append(("create_dm", user_id))
+            return SimpleNamespace(send=_recording_send(client, user_id))
+
+        return SimpleNamespace(id=user_id, dm_channel=None, create_dm=create_dm)
+
+    async def fetch_channel(self, channel_id: int):
+        """
+        Fetches a channel, failing for unknown ones.
+        """
+        self.calls.append(("fetch_channel", channel_id))
+        if channel_id == 0:
+            raise LookupError(channel_id)
+        return SimpleNamespace(id=channel_id)
+
+
+def _recording_send(client: _FakeClient, user_id: int):
+    """
+    Returns a `send` that records the messages sent to a user.
+    """
+
+    async def send(content=None, **_kwargs):
+        client.calls.append(("send", user_id))
+        client.sent.append((user_id, content))
+
+    return send
+
+
+def test_concurrent_lookups_share_one_fetch():
+    """
+    Lookups of one user made while it is being fetched should wait for that fetch, and later
+    ones should be answered from the cache.
+    """
+    client = _FakeClient()
+    cache = DiscordCache(client)
+
+    async def run():
+        users = await asyncio.gather(*(cache.user(7) for _ in range(5)))
+        assert all(user is users[0] for user in users)
+        assert await cache.user(7) is users[0]
+
+    asyncio.run(run())
+    assert client.calls == [("fetch_user", 7)]
+    stats = cache.users.stats
+    assert (stats.misses, stats.coalesced, stats.hits) == (1, 4, 1)
+    assert stats.hit_rate() == 5 / 6
+
+
+def test_direct_messages_reuse_the_dm_channel():
+    """
+    Messaging a user again should cost only the send.
+    """
+    client = _FakeClient()
+    cache = DiscordCache(client)
+
+    async def run():
+        await cache.send_dm(7, "It's your turn!")
+        await cache.send_dm(7, "It's your turn again!")
+
+    asyncio.run(run())
+    assert client.calls == [
+        ("fetch_user", 7),
+        ("create_dm", 7),
+        ("send", 7),
+        ("send", 7),
+    ]
+    assert [content for _, content in client.sent] == [
+        "It's your turn!",
+        "It's your turn again!",
+    ]
+
+
+def test_entries_expire_and_failures_are_not_cached():
+    """
+    An expired channel should be fetched again, and a failed fetch should be retried by the
+    next lookup.
+    """
+    client = _FakeClient()
+    cache = DiscordCache(client, ttl=0.01)
+
+    async def run():
+        await cache.channel(5)
+        await asyncio.sleep(0.02)
+        await cache.channel(5)
+        for _ in range(2):
+            with pytest.raises(LookupError):
+                await cache.channel(0)
+
+    asyncio.run(run())
+    assert client.calls == [("fetch_channel", 5)] * 2 + [("fetch_channel", 0)] * 2
+    assert cache.channels.stats.expired == 1
+    assert len(cache.channels) == 1
+
+
+def test_the_oldest_entries_are_evicted():
+    """
+    A full cache should drop its oldest entry to make room.
+    """
+
+    async def run():
+        cache = TtlCache(60.0, max_size=2)
+        for key in range(3):
+            await cache.get(key, _returning(key))
+        return cache
+
+    cache = asyncio.run(run())
+    assert len(cache) == 2
+    assert cache.stats.evicted == 1
+
+
+def _returning(value: int):
+    """
+    Returns a fetch that produces `value`.
+    """
+
+    async def fetch():
+        return value
+
+    return fetch
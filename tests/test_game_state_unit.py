@@ -702,3 +702,29 @@ def test_call_uno_none_vulnerable():
     g.start_game()
 
     assert g.call_uno(1) == {"result": "no_target", "caller": 1}
+
+
+def test_snapshot_is_unaffected_by_later_moves():
+    """
+    A snapshot should keep the game as it was, including the color of wild cards and the random
+    number generator's state.
+    """
+    game = GameState(seed=4)
+    for _ in range(3):
+        game.add_bot()
+    game.start_game()
+    wild = Wild()
+    game.state["discard"].append(wild)
+
+    snapshot = game.snapshot()
+    twin = game.snapshot()
+    hands = {user_id: list(hand) for user_id, hand in game.state["hands"].items()}
+    unseen = bytes(game.unseen_cards(game.current_player()))
+    wild.color = Color.RED
+    game.play_bot()
+
+    assert snapshot.state["hands"] == hands
+    assert snapshot.state["discard"][-1].color is None
+    assert bytes(snapshot.unseen_cards(snapshot.current_player())) == unseen
+    assert snapshot.turn_count() == 0
+    assert snapshot.play_bot() == twin.play_bot()
@@ -0,0 +1,84 @@
+"""
+Tests the worker processes that run game logic for a hash range of channels each.
+"""
+
+import asyncio
+from functools import partial
+
+import pytest
+
+from models.game_state import GameError, Phase
+from repos.lobby_repo import LobbyRepository
+from repos.sqlite_lobby_store import SqliteLobbyStore
+from services.game_workers import (
+    GameWorkerPool,
+    RemoteGameService,
+    RemoteLobbyService,
+    ShardRanges,
+)
+from tests.test_lobby_store import _fake_user
+
+
+def test_ranges_are_balanced_over_stored_channels():
+    """
+    Balanced ranges should give each worker about as many stored channels, and every channel one
+    owner.
+    """
+    channel_ids = range(10_000, 14_000)
+    ranges = ShardRanges.balanced(channel_ids, 4)
+    owned = [0] * ranges.workers
+    for channel_id in channel_ids:
+        owned[ranges.worker_for(channel_id)] += 1
+
+    assert ranges.workers == 4
+    assert all(abs(count - 1_000) <= 1 for count in owned)
+    assert ShardRanges.balanced([1, 2], 4) == ShardRanges.even(4)
+    assert ShardRanges.even(1).worker_for(123) == 0
+
+
+def test_workers_apply_changes_and_the_cache_follows(tmp_path):
+    """
+    Changes should be applied by the owning worker and written to the shared store, while lobbies
+    held in this process are updated in place.
+    """
+    database = tmp_path / "lobbies.sqlite3"
+    repo = LobbyRepository(store=SqliteLobbyStore(database))
+    pool = GameWorkerPool(2, partial(SqliteLobbyStore, database))
+    lobby_service = RemoteLobbyService(repo, pool)
+    game_service = RemoteGameService(lobby_service)
+    channels = [1, 2, 3, 4]
+
+    async def run():
+        for channel_id in channels:
+            lobby = await lobby_service.create_lobby(channel_id, _fake_user(10, "Host"))
+            assert lobby is lobby_service.get_lobby(channel_id)
+            lobby.main_message = 500 + channel_id
+            lobby_service.save(channel_id)
+
+        held = lobby_service.get_lobby(1)
+        await lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+        assert held.game.players() == [10, 11]
+        with pytest.raises(GameError) as error:
+            await lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+        assert error.value.private
+
+        await lobby_service.start_lobby(1)
+        assert held.game.phase() == Phase.PLAYING
+        assert await game_service.leave_player(1, 11) == Phase.PLAYING
+
+        await lobby_service.disband_lobby(2, _fake_user(10, "Host"))
+        assert not repo.exists(2)
+
+    try:
+        asyncio.run(run())
+        assert sum(load.calls for load in pool.loads) == 13
+        assert sum(load.errors for load in pool.loads) == 1
+        assert all(load.in_flight == 0 for load in pool.loads)
+        assert all(load.calls and load.busy_seconds > 0 for load in pool.loads)
+    finally:
+        pool.close()
+
+    stored = LobbyRepository(store=SqliteLobbyStore(database))
+    assert stored.ids() == [1, 3, 4]
+    assert stored.get(1).game.phase() == Phase.FINISHED
+    assert stored.get(3).main_message == 503
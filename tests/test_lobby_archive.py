@@ -0,0 +1,159 @@
+"""
+Tests the archive finished lobbies are moved to.
+"""
+
+import asyncio
+import threading
+
+from models.game_state import GameState, Phase
+from models.lobby_model import Lobby, LobbyUser
+from repos.lobby_archive import LobbyArchive
+from repos.lobby_repo import LobbyRepository
+from repos.lobby_store import ShardedFileStore
+
+
+def _lobby(channel_id: int, finished: bool = True) -> Lobby:
+    game = GameState(seed=channel_id)
+    game.state["endgame_solver"] = False
+    game.add_bot()
+    game.add_bot()
+    game.start_game()
+    while finished and game.phase() == Phase.PLAYING:
+        game.play_bot()
+    return Lobby(LobbyUser(channel_id, "Host"), game, channel_id * 10, channel_id)
+
+
+def test_archive_is_indexed_by_channel_and_time(tmp_path):
+    """
+    Archived lobbies should be found by channel or time range, also after reopening.
+    """
+    archive = LobbyArchive(tmp_path / "archive")
+    archive.append(1, _lobby(1), 100.0)
+    archive.append(2, _lobby(2), 200.0)
+    archive.append(1, _lobby(3), 300.0)
+    archive.close()
+
+    archive = LobbyArchive(tmp_path / "archive")
+    assert [entry.archived_at for entry in archive.entries(1)] == [100.0, 300.0]
+    assert [entry.channel_id for entry in archive.between(150.0, 300.0)] == [2]
+    assert archive.latest(1).main_message == 30
+    assert archive.read(archive.entries(2)[0]).game.phase() == Phase.FINISHED
+    assert archive.latest(4) is None
+    archive.close()
+
+
+def test_archive_recovers_after_a_crash(tmp_path):
+    """
+    Records missing from the index should be recovered from the log, and a torn record at the end
+    of the log should be dropped.
+    """
+    archive = LobbyArchive(tmp_path / "archive")
+    archive.append(1, _lobby(1), 100.0)
+    archive.append(2, _lobby(2), 200.0)
+    archive.close()
+    index = archive.index_path.read_bytes()
+    archive.index_path.write_bytes(index[: len(index) // 2 + 3])
+    with archive.log_path.open("ab") as log_file:
+        log_file.write(b"\x03\x00\x00")
+
+    archive = LobbyArchive(tmp_path / "archive")
+    assert [entry.channel_id for entry in archive.between(0.0, 1000.0)] == [1, 2]
+    assert archive.latest(2).main_message == 20
+    archive.append(3, _lobby(3), 300.0)
+    archive.close()
+
+    archive = LobbyArchive(tmp_path / "archive")
+    assert archive.latest(3).main_message == 30
+    assert archive.index_path.stat().st_size == len(index) * 3 // 2
+    archive.close()
+
+
+def test_finished_lobbies_are_archived_after_the_grace_period(tmp_path):
+    """
+    Finished lobbies should stay in the repository until the grace period is over, then move to
+    the archive and out of memory and the store.
+    """
+    store = ShardedFileStore(tmp_path / "lobbies")
+    archive = LobbyArchive(tmp_path / "archive")
+    repo = LobbyRepository(store=store, archive=archive, archive_after=60)
+    for channel_id, finished in ((1, True), (2, False)):
+        repo.lobbies[channel_id] = _lobby(channel_id, finished)
+        repo.save(channel_id)
+    finished_at = repo._finished_at[1]  # pylint: disable=protected-access
+
+    assert not repo.archive_finished(now=finished_at + 30)
+    assert repo.archive_finished(now=finished_at + 90) == [1]
+
+    assert not repo.exists(1)
+    assert repo.exists(2)
+    assert not store.shard_path(1).exists()
+    assert repo.archived(1).main_message == 10
+    assert repo.stats.lobbies_archived == 1
+    repo.close()
+
+
+def test_unloaded_finished_lobbies_are_archived_from_the_index(tmp_path):
+    """
+    A finished lobby that was never loaded since startup should be archived based on when it was
+    last written.
+    """
+    store = ShardedFileStore(tmp_path / "lobbies")
+    repo = LobbyRepository(store=store)
+    repo.lobbies[1] = _lobby(1)
+    repo.save(1)
+    repo.close()
+
+    repo = LobbyRepository(
+        store=ShardedFileStore(tmp_path / "lobbies"),
+        archive=LobbyArchive(tmp_path / "archive"),
+        archive_after=60,
+    )
+    assert not repo.lobbies
+    written_at = store.load_index()[1].updated_at
+    assert repo.archive_finished(now=written_at + 90) == [1]
+    assert repo.ids() == []
+    assert repo.archived(1).game.phase() == Phase.FINISHED
+    repo.close()
+
+
+def test_archiving_off_the_event_loop(tmp_path):
+    """
+    Loaded and unloaded finished lobbies should be encoded and synced on the writer thread, and
+    a lobby restarted meanwhile should be kept.
+    """
+    store = ShardedFileStore(tmp_path / "lobbies")
+    repo = LobbyRepository(store=store)
+    for channel_id in (1, 2, 3):
+        repo.lobbies[channel_id] = _lobby(channel_id)
+        repo.save(channel_id)
+    repo.close()
+
+    archive = LobbyArchive(tmp_path / "archive")
+    repo = LobbyRepository(
+        store=ShardedFileStore(tmp_path / "lobbies"), archive=archive, archive_after=60
+    )
+    threads = set()
+    append = archive.append
+
+    def recording_append(*args):
+        threads.add(threading.current_thread().name)
+        return append(*args)
+
+    archive.append = recording_append
+    assert repo.get(1).game.phase() == Phase.FINISHED
+    written_at = max(summary.updated_at for summary in store.load_index().values())
+
+    async def run():
+        archiving = asyncio.create_task(
+            repo.archive_finished_async(now=written_at + 90)
+        )
+        await asyncio.sleep(0)
+        repo.lobbies[3] = _lobby(3, finished=False)
+        return await archiving
+
+    assert sorted(asyncio.run(run())) == [1, 2]
+    assert all(name.startswith("lobby-writer") for name in threads)
+    assert repo.ids() == [3]
+    assert repo.archived(2).main_message == 20
+    assert repo.stats.lobbies_archived == 2
+    repo.close()
@@ -0,0 +1,180 @@
+"""
+Tests schema versioning and compression of stored lobby records, and the migrations that upgrade
+old ones.
+"""
+
+# pylint: disable=protected-access
+
+import shutil
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from models.game_state import Phase
+from repos import lobby_codec
+from repos.lobby_codec import (
+    MAGIC,
+    SCHEMA_VERSION,
+    Codec,
+    Compression,
+    decode_lobby,
+    encode_lobby,
+    record_version,
+)
+from repos.lobby_repo import LobbyRepository
+from repos.lobby_store import ShardedFileStore, StoredLobby
+from repos.sqlite_lobby_store import SqliteLobbyStore
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def _fixture(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+
+def test_records_from_the_previous_release_decode():
+    """
+    Unversioned records written by the release before schema versions should still decode.
+    """
+    playing = _fixture("lobby_playing_record.pkl")
+    waiting = _fixture("lobby_waiting_record.pkl")
+    assert record_version(playing) == record_version(waiting) == 0
+
+    lobby = decode_lobby(playing, 42)
+    assert lobby.channel_id == 42
+    assert lobby.main_message == 1234
+    assert lobby.user.avatar_url == "https://example.com/10.png"
+    assert lobby.game.phase() == Phase.PLAYING
+    assert lobby.game.players() == [-1, -2, -3]
+    assert [len(lobby.game.hand(p)) for p in lobby.game.players()] == [3, 4, 7]
+    assert lobby.game.state["bot_strategies"] == {}
+    assert lobby.game.state["endgame_solver"]
+    assert lobby.game.state["unseen"] is None
+    assert lobby.game.unseen_cards_consistent()
+    assert lobby.last_move == {"type": "draw", "player": -2, "count": 1}
+
+    lobby = decode_lobby(waiting, 43)
+    assert lobby.game.phase() == Phase.LOBBY
+    assert lobby.solo_timer_message == 999
+    assert lobby.solo_expires_at == datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def test_current_records_skip_migrations(monkeypatch):
+    """
+    A record at the current version should decode without running any migration.
+    """
+    lobby = decode_lobby(_fixture("lobby_playing_record.pkl"), 42)
+    record = encode_lobby(lobby)
+    assert record.startswith(MAGIC)
+    assert record_version(record) == SCHEMA_VERSION
+
+    def fail(*_):
+        raise AssertionError("migration ran")
+
+    monkeypatch.setattr(lobby_codec, "_MIGRATIONS", dict.fromkeys(range(10), fail))
+    assert decode_lobby(record, 42).game.players() == [-1, -2, -3]
+
+
+def test_records_from_a_newer_release_are_not_decoded():
+    """
+    A record written at a version this release doesn't know should be treated as unreadable.
+    """
+    record = encode_lobby(decode_lobby(_fixture("lobby_waiting_record.pkl"), 43))
+    newer = struct.pack("<4sH", MAGIC, SCHEMA_VERSION + 1) + record[6:]
+    assert decode_lobby(newer, 43) is None
+
+
+def test_migrations_are_registered_once():
+    """
+    Registering a second migration from the same version should fail.
+    """
+    with pytest.raises(ValueError):
+        lobby_codec.migration(0)(lambda lobby, lobby_id: lobby)
+
+
+def test_old_shards_are_upgraded_and_rewritten_in_one_pass(tmp_path):
+    """
+    Loading a directory of unversioned shards should migrate every lobby once and rewrite it, so
+    the next startup has nothing left to upgrade.
+    """
+    directory = tmp_path / "lobbies"
+    directory.mkdir()
+    shutil.copy(FIXTURES / "lobby_playing_record.pkl", directory / "42.lobby")
+    shutil.copy(FIXTURES / "lobby_waiting_record.pkl", directory / "43.lobby")
+
+    repo = LobbyRepository(store=ShardedFileStore(directory))
+    assert repo.stats.lobbies_migrated == 2
+    assert (directory / "42.lobby").read_bytes().startswith(MAGIC)
+    assert (directory / "43.lobby").read_bytes().startswith(MAGIC)
+
+    reloaded = LobbyRepository(store=ShardedFileStore(directory))
+    assert reloaded.ids_in_phase(Phase.PLAYING) == [42]
+    assert reloaded.get(43).solo_timer_message == 999
+    assert reloaded.stats.lobbies_migrated == 0
+
+
+def test_old_records_loaded_lazily_are_rewritten(tmp_path):
+    """
+    An unversioned record loaded on first use should be upgraded and written back.
+    """
+    store = SqliteLobbyStore(tmp_path / "lobbies.sqlite3")
+    store.write(
+        {42: StoredLobby(_fixture("lobby_playing_record.pkl"), phase="PLAYING")},
+        set(),
+    )
+    repo = LobbyRepository(store=store)
+
+    assert repo.get(42).main_message == 1234
+    assert repo.stats.lobbies_migrated == 1
+    assert record_version(store.read(42)) == SCHEMA_VERSION
+    repo.close()
+
+
+@pytest.mark.parametrize("setting", ["zlib", "zlib:1", "lzma:0", "bz2:9"])
+def test_compressed_records_round_trip(setting):
+    """
+    Compressed records should be smaller, keep their schema version, and decode to the same lobby.
+    """
+    lobby = decode_lobby(_fixture("lobby_playing_record.pkl"), 42)
+    plain = encode_lobby(lobby)
+    compressed = encode_lobby(lobby, Compression.parse(setting))
+
+    assert len(compressed) < len(plain)
+    assert record_version(compressed) == SCHEMA_VERSION
+    decoded = decode_lobby(compressed, 42)
+    assert decoded.game.state["hands"] == lobby.game.state["hands"]
+    assert decoded.last_move == lobby.last_move
+
+
+def test_corrupt_compressed_records_are_unreadable():
+    """
+    A compressed record that fails to decompress should be treated as unreadable.
+    """
+    lobby = decode_lobby(_fixture("lobby_waiting_record.pkl"), 43)
+    record = encode_lobby(lobby, Compression(Codec.ZLIB))
+    assert decode_lobby(record[:-20], 43) is None
+    with pytest.raises(ValueError):
+        Compression.parse("zstd")
+
+
+def test_repository_reads_records_with_mixed_compression(tmp_path):
+    """
+    Changing the compression setting should not stop older records from loading.
+    """
+    directory = tmp_path / "lobbies"
+    repo = LobbyRepository(
+        store=ShardedFileStore(directory), compression=Compression(Codec.LZMA, 1)
+    )
+    repo.lobbies[43] = decode_lobby(_fixture("lobby_waiting_record.pkl"), 43)
+    repo.save(43)
+    repo = LobbyRepository(
+        store=ShardedFileStore(directory), compression=Compression(Codec.NONE)
+    )
+    repo.lobbies[42] = decode_lobby(_fixture("lobby_playing_record.pkl"), 42)
+    repo.save(42)
+
+    reloaded = LobbyRepository(store=ShardedFileStore(directory))
+    assert reloaded.get(42).main_message == 1234
+    assert reloaded.get(43).solo_timer_message == 999
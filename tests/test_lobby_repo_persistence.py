@@ -2,13 +2,21 @@
 Tests local file persistence for lobby and game state.
 """
 
+import asyncio
+import pickle
+import threading
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 
+import pytest
+
 from services.game_service import GameService
 from services.lobby_service import LobbyService
+from repos.lobby_codec import decode_lobby
 from repos.lobby_repo import LobbyRepository
+from repos.lobby_store import FsyncPolicy, LobbyStore
 from models.game_state import Phase
+from tests.test_lobby_codec import FIXTURES
 
 
 def _fake_user(user_id: int, name: str) -> SimpleNamespace:
@@ -19,6 +27,34 @@ def _fake_user(user_id: int, name: str) -> SimpleNamespace:
     )
 
 
+class _RecordingStore(LobbyStore):
+    """
+    Keeps records in memory and remembers which thread wrote what. Writes wait for `gate`.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.writes = []
+        self.syncs = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def load_all(self):
+        return dict(self.records)
+
+    def write(self, records, deleted):
+        self.gate.wait(5)
+        for lobby_id, record in records.items():
+            self.records[lobby_id] = record.data
+            players = decode_lobby(record.data, lobby_id).game.players()
+            self.writes.append((threading.current_thread().name, lobby_id, players))
+        for lobby_id in deleted:
+            self.records.pop(lobby_id, None)
+
+    def sync(self):
+        self.syncs += 1
+
+
 def test_lobby_state_is_restored_from_local_file(tmp_path):
     """
     A lobby should survive a repository reload using the local persistence file.
@@ -76,3 +112,229 @@ def test_deleted_lobbies_are_removed_from_local_file(tmp_path):
     reloaded_repo = LobbyRepository(storage_path=storage_path)
 
     assert not reloaded_repo.exists(222)
+
+
+def test_saves_are_coalesced_within_max_staleness(tmp_path):
+    """
+    Saves made inside an event loop should be written together once the staleness window ends.
+    """
+    storage_path = tmp_path / "lobbies.pkl"
+    repo = LobbyRepository(storage_path=storage_path, max_staleness=0.05)
+    lobby_service = LobbyService(repo)
+
+    async def play():
+        lobby_service.create_lobby(1, _fake_user(10, "Host"))
+        lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+        lobby_service.create_lobby(2, _fake_user(12, "Other"))
+
+        assert not storage_path.exists()
+        assert repo.dirty() == {1, 2}
+
+        await asyncio.sleep(0.1)
+
+    asyncio.run(play())
+
+    assert repo.stats.flushes == 1
+    assert repo.stats.requests > repo.stats.flushes
+    assert not repo.dirty()
+    assert LobbyRepository(storage_path=storage_path).get(1).game.players() == [10, 11]
+
+
+def test_close_flushes_pending_changes(tmp_path):
+    """
+    Closing the repository on shutdown should write changes still waiting for a flush.
+    """
+    storage_path = tmp_path / "lobbies.pkl"
+    repo = LobbyRepository(storage_path=storage_path, max_staleness=60)
+    lobby_service = LobbyService(repo)
+
+    async def play():
+        lobby_service.create_lobby(5, _fake_user(10, "Host"))
+        repo.close()
+
+    asyncio.run(play())
+
+    assert LobbyRepository(storage_path=storage_path).exists(5)
+
+
+def test_timed_out_turns_are_applied_and_written_as_one_batch():
+    """
+    Skipping the AFK players of many channels should write every changed lobby in one flush,
+    ignoring turns that were played in time and kicking players on their last strike.
+    """
+    store = _RecordingStore()
+    repo = LobbyRepository(store=store)
+    lobby_service = LobbyService(repo)
+    game_service = GameService(lobby_service)
+    for channel_id in range(1, 6):
+        lobby_service.create_lobby(channel_id, _fake_user(10, "Host"))
+        lobby_service.join_lobby(channel_id, _fake_user(11, "Guest"))
+        lobby_service.start_lobby(channel_id)
+    games = {channel_id: repo.get(channel_id).game for channel_id in range(1, 6)}
+    games[5].state["afk_counts"][games[5].current_player()] = 4
+    flushes = repo.stats.flushes
+
+    turns = [
+        (channel_id, game.current_player(), game.turn_count())
+        for channel_id, game in games.items()
+    ]
+    turns[1] = (2, games[2].current_player(), games[2].turn_count() - 1)
+    skips = game_service.skip_afk_turns(turns + [(99, 10, 0)])
+
+    assert sorted(skips) == [1, 3, 4, 5]
+    assert repo.stats.flushes == flushes + 1
+    assert sorted(lobby_id for _, lobby_id, _ in store.writes[-4:]) == [1, 3, 4, 5]
+    assert skips[1].afk_count == 1 and not skips[1].kicked
+    assert skips[5].kicked
+    assert skips[5].player_id not in games[5].players()
+    assert games[5].phase() == Phase.FINISHED
+
+
+def test_catch_up_applies_the_afk_turns_missed_while_offline():
+    """
+    A game restored long after its deadline should have every missed AFK turn applied in one
+    pass, down to the kick that ends it, and be saved once.
+    """
+    store = _RecordingStore()
+    repo = LobbyRepository(store=store)
+    lobby_service = LobbyService(repo)
+    game_service = GameService(lobby_service)
+    lobby_service.create_lobby(1, _fake_user(10, "Host"))
+    lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+    game = lobby_service.start_lobby(1).game
+    first = game.current_player()
+    now = datetime.now(timezone.utc)
+    game.state["afk_deadline"] = now - timedelta(seconds=630)
+    flushes = repo.stats.flushes
+
+    skips = game_service.catch_up(1, now)
+
+    assert [skip.player_id for skip in skips] == [first, 21 - first] * 4 + [first]
+    assert skips[-1].kicked and skips[-1].afk_count == 5
+    assert game.phase() == Phase.FINISHED
+    assert game.players() == [21 - first]
+    assert repo.stats.flushes == flushes + 1
+
+    game.state["phase"] = Phase.PLAYING
+    game.state["afk_deadline"] = now + timedelta(seconds=30)
+    assert not game_service.catch_up(1, now)
+
+
+def test_flush_async_writes_a_snapshot_on_the_writer_thread():
+    """
+    `flush_async` should write the lobby as it was when the flush started, off the event loop,
+    even if it changes before the writer gets to it.
+    """
+    store = _RecordingStore()
+    repo = LobbyRepository(store=store, max_staleness=60)
+    lobby_service = LobbyService(repo)
+
+    lobby_service.create_lobby(1, _fake_user(10, "Host"))
+    lobby_service.create_lobby(2, _fake_user(20, "Other"))
+    store.writes.clear()
+
+    async def play():
+        store.gate.clear()
+        lobby_service.join_lobby(2, _fake_user(21, "Guest"))
+        first = asyncio.create_task(repo.flush_async())
+        await asyncio.sleep(0)
+        lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+        second = asyncio.create_task(repo.flush_async())
+        await asyncio.sleep(0)
+        lobby_service.join_lobby(1, _fake_user(12, "Late"))
+        store.gate.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(play())
+
+    assert [(lobby_id, players) for _, lobby_id, players in store.writes] == [
+        (2, [20, 21]),
+        (1, [10, 11]),
+    ]
+    assert all(name.startswith("lobby-writer") for name, _, _ in store.writes)
+    assert repo.dirty() == {1}
+
+    repo.close()
+    assert store.writes[-1][1:] == (1, [10, 11, 12])
+
+
+def test_flush_async_writes_lobbies_from_the_previous_release():
+    """
+    A lobby pickled before bot strategies and unseen card counts existed should be written by
+    `flush_async`, and a lobby that can't be snapshotted should stay dirty.
+    """
+    store = _RecordingStore()
+    repo = LobbyRepository(store=store, max_staleness=60)
+    with (FIXTURES / "lobby_playing_record.pkl").open("rb") as record:
+        lobby = pickle.load(record)
+    assert "unseen" not in lobby.game.state
+
+    def fail():
+        raise KeyError("players")
+
+    async def play():
+        repo.lobbies[42] = lobby
+        repo.save(42)
+        await repo.flush_async()
+        assert not repo.dirty()
+
+        lobby.snapshot = fail
+        repo.save(42)
+        with pytest.raises(KeyError):
+            await repo.flush_async()
+        assert repo.dirty() == {42}
+        del lobby.snapshot
+
+    asyncio.run(play())
+    assert decode_lobby(store.records[42], 42).game.players() == [-1, -2, -3]
+    repo.close()
+
+
+def test_flush_waits_for_queued_async_writes():
+    """
+    A blocking flush should be written after writes already queued by `flush_async`, so the older
+    state can't overwrite the newer one.
+    """
+    store = _RecordingStore()
+    repo = LobbyRepository(store=store, max_staleness=60)
+    lobby_service = LobbyService(repo)
+
+    async def play():
+        lobby_service.create_lobby(1, _fake_user(10, "Host"))
+        store.gate.clear()
+        queued = asyncio.create_task(repo.flush_async())
+        await asyncio.sleep(0)
+        lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+        threading.Timer(0.05, store.gate.set).start()
+        repo.flush()
+        await queued
+
+    asyncio.run(play())
+
+    assert [players for _, _, players in store.writes] == [[10], [10, 11]]
+    assert decode_lobby(store.records[1], 1).game.players() == [10, 11]
+
+
+def test_fsync_policies():
+    """
+    The store should be synced after every flush, at most once per interval, or only as the
+    repository closes, depending on the policy.
+    """
+    syncs = {}
+    for policy in FsyncPolicy:
+        store = _RecordingStore()
+        repo = LobbyRepository(store=store, fsync=policy, fsync_interval=60)
+        lobby_service = LobbyService(repo)
+        for channel_id in (1, 2, 3):
+            lobby_service.create_lobby(channel_id, _fake_user(channel_id, "Host"))
+        before_close = store.syncs
+        repo.close()
+        syncs[policy] = (before_close, store.syncs)
+        flushes = repo.stats.flushes
+
+    assert flushes > 1
+    assert syncs == {
+        FsyncPolicy.NONE: (0, 0),
+        FsyncPolicy.PER_FLUSH: (flushes, flushes + 1),
+        FsyncPolicy.INTERVAL: (0, 1),
+    }
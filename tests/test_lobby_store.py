@@ -0,0 +1,378 @@
+"""
+Tests the storage backends behind the lobby repository.
+"""
+
+import pickle
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import repos.lobby_store
+from models.game_state import GameState, Phase
+from models.lobby_model import Lobby, LobbyUser
+from repos.journal_lobby_store import JournalLobbyStore
+from repos.lobby_repo import LobbyRepository
+from repos.lobby_store import ShardedFileStore, StoredLobby, shard_for_guild
+from repos.sqlite_lobby_store import SqliteLobbyStore
+from services.lobby_service import LobbyService
+
+
+def _fake_user(user_id: int, name: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=user_id,
+        name=name,
+        display_avatar=SimpleNamespace(url=f"https://example.com/{user_id}.png"),
+    )
+
+
+def test_only_changed_lobbies_are_rewritten(tmp_path):
+    """
+    Saving one lobby should rewrite its shard and leave the others alone.
+    """
+    store = ShardedFileStore(tmp_path / "lobbies")
+    repo = LobbyRepository(store=store)
+    lobby_service = LobbyService(repo)
+    lobby_service.create_lobby(1, _fake_user(10, "Host"))
+    lobby_service.create_lobby(2, _fake_user(20, "Other"))
+    untouched = store.shard_path(2).read_bytes()
+    written = repo.stats.lobbies_written
+
+    lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+
+    assert repo.stats.lobbies_written == written + 1
+    assert store.shard_path(2).read_bytes() == untouched
+    assert LobbyRepository(store=store).get(1).game.players() == [10, 11]
+    assert sorted(p.name for p in (tmp_path / "lobbies").iterdir()) == [
+        "1.lobby",
+        "2.lobby",
+        "index.log",
+    ]
+
+
+def test_a_torn_index_line_is_cut_off(tmp_path):
+    """
+    A line half written when the bot crashed should be dropped on load, so lobbies written
+    afterwards are still in the index the next time it is loaded.
+    """
+    directory = tmp_path / "lobbies"
+    repo = LobbyRepository(store=ShardedFileStore(directory))
+    LobbyService(repo).create_lobby(1, _fake_user(10, "Host"))
+    repo.close()
+    with (directory / "index.log").open("a", encoding="utf-8") as index_file:
+        index_file.write('[2, "PLAY')
+
+    repo = LobbyRepository(store=ShardedFileStore(directory))
+    assert repo.ids() == [1]
+    lobby_service = LobbyService(repo)
+    lobby_service.create_lobby(3, _fake_user(30, "Host"))
+    lobby_service.create_lobby(4, _fake_user(40, "Host"))
+    repo.close()
+
+    reloaded = LobbyRepository(store=ShardedFileStore(directory))
+    assert reloaded.ids() == [1, 3, 4]
+    assert reloaded.ids_in_phase(Phase.LOBBY) == [1, 3, 4]
+    assert reloaded.get(4).game.players() == [40]
+    reloaded.close()
+
+
+def test_an_index_damaged_before_later_lines_is_rebuilt(tmp_path):
+    """
+    An index with lines appended after a damaged one should be rebuilt from the shards.
+    """
+    directory = tmp_path / "lobbies"
+    repo = LobbyRepository(store=ShardedFileStore(directory))
+    lobby_service = LobbyService(repo)
+    lobby_service.create_lobby(1, _fake_user(10, "Host"))
+    with (directory / "index.log").open("a", encoding="utf-8") as index_file:
+        index_file.write('[2, "PLAY')
+    lobby_service.create_lobby(3, _fake_user(30, "Host"))
+    lobby_service.create_lobby(4, _fake_user(40, "Host"))
+    repo.close()
+
+    reloaded = LobbyRepository(store=ShardedFileStore(directory))
+    assert reloaded.ids() == [1, 3, 4]
+    reloaded.close()
+
+    again = LobbyRepository(store=ShardedFileStore(directory))
+    assert not again.lobbies
+    assert again.ids() == [1, 3, 4]
+    again.close()
+
+
+def test_delete_removes_only_that_shard(tmp_path):
+    """
+    Deleting a lobby should remove its shard file.
+    """
+    store = ShardedFileStore(tmp_path / "lobbies")
+    repo = LobbyRepository(store=store)
+    lobby_service = LobbyService(repo)
+    lobby_service.create_lobby(1, _fake_user(10, "Host"))
+    lobby_service.create_lobby(2, _fake_user(20, "Other"))
+
+    repo.delete(1)
+
+    assert not store.shard_path(1).exists()
+    assert store.shard_path(2).exists()
+    assert not LobbyRepository(store=store).exists(1)
+
+
+def test_legacy_file_is_split_into_shards(tmp_path):
+    """
+    A `lobbies.pkl` from an older release should be migrated to shards on first load.
+    """
+    legacy_path = tmp_path / "lobbies.pkl"
+    lobby = Lobby(LobbyUser(10, "Host"), GameState(), 555, channel_id=3)
+    lobby.game.add_player(10)
+    with legacy_path.open("wb") as legacy_file:
+        pickle.dump({3: lobby}, legacy_file)
+
+    store = ShardedFileStore(tmp_path / "lobbies", legacy_path=legacy_path)
+    repo = LobbyRepository(store=store)
+
+    assert repo.get(3).main_message == 555
+    assert repo.get(3).game.players() == [10]
+    assert store.shard_path(3).exists()
+    assert not legacy_path.exists()
+    assert (tmp_path / "lobbies.pkl.migrated").exists()
+    assert store.load_index()[3].main_message == 555
+    assert LobbyRepository(store=store).get(3).main_message == 555
+
+
+@pytest.mark.parametrize(
+    "make_store",
+    [
+        lambda path: ShardedFileStore(path / "lobbies"),
+        lambda path: SqliteLobbyStore(path / "lobbies.sqlite3"),
+    ],
+    ids=["sharded", "sqlite"],
+)
+def test_lobbies_are_loaded_on_first_use(tmp_path, make_store):
+    """
+    With an indexed store, startup should only read the index and each lobby should be decoded
+    the first time it is used.
+    """
+    repo = LobbyRepository(store=make_store(tmp_path))
+    lobby_service = LobbyService(repo)
+    for channel_id in (1, 2, 3):
+        lobby_service.create_lobby(channel_id, _fake_user(channel_id * 10, "Host"))
+        lobby_service.join_lobby(channel_id, _fake_user(channel_id * 10 + 1, "Guest"))
+    lobby_service.start_lobby(2)
+    repo.close()
+
+    reloaded = LobbyRepository(store=make_store(tmp_path))
+    assert not reloaded.lobbies
+    assert reloaded.ids() == [1, 2, 3]
+    assert reloaded.exists(3)
+    assert reloaded.ids_in_phase(Phase.PLAYING) == [2]
+
+    assert reloaded.get(2).game.players() == [20, 21]
+    assert list(reloaded.lobbies) == [2]
+    assert reloaded.stats.lobbies_loaded == 1
+    reloaded.delete(3)
+    reloaded.close()
+
+    final = LobbyRepository(store=make_store(tmp_path))
+    assert final.ids() == [1, 2]
+    assert final.ids_in_phase(Phase.LOBBY) == [1]
+    final.close()
+
+
+def test_lobbies_are_ordered_by_recent_activity(tmp_path):
+    """
+    Lobbies should be ordered from the most recently written, with loaded lobbies first since
+    they are in use.
+    """
+    repo = LobbyRepository(store=SqliteLobbyStore(tmp_path / "lobbies.sqlite3"))
+    lobby_service = LobbyService(repo)
+    for channel_id in (3, 1, 2):
+        lobby_service.create_lobby(channel_id, _fake_user(10, "Host"))
+        repo.flush()
+        time.sleep(0.01)
+    repo.close()
+
+    reloaded = LobbyRepository(store=SqliteLobbyStore(tmp_path / "lobbies.sqlite3"))
+    assert reloaded.by_recent_activity(reloaded.ids()) == [2, 1, 3]
+    reloaded.get(3)
+    assert reloaded.by_recent_activity([1, 2, 3]) == [3, 2, 1]
+    reloaded.close()
+
+
+@pytest.mark.parametrize(
+    "make_store",
+    [
+        lambda path: ShardedFileStore(path / "lobbies"),
+        lambda path: SqliteLobbyStore(path / "lobbies.sqlite3"),
+        lambda path: JournalLobbyStore(path / "journal"),
+    ],
+    ids=["sharded", "sqlite", "journal"],
+)
+def test_lobbies_are_partitioned_by_guild_shard(tmp_path, make_store):
+    """
+    Each gateway shard should get the lobbies of its own guilds, with lobbies whose guild isn't
+    recorded going to shard 0.
+    """
+    repo = LobbyRepository(store=make_store(tmp_path))
+    lobby_service = LobbyService(repo)
+    # A guild's shard comes from the timestamp bits of its ID, above bit 22.
+    guilds = {1: 2 << 22, 2: (3 << 22) + 99, 3: 5 << 22, 4: None}
+    for channel_id, guild_id in guilds.items():
+        lobby_service.create_lobby(channel_id, _fake_user(10, "Host"), guild_id)
+    repo.close()
+
+    reloaded = LobbyRepository(store=make_store(tmp_path))
+    assert shard_for_guild(guilds[2], 2) == 1
+    assert reloaded.ids_in_shard(0, 2) == [1, 4]
+    assert reloaded.ids_in_shard(1, 2) == [2, 3]
+    assert reloaded.ids_in_shard(0, 1) == [1, 2, 3, 4]
+    assert reloaded.get(3).guild_id == 5 << 22
+    reloaded.close()
+
+
+def test_sqlite_store_adds_the_guild_column(tmp_path):
+    """
+    A database created before guilds were recorded should gain the column, with its lobbies on
+    shard 0.
+    """
+    path = tmp_path / "lobbies.sqlite3"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE lobbies (channel_id INTEGER PRIMARY KEY, phase TEXT NOT NULL,"
+            " main_message INTEGER, updated_at REAL NOT NULL, record BLOB NOT NULL)"
+        )
+        connection.execute("INSERT INTO lobbies VALUES (1, 'LOBBY', NULL, 0, x'00')")
+    connection.close()
+
+    store = SqliteLobbyStore(path)
+    assert store.load_index()[1].guild_id is None
+    assert store.ids_in_shard(0, 4) == [1]
+    store.write({2: StoredLobby(b"two", phase="LOBBY", guild_id=1 << 22)}, set())
+    assert store.ids_in_shard(1, 4) == [2]
+    store.close()
+
+
+def test_sqlite_store_round_trips_and_indexes_phase(tmp_path):
+    """
+    The SQLite store should persist lobbies in WAL mode and answer phase queries from its index.
+    """
+    path = tmp_path / "lobbies.sqlite3"
+    repo = LobbyRepository(store=SqliteLobbyStore(path))
+    lobby_service = LobbyService(repo)
+    for channel_id in (1, 2, 3):
+        lobby_service.create_lobby(channel_id, _fake_user(channel_id * 10, "Host"))
+        lobby_service.join_lobby(channel_id, _fake_user(channel_id * 10 + 1, "Guest"))
+    lobby_service.start_lobby(2)
+    repo.delete(3)
+    repo.close()
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    reloaded = LobbyRepository(store=SqliteLobbyStore(path))
+    assert reloaded.ids_in_phase(Phase.PLAYING) == [2]
+    assert reloaded.ids_in_phase(Phase.LOBBY) == [1]
+    assert reloaded.get(2).game.players() == [20, 21]
+    assert not reloaded.exists(3)
+    reloaded.close()
+
+
+def test_sqlite_store_writes_a_batch_in_one_transaction(tmp_path):
+    """
+    A failing row should roll back the whole batch rather than leave it half written.
+    """
+    store = SqliteLobbyStore(tmp_path / "lobbies.sqlite3")
+    store.write({1: StoredLobby(b"one", phase="LOBBY")}, set())
+
+    with pytest.raises(sqlite3.Error):
+        store.write(
+            {
+                1: StoredLobby(b"changed", phase="PLAYING"),
+                2: StoredLobby(None, phase="LOBBY"),
+            },
+            set(),
+        )
+
+    assert store.load_all() == {1: b"one"}
+    assert store.ids_in_phase("PLAYING") == []
+    store.close()
+
+
+def test_journal_store_replays_moves_over_snapshot(tmp_path):
+    """
+    Changes made after the last snapshot should be recovered from the journal on startup.
+    """
+    directory = tmp_path / "journal"
+    store = JournalLobbyStore(directory, compact_every=4)
+    repo = LobbyRepository(store=store)
+    lobby_service = LobbyService(repo)
+    for channel_id in (1, 2, 3):
+        lobby_service.create_lobby(channel_id, _fake_user(channel_id * 10, "Host"))
+    lobby_service.join_lobby(1, _fake_user(11, "Guest"))
+    assert store.compactions == 1
+    lobby_service.join_lobby(2, _fake_user(21, "Guest"))
+    repo.delete(3)
+    repo.close()
+
+    reloaded = LobbyRepository(store=JournalLobbyStore(directory))
+    assert reloaded.get(1).game.players() == [10, 11]
+    assert reloaded.get(2).game.players() == [20, 21]
+    assert not reloaded.exists(3)
+    reloaded.close()
+
+
+def test_journal_compaction_syncs_the_snapshot_rename(tmp_path, monkeypatch):
+    """
+    The new snapshot's directory entry should be on disk before the journal is emptied.
+    """
+    directory = tmp_path / "journal"
+    store = JournalLobbyStore(directory, compact_every=2)
+    synced = []
+    monkeypatch.setattr(
+        repos.lobby_store,
+        "fsync_directory",
+        lambda path: synced.append((path, store.journal_path.stat().st_size)),
+    )
+
+    store.write({1: StoredLobby(b"one")}, set())
+    store.write({2: StoredLobby(b"two")}, set())
+
+    assert store.compactions == 1
+    assert synced and synced[0][0] == directory and synced[0][1] > 0
+    assert store.journal_path.stat().st_size == 0
+    store.close()
+
+
+def test_journal_store_drops_a_torn_entry(tmp_path):
+    """
+    A partial entry at the end of the journal should be ignored and cut off, keeping the entries
+    before it.
+    """
+    directory = tmp_path / "journal"
+    store = JournalLobbyStore(directory)
+    store.write({1: StoredLobby(b"one"), 2: StoredLobby(b"two")}, set())
+    store.close()
+    intact = store.journal_path.stat().st_size
+    with store.journal_path.open("ab") as journal_file:
+        journal_file.write(b"\x01\x03\x00")
+
+    reopened = JournalLobbyStore(directory)
+    assert reopened.load_all() == {1: b"one", 2: b"two"}
+    assert reopened.journal_path.stat().st_size == intact
+    reopened.write({3: StoredLobby(b"three")}, {1})
+    reopened.close()
+    assert JournalLobbyStore(directory).load_all() == {2: b"two", 3: b"three"}
+
+
+def test_journal_store_fsyncs_in_groups(tmp_path):
+    """
+    Appends should only be fsynced once enough have built up, and on close.
+    """
+    store = JournalLobbyStore(tmp_path / "journal", fsync_every=3, fsync_interval=60)
+    store.load_all()
+    for lobby_id in range(7):
+        store.write({lobby_id: StoredLobby(b"x")}, set())
+    assert store.fsyncs == 2
+
+    store.close()
+    assert store.fsyncs == 3
@@ -16,14 +16,34 @@ def test_smoke_imports():
         "controllers.uno_cog",
         "models",
         "models.bot",
+        "models.bot_batch",
+        "models.card_counter",
+        "models.endgame",
         "models.deck",
         "models.game_state",
         "models.lobby_model",
+        "models.policy",
+        "models.simulation",
         "services",
+        "services.bot_scheduler",
+        "services.channel_actors",
         "services.game_service",
+        "services.game_workers",
         "services.lobby_service",
+        "services.timer_wheel",
         "repos",
+        "repos.journal_lobby_store",
+        "repos.lobby_archive",
+        "repos.lobby_codec",
         "repos.lobby_repo",
+        "repos.lobby_store",
+        "repos.lobby_store_server",
+        "repos.socket_lobby_store",
+        "repos.sqlite_lobby_store",
+        "tools",
+        "tools.selfplay",
+        "tools.tournament",
+        "tools.train_policy",
         "ui",
         "ui.end_ui",
         "ui.game_ui",
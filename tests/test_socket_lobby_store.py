@@ -0,0 +1,148 @@
+"""
+Tests the lobby store server and the repository backend that talks to it over a Unix socket.
+"""
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from models.game_state import Phase
+from repos.lobby_repo import LobbyRepository
+from repos.lobby_store import StoredLobby
+from repos.lobby_store_server import LobbyStoreServer
+from repos.socket_lobby_store import (
+    FRAME,
+    LobbyStoreError,
+    SocketLobbyStore,
+    decode_header,
+    encode_frame,
+)
+from repos.sqlite_lobby_store import SqliteLobbyStore
+from services.lobby_service import LobbyService
+from tests.test_lobby_store import _fake_user
+
+
+@pytest.fixture(name="server")
+def _server(tmp_path):
+    """
+    Runs a server backed by SQLite on its own event loop thread.
+    """
+    loop = asyncio.new_event_loop()
+    server = LobbyStoreServer(
+        tmp_path / "lobbies.sock", SqliteLobbyStore(tmp_path / "lobbies.sqlite3")
+    )
+    started = threading.Event()
+
+    async def run():
+        await server.start()
+        started.set()
+        await server._stopped.wait()  # pylint: disable=protected-access
+        await server.close()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),))
+    thread.start()
+    started.wait(5)
+    yield server
+    loop.call_soon_threadsafe(server.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_repositories_share_lobbies_through_the_server(server):
+    """
+    Lobbies written by one process's repository should be readable by another's, and a lobby
+    created after a repository started should still be found.
+    """
+    first = LobbyRepository(store=SocketLobbyStore(server.path))
+    second = LobbyRepository(store=SocketLobbyStore(server.path))
+
+    LobbyService(first).create_lobby(1, _fake_user(10, "Host"), 3 << 22)
+    LobbyService(first).join_lobby(1, _fake_user(11, "Guest"))
+
+    assert second.get(1).game.players() == [10, 11]
+    assert second.ids_in_phase(Phase.LOBBY) == [1]
+    assert second.ids_in_shard(1, 2) == [1]
+    assert second.ids_in_shard(0, 2) == []
+    assert LobbyRepository(store=SocketLobbyStore(server.path)).ids() == [1]
+    with pytest.raises(KeyError):
+        second.get(2)
+
+    first.delete(1)
+    assert not LobbyRepository(store=SocketLobbyStore(server.path)).exists(1)
+    first.close()
+    second.close()
+
+
+def test_evicted_lobbies_are_written_and_reloaded(server):
+    """
+    Evicting a changed lobby should write it and drop it from memory until it is used again.
+    """
+    repo = LobbyRepository(store=SocketLobbyStore(server.path), max_staleness=60.0)
+    LobbyService(repo).create_lobby(1, _fake_user(10, "Host"))
+
+    async def join():
+        LobbyService(repo).join_lobby(1, _fake_user(11, "Guest"))
+
+    asyncio.run(join())
+    assert repo.dirty() == {1}
+
+    repo.evict(1)
+    assert not repo.dirty()
+    assert 1 not in repo.lobbies
+    assert repo.ids() == [1]
+    assert repo.get(1).game.players() == [10, 11]
+    assert repo.stats.lobbies_loaded == 1
+    repo.close()
+
+
+def test_compare_and_set_rejects_stale_versions(server):
+    """
+    A compare-and-set should only succeed against the version it was read at.
+    """
+    store = SocketLobbyStore(server.path)
+    other = SocketLobbyStore(server.path)
+
+    created = store.compare_and_set(5, 0, StoredLobby(b"first", phase="LOBBY"))
+    assert created is not None
+    assert store.compare_and_set(5, 0, StoredLobby(b"again")) is None
+
+    read = other.read_versioned(5)
+    assert read.version == created
+    assert read.data == b"first"
+    updated = other.compare_and_set(5, read.version, StoredLobby(b"second"))
+    assert updated > created
+
+    assert store.compare_and_set(5, created, StoredLobby(b"stale")) is None
+    assert store.read(5) == b"second"
+    assert store.compare_and_set(5, updated, None) == 0
+    assert store.read_versioned(5) is None
+    store.close()
+    other.close()
+
+
+def test_batched_writes_and_bad_requests(server):
+    """
+    A batch should be one request, and a malformed one should be refused without dropping the
+    connection for good.
+    """
+    store = SocketLobbyStore(server.path)
+    before = server.requests
+    store.write(
+        {lobby_id: StoredLobby(bytes([lobby_id]) * 100) for lobby_id in range(20)},
+        set(),
+    )
+    assert server.requests == before + 1
+    assert store.read(7) == bytes([7]) * 100
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as raw:
+        raw.connect(str(server.path))
+        raw.sendall(encode_frame({"op": "write", "records": [[1, "", None, 0, 99]]}))
+        header_length, _ = FRAME.unpack(raw.recv(FRAME.size))
+        assert "error" in decode_header(raw.recv(header_length))
+
+    with pytest.raises(LobbyStoreError):
+        store._request({"op": "drop"})  # pylint: disable=protected-access
+    assert store.read(7) == bytes([7]) * 100
+    store.close()
@@ -0,0 +1,97 @@
+"""
+Tests the timer wheel that fires every channel's deadlines from one task.
+"""
+
+import asyncio
+
+from services.timer_wheel import TimerWheel
+
+
+def test_due_timers_fire_together_and_replaced_ones_dont():
+    """
+    Deadlines in the same tick should reach the handler as one batch, and only the latest
+    deadline of a key should fire.
+    """
+    batches = []
+
+    async def run():
+        wheel = TimerWheel(batches.append, tick=0.01)
+        for channel_id in range(5):
+            wheel.schedule(channel_id, 0.02, ("turn", 1))
+        wheel.schedule(0, 0.02, ("turn", 2))
+        wheel.schedule(4, 0.02)
+        assert wheel.cancel(4)
+        assert not wheel.cancel(4)
+        assert len(wheel) == 4
+        await asyncio.sleep(0.1)
+        await wheel.close()
+        return wheel.stats
+
+    stats = asyncio.run(run())
+    assert len(batches) == 1
+    assert sorted(batches[0]) == [
+        (0, ("turn", 2)),
+        (1, ("turn", 1)),
+        (2, ("turn", 1)),
+        (3, ("turn", 1)),
+    ]
+    assert stats.fired == 4
+    assert stats.rescheduled == 2
+    assert stats.cancelled == 1
+    assert stats.largest_batch == 4
+
+
+def test_far_deadlines_cascade_and_never_fire_early():
+    """
+    Deadlines beyond the inner level, and beyond the outer one, should still fire in order and
+    no sooner than they were set for.
+    """
+    fired = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        wheel = TimerWheel(
+            lambda expired: fired.extend(
+                (key, loop.time() - start) for key, _ in expired
+            ),
+            tick=0.005,
+            slots=4,
+            outer_slots=2,
+        )
+        for key, delay in (("far", 0.2), ("near", 0.012), ("middle", 0.05)):
+            wheel.schedule(key, delay)
+        await asyncio.sleep(0.3)
+        await wheel.close()
+
+    asyncio.run(run())
+    assert [key for key, _ in fired] == ["near", "middle", "far"]
+    assert all(
+        elapsed >= delay for (_, elapsed), delay in zip(fired, (0.012, 0.05, 0.2))
+    )
+
+
+def test_an_idle_wheel_resumes_and_handler_errors_are_contained():
+    """
+    A wheel with nothing pending should pick up new deadlines, and a failing handler shouldn't
+    stop later timers.
+    """
+    fired = []
+
+    async def handler(expired):
+        fired.extend(key for key, _ in expired)
+        if "bad" in fired[-1]:
+            raise RuntimeError("render failed")
+
+    async def run():
+        wheel = TimerWheel(handler, tick=0.01)
+        wheel.schedule("bad", 0)
+        await asyncio.sleep(0.05)
+        assert not wheel
+        await asyncio.sleep(0.05)
+        wheel.schedule("good", 0.01)
+        await asyncio.sleep(0.05)
+        await wheel.close()
+
+    asyncio.run(run())
+    assert fired == ["bad", "good"]
@@ -0,0 +1,78 @@
+"""
+Tests the bot tournament runner.
+"""
+
+import json
+
+from tools import tournament
+
+
+def _run(tmp_path, *extra) -> dict:
+    out = tmp_path / "result.json"
+    code = tournament.main(
+        ["--games", "6", "--chunk-games", "4", "--out", str(out), *extra]
+    )
+    assert code == 0
+    return json.loads(out.read_text())
+
+
+def test_every_strategy_plays_every_other(tmp_path):
+    """
+    Each pairing should play the requested games and be reported with intervals and latency.
+    """
+    report = _run(tmp_path, "--workers", "1")
+
+    names = report["config"]["strategies"]
+    assert len(report["matchups"]) == len(names) * (len(names) - 1) // 2
+    for matchup in report["matchups"].values():
+        assert matchup["games"] == 6
+        assert sum(matchup["wins"].values()) + matchup["ties"] == 6
+        low, high = matchup["first_win_rate_ci95"]
+        assert 0 <= low <= matchup["first_win_rate"] <= high <= 1
+
+    for stats in report["strategies"].values():
+        assert stats["games"] == 6 * (len(names) - 1)
+        assert stats["decisions"] > 0
+        assert 0 < stats["mean_latency_us"] <= stats["p99_latency_us"]
+    assert report["throughput"]["games_per_sec"] > 0
+
+
+def test_results_do_not_depend_on_workers(tmp_path):
+    """
+    Seeded games should give the same outcomes however they are split between processes.
+    """
+    serial = _run(tmp_path, "--workers", "1", "--strategies", "random,counting")
+    parallel = _run(tmp_path, "--workers", "2", "--strategies", "random,counting")
+
+    assert serial["matchups"] == parallel["matchups"]
+
+
+def test_wilson_interval_bounds():
+    """
+    Intervals should contain the observed rate and shrink with more trials.
+    """
+    low, high = tournament.wilson_interval(50, 100)
+    wide_low, wide_high = tournament.wilson_interval(5, 10)
+
+    assert low < 0.5 < high
+    assert high - low < wide_high - wide_low
+    assert tournament.wilson_interval(0, 10)[0] == 0.0
+
+
+def test_slower_decisions_are_flagged():
+    """
+    A strategy whose decisions got slower than allowed should be reported.
+    """
+    baseline = {"strategies": {"RANDOM": {"mean_latency_us": 10.0}}}
+    report = {
+        "strategies": {
+            "RANDOM": {"mean_latency_us": 100.0},
+            "COUNTING": {"mean_latency_us": 5.0},
+        }
+    }
+
+    regressions = tournament.latency_regressions(baseline, report, 3.0)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("RANDOM")
+    assert not tournament.latency_regressions(baseline, report, 20.0)
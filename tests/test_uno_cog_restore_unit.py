@@ -4,10 +4,17 @@ Tests startup restore behavior in the UNO cog.
 
 # pylint: disable=protected-access
 
+import asyncio
 from datetime import datetime, timezone
 from types import SimpleNamespace
 
-from controllers.uno_cog import UnoCog
+import controllers.uno_cog
+import repos.lobby_repo
+from controllers.uno_cog import UnoCog, setup
+from models.game_state import Phase
+from services.game_service import AfkSkip
+from tests.test_lobby_store import _fake_user
+from views.game_views import GameViews
 
 
 def test_reset_restored_turn_timer_gives_player_new_afk_window():
@@ -15,12 +22,106 @@ def test_reset_restored_turn_timer_gives_player_new_afk_window():
     Restored games should get a fresh AFK window instead of expiring immediately.
     """
     save_calls = []
-    fake_cog = SimpleNamespace(
-        lobby_service=SimpleNamespace(save=lambda: save_calls.append("saved"))
+    fake_cog = SimpleNamespace(lobby_service=SimpleNamespace(save=save_calls.append))
+    lobby = SimpleNamespace(
+        channel_id=7, game=SimpleNamespace(state={"afk_deadline": None})
     )
-    lobby = SimpleNamespace(game=SimpleNamespace(state={"afk_deadline": None}))
 
     UnoCog._reset_restored_turn_timer(fake_cog, lobby)
 
     assert lobby.game.state["afk_deadline"] > datetime.now(timezone.utc)
-    assert save_calls == ["saved"]
+    assert save_calls == [7]
+
+
+def test_only_lobbies_on_this_processes_shards_are_restored():
+    """
+    A process running some of the shards should restore the lobbies of those shards' guilds.
+    """
+    shards = {0: [1, 4], 1: [2], 2: [3]}
+    lobby_repo = SimpleNamespace(
+        ids=lambda: [1, 2, 3, 4],
+        ids_in_shard=lambda shard_id, shard_count: shards[shard_id],
+    )
+
+    def owned(**bot):
+        fake_cog = SimpleNamespace(bot=SimpleNamespace(**bot), lobby_repo=lobby_repo)
+        return UnoCog._owned_lobby_ids(fake_cog)
+
+    assert owned(shard_count=None, shard_id=None) == [1, 2, 3, 4]
+    assert owned(shard_count=3, shard_id=None, shard_ids=[2, 0]) == [1, 3, 4]
+    assert owned(shard_count=3, shard_id=1) == [2]
+
+
+def test_catch_up_is_summarised_in_one_notice():
+    """
+    The AFK turns applied while the bot was offline should be described per player.
+    """
+    game = SimpleNamespace(phase=lambda: Phase.FINISHED, ended_in_draw=lambda: False)
+    skips = [AfkSkip(1, 1, 1, False), AfkSkip(2, 1, 1, False), AfkSkip(1, 1, 2, True)]
+
+    assert GameViews.catch_up_summary(skips, game) == (
+        "While the bot was offline:\n"
+        "<@1> was AFK and skipped 2 times.\n"
+        "<@2> was AFK and skipped once.\n"
+        "<@1> has been kicked for being AFK.\n"
+        "Game ended due to a lack of players."
+    )
+    assert GameViews.catch_up_summary([], game) is None
+
+
+def test_saved_lobbies_are_restored_a_few_at_a_time(tmp_path, monkeypatch):
+    """
+    Loading the cog shouldn't wait for restore, which should then restore a bounded number of
+    lobbies at once, delete the stale ones, and count a failure without stopping.
+    """
+    monkeypatch.setattr(repos.lobby_repo, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(controllers.uno_cog, "DATA_DIR", tmp_path)
+    monkeypatch.delenv("UNO_LOBBY_STORE", raising=False)
+    monkeypatch.delenv("UNO_GAME_WORKERS", raising=False)
+    monkeypatch.setattr(UnoCog, "restore_concurrency", 3)
+    in_flight = []
+    peak = []
+
+    async def restore_lobby(_cog, channel_id, _lobby):
+        in_flight.append(channel_id)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(channel_id)
+        if channel_id == 13:
+            raise RuntimeError("Unknown channel")
+        return channel_id % 5 != 0
+
+    monkeypatch.setattr(UnoCog, "_restore_lobby", restore_lobby)
+
+    async def run():
+        ready = asyncio.Event()
+        cogs = []
+
+        async def add_cog(cog):
+            cogs.append(cog)
+            for channel_id in range(1, 21):
+                lobby = cog.lobby_service.create_lobby(
+                    channel_id, _fake_user(10, "Host")
+                )
+                lobby.guild_id = 1
+
+        bot = SimpleNamespace(
+            add_cog=add_cog, wait_until_ready=ready.wait, shard_count=None
+        )
+        await setup(bot)
+        cog = cogs[0]
+        assert cog.restore_stats.total == 0
+        ready.set()
+        await cog._restore_task
+        await cog.cog_unload()
+        return cog
+
+    cog = asyncio.run(run())
+    assert max(peak) == 3
+    assert cog.restore_stats.total == 20
+    assert cog.restore_stats.restored == 15
+    assert cog.restore_stats.deleted == 4
+    assert cog.restore_stats.failed == 1
+    assert cog.lobby_repo.ids() == [
+        channel_id for channel_id in range(1, 21) if channel_id % 5
+    ]
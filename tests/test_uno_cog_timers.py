@@ -0,0 +1,137 @@
+"""
+Tests the UNO cog's solo lobby timers against a fake Discord channel.
+"""
+
+# pylint: disable=protected-access
+
+import asyncio
+from types import SimpleNamespace
+
+import controllers.uno_cog
+import repos.lobby_repo
+from controllers.uno_cog import UnoCog
+from tests.test_lobby_store import _fake_user
+
+
+class _FakeChannel:
+    """
+    Records every REST call made through the channel and the messages it hands out.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.next_id = 100
+
+    async def send(self, embed=None, **_kwargs):
+        """
+        Sends a message, returning it with a new ID.
+        """
+        self.calls.append(("send", embed.description))
+        self.next_id += 1
+        return SimpleNamespace(id=self.next_id)
+
+    def get_partial_message(self, message_id: int):
+        """
+        Returns a message that can be edited or deleted without fetching it.
+        """
+        channel = self
+
+        class _Partial:
+            async def edit(self, embed=None, **_kwargs):
+                """
+                Edits the message.
+                """
+                channel.calls.append(("edit", message_id, embed.title))
+
+            async def delete(self):
+                """
+                Deletes the message.
+                """
+                channel.calls.append(("delete", message_id))
+
+        return _Partial()
+
+
+def _cog(tmp_path, monkeypatch, channel):
+    monkeypatch.setattr(repos.lobby_repo, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(controllers.uno_cog, "DATA_DIR", tmp_path)
+    monkeypatch.delenv("UNO_LOBBY_STORE", raising=False)
+    monkeypatch.delenv("UNO_GAME_WORKERS", raising=False)
+    cog = UnoCog(SimpleNamespace(get_channel=lambda _channel_id: channel))
+    cog.timers.tick = 0.01
+    cog.solo_timeout = 0.05
+    return cog
+
+
+def test_a_solo_lobby_expires_from_one_timer(tmp_path, monkeypatch):
+    """
+    A solo lobby should send its countdown once and expire on schedule, costing three REST
+    calls in all rather than one edit a second.
+    """
+    channel = _FakeChannel()
+    cog = _cog(tmp_path, monkeypatch, channel)
+
+    async def run():
+        lobby = cog.lobby_service.create_lobby(7, _fake_user(10, "Host"))
+        lobby.main_message = 55
+        cog.restart_solo_lobby_timer(lobby)
+        await asyncio.sleep(0.2)
+        await cog.cog_unload()
+
+    asyncio.run(run())
+    assert not cog.lobby_repo.exists(7)
+    assert [call[0] for call in channel.calls] == ["send", "edit", "delete"]
+    assert "<t:" in channel.calls[0][1]
+    assert channel.calls[1] == ("edit", 101, "🕒 Lobby Expired")
+    assert channel.calls[2] == ("delete", 55)
+    assert cog.solo_stats.expired == 1
+    assert cog.solo_stats.rest_calls_per_lobby() == 3
+
+
+def test_a_lobby_someone_joins_does_not_expire(tmp_path, monkeypatch):
+    """
+    Once a second player joins, the timer should be cancelled and the countdown deleted.
+    """
+    channel = _FakeChannel()
+    cog = _cog(tmp_path, monkeypatch, channel)
+
+    async def run():
+        lobby = cog.lobby_service.create_lobby(7, _fake_user(10, "Host"))
+        lobby.main_message = 55
+        cog.restart_solo_lobby_timer(lobby)
+        await asyncio.sleep(0.01)
+        cog.lobby_service.join_lobby(7, _fake_user(11, "Guest"))
+        cog.restart_solo_lobby_timer(lobby)
+        assert 7 in cog._solo_countdowns
+        await asyncio.sleep(0.2)
+        assert not cog._solo_countdowns
+        await cog.cog_unload()
+
+    asyncio.run(run())
+    assert cog.lobby_repo.exists(7)
+    assert [call[0] for call in channel.calls] == ["send", "delete"]
+    assert cog.solo_stats.expired == 0
+
+
+def test_errors_clearing_a_countdown_are_reported(tmp_path, monkeypatch, capsys):
+    """
+    A countdown message update that fails should be reported rather than lost.
+    """
+    channel = _FakeChannel()
+    cog = _cog(tmp_path, monkeypatch, channel)
+
+    def broken(_message_id: int):
+        raise RuntimeError("channel gone")
+
+    async def run():
+        lobby = cog.lobby_service.create_lobby(7, _fake_user(10, "Host"))
+        lobby.main_message = 55
+        lobby.solo_timer_message = 101
+        cog.lobby_service.join_lobby(7, _fake_user(11, "Guest"))
+        channel.get_partial_message = broken
+        cog.restart_solo_lobby_timer(lobby)
+        await asyncio.sleep(0.05)
+        await cog.cog_unload()
+
+    asyncio.run(run())
+    assert "Solo lobby timer error: channel gone" in capsys.readouterr().out
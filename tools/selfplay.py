@@ -0,0 +1,299 @@
+"""
+Generates a training dataset from bot self-play. Games are played with the simulation engine and
+every bot decision becomes one row, streamed to numbered compressed `.npz` chunks so memory stays
+bounded by one chunk no matter how many games are played. Each worker process writes a checkpoint
+after every chunk, and a run started again with `--resume` continues after the last chunk written.
+
+Usage: python3 -m tools.selfplay --games 10000 --out data/selfplay --workers 4
+"""
+
+#!/usr/bin/python3
+# pylint: disable=import-error
+
+import argparse
+import json
+import multiprocessing
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from models import bot
+from models.deck import NUM_FACES, card_face, color_index
+from models.simulation import DecisionRecord, play_game
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - only hit when the bots extra is absent
+    np = None
+
+MAX_OPPONENTS = 9
+DRAW_ACTION = NUM_FACES
+
+
+def require_numpy() -> None:
+    """
+    Exits with install instructions if NumPy, from the bots extra, is missing.
+    """
+    if np is None:
+        raise SystemExit(
+            "Install bot deps first with: pip install --editable '.[bots]'"
+        )
+
+
+def row_dtypes() -> dict[str, tuple]:
+    """
+    Returns the name, dtype and per-row shape of every column in a chunk.
+    """
+    return {
+        "game": (np.uint32, ()),
+        "turn": (np.uint16, ()),
+        "strategy": (np.uint8, ()),
+        "hand": (np.uint8, (NUM_FACES,)),
+        "top_face": (np.uint8, ()),
+        "top_color": (np.uint8, ()),
+        "opponent_hand_sizes": (np.uint8, (MAX_OPPONENTS,)),
+        "action_face": (np.uint8, ()),
+        "action_color": (np.uint8, ()),
+        "outcome": (np.int8, ()),
+    }
+
+
+class ChunkWriter:
+    """
+    Buffers rows in preallocated arrays and writes them out as `<prefix>-<n>.npz` once a chunk is
+    full. Chunks only end on game boundaries so a checkpoint never splits a game.
+    """
+
+    def __init__(self, out_dir: Path, prefix: str, capacity: int, next_chunk: int = 0):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.capacity = capacity
+        self.next_chunk = next_chunk
+        self.filled = 0
+        self._columns = {
+            name: np.zeros((capacity, *shape), dtype=dtype)
+            for name, (dtype, shape) in row_dtypes().items()
+        }
+
+    def fits(self, rows: int) -> bool:
+        """
+        Returns whether `rows` more rows fit in the current chunk.
+        """
+        return self.filled + rows <= self.capacity
+
+    def add_game(self, game_id: int, records: list[DecisionRecord], winner) -> None:
+        """
+        Encodes the decisions of one finished game into the current chunk.
+        """
+        for record in records:
+            row = self.filled
+            columns = self._columns
+            columns["game"][row] = game_id
+            columns["turn"][row] = record.turn
+            columns["strategy"][row] = record.strategy.value
+            columns["hand"][row] = 0
+            for card in record.hand:
+                columns["hand"][row, card_face(card)] += 1
+            columns["top_face"][row] = card_face(record.top)
+            columns["top_color"][row] = color_index(record.top.color)
+            sizes = record.opponent_hand_sizes[:MAX_OPPONENTS]
+            columns["opponent_hand_sizes"][row] = 0
+            columns["opponent_hand_sizes"][row, : len(sizes)] = [
+                min(size, 255) for size in sizes
+            ]
+            face = record.action_face
+            columns["action_face"][row] = DRAW_ACTION if face is None else face
+            columns["action_color"][row] = record.action_color
+            if winner is None:
+                columns["outcome"][row] = 0
+            else:
+                columns["outcome"][row] = 1 if winner == record.player else -1
+            self.filled += 1
+
+    def flush(self) -> Path | None:
+        """
+        Writes the buffered rows as the next chunk, atomically, and starts a new chunk.
+        """
+        if self.filled == 0:
+            return None
+
+        path = self.out_dir / f"{self.prefix}-{self.next_chunk:05d}.npz"
+        temp_path = path.with_suffix(".tmp")
+        with temp_path.open("wb") as chunk_file:
+            np.savez_compressed(
+                chunk_file,
+                **{
+                    name: column[: self.filled]
+                    for name, column in self._columns.items()
+                },
+            )
+        temp_path.replace(path)
+
+        self.next_chunk += 1
+        self.filled = 0
+        return path
+
+
+@dataclass
+class WorkerConfig:
+    """
+    The share of a run handled by one worker process: games `worker, worker + workers, ...`.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    worker: int
+    workers: int
+    games: int
+    seed: int
+    strategies: list[bot.Strategy]
+    out_dir: Path
+    chunk_rows: int
+    max_turns: int
+    resume: bool
+    endgame_solver: bool = True
+
+
+def _checkpoint_path(config: WorkerConfig) -> Path:
+    return config.out_dir / f"worker{config.worker}.checkpoint.json"
+
+
+def _load_checkpoint(config: WorkerConfig) -> dict:
+    path = _checkpoint_path(config)
+    if not config.resume or not path.exists():
+        return {"next_game": config.worker, "next_chunk": 0, "rows": 0}
+
+    checkpoint = json.loads(path.read_text())
+    if checkpoint.get("workers") != config.workers:
+        raise SystemExit("Resume with the same --workers as the original run.")
+    return checkpoint
+
+
+def _save_checkpoint(config: WorkerConfig, next_game: int, writer, rows: int) -> None:
+    path = _checkpoint_path(config)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps(
+            {
+                "workers": config.workers,
+                "next_game": next_game,
+                "next_chunk": writer.next_chunk,
+                "rows": rows,
+            }
+        )
+    )
+    temp_path.replace(path)
+
+
+def run_worker(config: WorkerConfig) -> tuple[int, float]:
+    """
+    Plays this worker's games, returning how many rows it wrote and how long it took.
+    """
+    checkpoint = _load_checkpoint(config)
+    writer = ChunkWriter(
+        config.out_dir,
+        f"worker{config.worker}",
+        config.chunk_rows,
+        checkpoint["next_chunk"],
+    )
+    rows_before = rows = checkpoint["rows"]
+    start = time.perf_counter()
+
+    for game_id in range(checkpoint["next_game"], config.games, config.workers):
+        records: list[DecisionRecord] = []
+        result = play_game(
+            config.strategies,
+            seed=config.seed + game_id,
+            on_decision=records.append,
+            max_turns=config.max_turns,
+            endgame_solver=config.endgame_solver,
+        )
+
+        if not writer.fits(len(records)):
+            writer.flush()
+            _save_checkpoint(config, game_id, writer, rows)
+
+        writer.add_game(game_id, records, result.winner)
+        rows += len(records)
+
+    writer.flush()
+    # The next game this worker would play, so a later run with more games can resume from it.
+    next_game = config.games + (config.worker - config.games) % config.workers
+    _save_checkpoint(config, next_game, writer, rows)
+    return rows - rows_before, time.perf_counter() - start
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument(
+        "--strategies",
+        default="random",
+        help="Comma separated strategies, assigned to seats in turn (e.g. random,counting).",
+    )
+    parser.add_argument("--out", type=Path, default=Path("data/selfplay"))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=50_000,
+        help="Rows per chunk. Must be at least --max-turns, since a game never spans chunks.",
+    )
+    parser.add_argument("--max-turns", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument(
+        "--no-endgame",
+        action="store_true",
+        help="Keep bots on their strategy in two player endgames instead of searching exactly.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Runs self-play with the options on the command line and reports rows/sec per core.
+    """
+    require_numpy()
+    args = _parse_args(argv)
+    if args.chunk_rows < args.max_turns:
+        raise SystemExit(
+            "--chunk-rows must be at least --max-turns, so every game fits in one chunk."
+        )
+    names = [name.strip().upper() for name in args.strategies.split(",")]
+    seats = [bot.Strategy[names[i % len(names)]] for i in range(args.players)]
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    configs = [
+        WorkerConfig(
+            worker=worker,
+            workers=args.workers,
+            games=args.games,
+            seed=args.seed,
+            strategies=seats,
+            out_dir=args.out,
+            chunk_rows=args.chunk_rows,
+            max_turns=args.max_turns,
+            resume=args.resume,
+            endgame_solver=not args.no_endgame,
+        )
+        for worker in range(args.workers)
+    ]
+
+    if args.workers == 1:
+        results = [run_worker(configs[0])]
+    else:
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(run_worker, configs)
+
+    for worker, (rows, elapsed) in enumerate(results):
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"worker {worker}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+    total_rows = sum(rows for rows, _ in results)
+    per_core = sum(rows / elapsed for rows, elapsed in results if elapsed > 0)
+    print(f"total: {total_rows} rows, {per_core / len(results):,.0f} rows/sec per core")
+
+
+if __name__ == "__main__":
+    main()
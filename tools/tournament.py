@@ -0,0 +1,320 @@
+"""
+Plays every bot strategy against every other over the same seeded games and reports win rates
+with 95% confidence intervals, decision latency and throughput. Games are spread over worker
+processes. The result is written as JSON with stable key order so runs can be diffed between
+commits, and `--baseline` fails the run if a strategy's decisions got much slower.
+
+Usage: python3 -m tools.tournament --games 500 --workers 4 --out tournament.json
+"""
+
+#!/usr/bin/python3
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from models import bot
+from models.simulation import play_game
+
+# Two sided z score for a 95% confidence interval.
+_Z95 = 1.959964
+
+
+@dataclass
+class MatchupTask:
+    """
+    A slice of one matchup's games, played by a single worker. Even games seat `first` first and
+    odd games seat `second` first, so both get the same seeds from each seat.
+    """
+
+    first: bot.Strategy
+    second: bot.Strategy
+    games: range
+    seed: int
+    max_turns: int
+    endgame_solver: bool
+
+
+@dataclass
+class MatchupResult:
+    """
+    What a worker sends back for a task: results by strategy name and every decision time.
+    """
+
+    first: bot.Strategy
+    second: bot.Strategy
+    games: int = 0
+    ties: int = 0
+    turns: int = 0
+    wins: dict[str, int] = field(default_factory=dict)
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+
+
+def run_task(task: MatchupTask) -> MatchupResult:
+    """
+    Plays a task's games.
+    """
+    result = MatchupResult(task.first, task.second)
+    for strategy in (task.first, task.second):
+        result.wins[strategy.name] = 0
+        result.latencies[strategy.name] = []
+
+    for game in task.games:
+        seats = [task.first, task.second]
+        if game % 2:
+            seats.reverse()
+        played = play_game(
+            seats,
+            seed=task.seed + game,
+            max_turns=task.max_turns,
+            endgame_solver=task.endgame_solver,
+        )
+
+        result.games += 1
+        result.turns += played.turns
+        if played.winner is None:
+            result.ties += 1
+        else:
+            result.wins[played.strategies[played.winner].name] += 1
+        for player, times in played.decision_times.items():
+            result.latencies[played.strategies[player].name].extend(times)
+
+    return result
+
+
+def wilson_interval(successes: int, trials: int) -> tuple[float, float]:
+    """
+    Returns the 95% Wilson score interval for a success rate, which behaves well near 0 and 1.
+    """
+    if trials == 0:
+        return (0.0, 1.0)
+    rate = successes / trials
+    denominator = 1 + _Z95**2 / trials
+    center = (rate + _Z95**2 / (2 * trials)) / denominator
+    margin = (
+        _Z95
+        * math.sqrt(rate * (1 - rate) / trials + _Z95**2 / (4 * trials**2))
+        / denominator
+    )
+    return (max(center - margin, 0.0), min(center + margin, 1.0))
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def _round(value: float) -> float:
+    return round(value, 4)
+
+
+def _add_first_win_rate(matchup: dict, first: str) -> None:
+    wins, games = matchup["wins"][first], matchup["games"]
+    low, high = wilson_interval(wins, games)
+    matchup["first_win_rate"] = _round(wins / games if games else 0.0)
+    matchup["first_win_rate_ci95"] = [_round(low), _round(high)]
+
+
+def _strategy_summary(total: dict, latencies: list[float]) -> dict:
+    times = sorted(latencies)
+    low, high = wilson_interval(total["wins"], total["games"])
+    return {
+        "games": total["games"],
+        "wins": total["wins"],
+        "win_rate": _round(total["wins"] / total["games"] if total["games"] else 0),
+        "win_rate_ci95": [_round(low), _round(high)],
+        "decisions": len(times),
+        "mean_latency_us": _round(sum(times) / len(times) * 1e6 if times else 0),
+        "p99_latency_us": _round(_percentile(times, 0.99) * 1e6),
+    }
+
+
+def summarize(results: list[MatchupResult], elapsed: float, config: dict) -> dict:
+    """
+    Combines worker results into the report written to JSON.
+    """
+    matchups: dict[str, dict] = {}
+    totals: dict[str, dict] = {}
+    latencies: dict[str, list[float]] = {}
+
+    for result in results:
+        name = f"{result.first.name} vs {result.second.name}"
+        matchup = matchups.setdefault(
+            name,
+            {"games": 0, "ties": 0, "wins": dict.fromkeys(result.wins, 0)},
+        )
+        matchup["games"] += result.games
+        matchup["ties"] += result.ties
+        for strategy, wins in result.wins.items():
+            matchup["wins"][strategy] += wins
+            total = totals.setdefault(strategy, {"games": 0, "wins": 0})
+            total["games"] += result.games
+            total["wins"] += wins
+        for strategy, times in result.latencies.items():
+            latencies.setdefault(strategy, []).extend(times)
+
+    for name, matchup in matchups.items():
+        _add_first_win_rate(matchup, name.split(" vs ")[0])
+
+    strategies = {
+        strategy: _strategy_summary(total, latencies.get(strategy, []))
+        for strategy, total in totals.items()
+    }
+
+    games = sum(result.games for result in results)
+    return {
+        "config": config,
+        "strategies": strategies,
+        "matchups": matchups,
+        "throughput": {
+            "games": games,
+            "turns": sum(result.turns for result in results),
+            "elapsed_sec": _round(elapsed),
+            "games_per_sec": _round(games / elapsed if elapsed > 0 else 0.0),
+        },
+    }
+
+
+def latency_regressions(baseline: dict, report: dict, max_slowdown: float) -> list[str]:
+    """
+    Lists strategies whose mean decision latency grew by more than `max_slowdown` times.
+    """
+    regressions = []
+    for strategy, stats in report["strategies"].items():
+        before = baseline.get("strategies", {}).get(strategy)
+        if not before or before["mean_latency_us"] <= 0:
+            continue
+        slowdown = stats["mean_latency_us"] / before["mean_latency_us"]
+        if slowdown > max_slowdown:
+            regressions.append(
+                f"{strategy}: mean decision latency {before['mean_latency_us']:.1f} us -> "
+                f"{stats['mean_latency_us']:.1f} us ({slowdown:.1f}x)"
+            )
+    return regressions
+
+
+def make_tasks(
+    strategies: list[bot.Strategy], args: argparse.Namespace
+) -> list[MatchupTask]:
+    """
+    Splits every pairing of strategies into tasks of at most `args.chunk_games` games.
+    """
+    tasks = []
+    for first, second in itertools.combinations(strategies, 2):
+        for start in range(0, args.games, args.chunk_games):
+            tasks.append(
+                MatchupTask(
+                    first=first,
+                    second=second,
+                    games=range(start, min(start + args.chunk_games, args.games)),
+                    seed=args.seed,
+                    max_turns=args.max_turns,
+                    endgame_solver=args.endgame,
+                )
+            )
+    return tasks
+
+
+def run(args: argparse.Namespace) -> dict:
+    """
+    Runs the tournament described by the parsed arguments and returns its report.
+    """
+    if args.strategies:
+        names = [name.strip().upper() for name in args.strategies.split(",")]
+        strategies = [bot.Strategy[name] for name in names]
+    else:
+        strategies = list(bot.Strategy)
+    tasks = make_tasks(strategies, args)
+
+    start = time.perf_counter()
+    if args.workers == 1:
+        results = [run_task(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(run_task, tasks, chunksize=1)
+    elapsed = time.perf_counter() - start
+
+    config = {
+        "games_per_matchup": args.games,
+        "seed": args.seed,
+        "max_turns": args.max_turns,
+        "endgame_solver": args.endgame,
+        "strategies": [strategy.name for strategy in strategies],
+        "workers": args.workers,
+    }
+    return summarize(results, elapsed, config)
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--games", type=int, default=200, help="Games per matchup.")
+    parser.add_argument(
+        "--strategies",
+        default="",
+        help="Comma separated strategies to include; all of them by default.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="Worker processes. More workers than cores inflates the measured latencies.",
+    )
+    parser.add_argument("--chunk-games", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=2_000)
+    parser.add_argument(
+        "--endgame",
+        action="store_true",
+        help="Let bots use the exact endgame solver. It is much slower and plays the same for "
+        "every strategy, so it is off by default.",
+    )
+    parser.add_argument("--out", type=Path, default=Path("tournament.json"))
+    parser.add_argument(
+        "--baseline", type=Path, help="A previous result to compare to."
+    )
+    parser.add_argument("--max-slowdown", type=float, default=3.0)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the tournament, prints a summary and writes the JSON result. Returns 1 if decisions got
+    slower than `--max-slowdown` compared to `--baseline`.
+    """
+    args = _parse_args(argv)
+    report = run(args)
+    args.out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+    for strategy, stats in report["strategies"].items():
+        low, high = stats["win_rate_ci95"]
+        print(
+            f"{strategy:<10} win rate {stats['win_rate']:.3f} [{low:.3f}, {high:.3f}]  "
+            f"latency mean {stats['mean_latency_us']:.1f} us, "
+            f"p99 {stats['p99_latency_us']:.1f} us"
+        )
+    throughput = report["throughput"]
+    print(
+        f"{throughput['games']} games in {throughput['elapsed_sec']:.2f}s "
+        f"({throughput['games_per_sec']:.1f} games/sec)"
+    )
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = latency_regressions(baseline, report, args.max_slowdown)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
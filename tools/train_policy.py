@@ -0,0 +1,140 @@
+"""
+Builds the POLICY bot's lookup table from a self-play dataset written by `tools.selfplay`. Every
+row is reduced to its abstract state and move (see `models.policy`), and each move is scored by how
+often the player who made it went on to win.
+
+Usage: python3 -m tools.train_policy --data data/selfplay --out data/policy.tbl
+"""
+
+#!/usr/bin/python3
+# pylint: disable=import-error
+
+import argparse
+import time
+from pathlib import Path
+
+from models import policy
+from models.deck import COLORS, DRAW_FOUR_FACE, NO_COLOR, WILD_FACE
+from tools.selfplay import DRAW_ACTION, require_numpy
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - only hit when the bots extra is absent
+    np = None
+
+
+def _face_kinds():
+    kinds = np.full(DRAW_ACTION + 1, -1, dtype=np.int64)
+    for face in range(WILD_FACE):
+        symbol = face % 13
+        kinds[face] = policy.NUMBER_KIND if symbol < 10 else symbol - 9
+    kinds[WILD_FACE] = policy.WILD_KIND
+    kinds[DRAW_FOUR_FACE] = policy.DRAW_FOUR_KIND
+    return kinds
+
+
+def state_indices(columns: dict):
+    """
+    Computes `policy.state_index` for every row of a chunk at once.
+    """
+    cap = policy.COLOR_COUNT_CAP
+    hands = columns["hand"][:, :WILD_FACE].astype(np.int64)
+    held = hands.reshape(-1, len(COLORS), 13).sum(axis=2)
+    weights = (cap + 1) ** np.arange(len(COLORS))
+    counts = (np.minimum(held, cap) * weights).sum(axis=1)
+
+    top_kinds = _face_kinds()[columns["top_face"]]
+    top_colors = np.minimum(columns["top_color"].astype(np.int64), NO_COLOR)
+    tops = top_colors * policy.NUM_KINDS + top_kinds
+
+    next_sizes = columns["opponent_hand_sizes"][:, 0]
+    buckets = np.searchsorted(policy.HAND_SIZE_BUCKETS, next_sizes, side="left")
+
+    return (counts * policy.NUM_TOPS + tops) * (
+        len(policy.HAND_SIZE_BUCKETS) + 1
+    ) + buckets
+
+
+def move_indices(columns: dict):
+    """
+    Computes `policy.move_index` for every row of a chunk, with -1 for rows where the bot drew.
+    """
+    faces = columns["action_face"].astype(np.int64)
+    kinds = _face_kinds()[faces]
+    card_colors = np.where(faces < WILD_FACE, faces // 13, 0)
+    chosen_colors = columns["action_color"].astype(np.int64)
+
+    colored = card_colors * policy.WILD_KIND + kinds
+    wild = (
+        len(COLORS) * policy.WILD_KIND
+        + (kinds - policy.WILD_KIND) * len(COLORS)
+        + chosen_colors
+    )
+    moves = np.where(kinds < policy.WILD_KIND, colored, wild)
+    return np.where(faces == DRAW_ACTION, -1, moves)
+
+
+def train(chunks: list[Path], min_visits: int = 5) -> tuple:
+    """
+    Scores every (state, move) seen at least `min_visits` times by its smoothed win rate, returning
+    the scores and how many rows were used.
+    """
+    size = policy.NUM_STATES * policy.NUM_MOVES
+    visits = np.zeros(size, dtype=np.float64)
+    wins = np.zeros(size, dtype=np.float64)
+    rows = 0
+
+    for chunk in chunks:
+        with np.load(chunk) as loaded:
+            columns = {name: loaded[name] for name in loaded.files}
+        moves = move_indices(columns)
+        played = moves >= 0
+        cells = state_indices(columns)[played] * policy.NUM_MOVES + moves[played]
+        # A tie or unfinished game counts as half a win.
+        won = (columns["outcome"][played].astype(np.float64) + 1.0) / 2.0
+
+        visits += np.bincount(cells, minlength=size)
+        wins += np.bincount(cells, weights=won, minlength=size)
+        rows += int(played.sum())
+
+    rate = (wins + 1.0) / (visits + 2.0)
+    scores = 1 + np.rint(rate * (policy.MAX_SCORE - 1)).astype(np.uint16)
+    scores[visits < max(min_visits, 1)] = policy.UNSEEN_SCORE
+    return scores, rows
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--data", type=Path, default=Path("data/selfplay"))
+    parser.add_argument("--out", type=Path, default=Path("data/policy.tbl"))
+    parser.add_argument("--min-visits", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Trains a table from the chunks in `--data` and writes it to `--out`.
+    """
+    require_numpy()
+    args = _parse_args(argv)
+    chunks = sorted(args.data.glob("worker*-*.npz"))
+    if not chunks:
+        raise SystemExit(
+            f"No self-play chunks in {args.data}; run tools.selfplay first."
+        )
+
+    start = time.perf_counter()
+    scores, rows = train(chunks, args.min_visits)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    policy.write_table(args.out, scores.tolist())
+    elapsed = time.perf_counter() - start
+
+    known = int((scores.reshape(policy.NUM_STATES, -1) != 0).any(axis=1).sum())
+    print(
+        f"trained on {rows} moves from {len(chunks)} chunks in {elapsed:.2f}s, "
+        f"{known}/{policy.NUM_STATES} states known"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Provides the user interface for a game.
 """
 
 from __future__ import annotations
+from functools import partial
 from typing import TYPE_CHECKING
 
 import discord
@@ -43,8 +44,14 @@ class GameUI(Interactions):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            result = self.game_service.call_uno(
-                interaction.channel_id, interaction.user.id
+            result = await self._renderer.actors.run(
+                interaction.channel_id,
+                partial(
+                    self.game_service.call_uno,
+                    interaction.channel_id,
+                    interaction.user.id,
+                ),
+                render=True,
             )
         except GameError as e:
             embed = self._renderer.lobby_views.error_embed(
@@ -53,8 +60,6 @@ class GameUI(Interactions):
             await interaction.followup.send(embeds=[embed], ephemeral=e.private)
             return
 
-        await self._renderer.update_from_interaction(interaction, self.lobby)
-
         match result["result"]:
             case "safe":
                 target = result["target"]
@@ -135,26 +140,30 @@ class GameUI(Interactions):
         Draws a card and passes a player's turn. Pressed if the player cannot play or does not wish
         to play.
         """
+        await interaction.response.defer()
 
         try:
-            self.game_service.draw(interaction.channel_id, interaction.user.id)
+            await self._renderer.actors.run(
+                interaction.channel_id,
+                partial(
+                    self.game_service.draw, interaction.channel_id, interaction.user.id
+                ),
+                render=True,
+            )
         except GameError as e:
             embed = self._renderer.lobby_views.error_embed(
                 "Not your turn!" if e.title == "" else e.title, str(e)
             )
-            await interaction.response.send_message(embeds=[embed], ephemeral=e.private)
+            await interaction.followup.send(embeds=[embed], ephemeral=e.private)
 
             return
 
-        await self._renderer.update_from_interaction(interaction, self.lobby)
-
         cog = interaction.client.get_cog("UnoCog")
         if cog is not None:
             await cog.dm_current_player_turn(self.lobby, interaction.channel_id)
             cog.start_afk_timer(interaction.channel_id, self.lobby)
         guild = interaction.guild.id
         cid = interaction.channel_id
-        user = await interaction.client.fetch_user(interaction.user.id)
         hand = self.lobby.game.hand(interaction.user.id)
         embed = self._renderer.hand_views.hand_embed(
             hand,
@@ -162,7 +171,7 @@ class GameUI(Interactions):
             Link to Game: https://discord.com/channels/{guild}/{cid}/{self.lobby.main_message}""",
         )
         try:
-            await user.send(embed=embed)
+            await self._renderer.discord_cache.send_dm(interaction.user.id, embed=embed)
         except (discord.Forbidden, discord.HTTPException):
             pass
 
@@ -185,7 +194,14 @@ class GameUI(Interactions):
             return
 
         try:
-            self.game_service.delete_game(interaction.channel_id, interaction.user)
+            await self._renderer.actors.run(
+                interaction.channel_id,
+                partial(
+                    self.game_service.delete_game,
+                    interaction.channel_id,
+                    interaction.user,
+                ),
+            )
         except GameError as e:
             embed = self._renderer.lobby_views.error_embed(
                 "Game Error" if e.title == "" else e.title, str(e)
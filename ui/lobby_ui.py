@@ -3,6 +3,7 @@ Providers the user interface for the lobby.
 """
 
 from __future__ import annotations
+from functools import partial
 from typing import TYPE_CHECKING
 
 import discord.ui
@@ -43,16 +44,18 @@ class LobbyUI(Interactions):
         """
 
         cid = require_channel_id(interaction)
+        await interaction.response.defer()
 
         try:
-            self.lobby_service.join_lobby(cid, interaction.user)
+            await self._renderer.actors.run(
+                cid,
+                partial(self.lobby_service.join_lobby, cid, interaction.user),
+                render=True,
+            )
         except GameError as e:
             await self._renderer.lobby_views.render_error("Game Join", e, interaction)
             return
 
-        lobby = self.lobby_service.get_lobby(cid)
-        await self._renderer.update_from_interaction(interaction, lobby)
-
     @discord.ui.button(
         label="🚫 Leave",
         style=discord.ButtonStyle.gray,
@@ -66,9 +69,14 @@ class LobbyUI(Interactions):
         """
 
         cid = require_channel_id(interaction)
+        await interaction.response.defer()
 
         try:
-            self.lobby_service.leave_lobby(cid, interaction.user)
+            await self._renderer.actors.run(
+                cid,
+                partial(self.lobby_service.leave_lobby, cid, interaction.user),
+                render=True,
+            )
         except GameError as e:
             await self._renderer.lobby_views.render_error("Leave", e, interaction)
 
@@ -80,8 +88,6 @@ class LobbyUI(Interactions):
         if cog:
             cog.restart_solo_lobby_timer(lobby)
 
-        await self._renderer.update_from_interaction(interaction, lobby)
-
     @discord.ui.button(
         label="🚀 Start Game",
         style=discord.ButtonStyle.success,
@@ -105,15 +111,14 @@ class LobbyUI(Interactions):
             await interaction.response.send_message(embeds=[embed], ephemeral=True)
             return
 
-        self.lobby_service.start_lobby(cid)
-
-        await self._renderer.update_from_interaction(interaction, lobby)
+        await interaction.response.defer()
+        await self._renderer.actors.run(
+            cid, partial(self.lobby_service.start_lobby, cid), render=True
+        )
 
         # Dm every player
-        bot = interaction.client
         guild = interaction.guild.id
         for user_id in lobby.game.players():
-            user = await bot.fetch_user(user_id)
             hand = lobby.game.hand(user_id)
             embed = self._renderer.hand_views.hand_embed(
                 hand,
@@ -122,7 +127,7 @@ class LobbyUI(Interactions):
             )
 
             try:
-                await user.send(embed=embed)
+                await self._renderer.discord_cache.send_dm(user_id, embed=embed)
             except (discord.Forbidden, discord.HTTPException):
                 pass
 
@@ -145,7 +150,9 @@ class LobbyUI(Interactions):
         cid = require_channel_id(interaction)
 
         try:
-            self.lobby_service.disband_lobby(cid, interaction.user)
+            await self._renderer.actors.run(
+                cid, partial(self.lobby_service.disband_lobby, cid, interaction.user)
+            )
         except GameError as e:
             await self._renderer.lobby_views.render_error(
                 "Must Be Host", e, interaction
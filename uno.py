@@ -14,7 +14,37 @@ intents = discord.Intents.default()
 # message_content not needed for slash commands, but harmless:
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="/", intents=intents)
+
+def build_bot() -> commands.Bot:
+    """
+    Builds the bot. With `UNO_SHARD_COUNT` set to a number, or to `auto` to let Discord choose,
+    one process runs every shard through AutoShardedBot. Adding `UNO_SHARD_IDS`, such as `0,1`,
+    runs only those shards, so the shards can be split over several processes; each restores
+    only the lobbies of its own guilds.
+    """
+    shard_count = os.getenv("UNO_SHARD_COUNT", "").strip().lower()
+    shard_ids = os.getenv("UNO_SHARD_IDS", "").strip()
+    if not shard_count:
+        if shard_ids:
+            raise RuntimeError("UNO_SHARD_IDS needs UNO_SHARD_COUNT to be set too.")
+        return commands.Bot(command_prefix="/", intents=intents)
+
+    if shard_count == "auto":
+        if shard_ids:
+            raise RuntimeError("UNO_SHARD_IDS needs a numeric UNO_SHARD_COUNT.")
+        return commands.AutoShardedBot(command_prefix="/", intents=intents)
+
+    return commands.AutoShardedBot(
+        command_prefix="/",
+        intents=intents,
+        shard_count=int(shard_count),
+        shard_ids=(
+            [int(shard_id) for shard_id in shard_ids.split(",")] if shard_ids else None
+        ),
+    )
+
+
+bot = build_bot()
 
 
 @bot.event
@@ -28,6 +58,12 @@ async def on_ready() -> None:
     if ext not in bot.extensions:
         await bot.load_extension(ext)
 
+    # Commands are global, so when shards run in several processes only shard 0's syncs them.
+    shard_ids = getattr(bot, "shard_ids", None) or [0]
+    if 0 not in shard_ids:
+        print(f"Ready as {bot.user} on shards {shard_ids}")
+        return
+
     # Fast sync: set GUILD_ID in .env to sync instantly in that server
     guild_id = os.getenv("GUILD_ID")
     if guild_id:
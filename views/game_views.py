@@ -2,6 +2,7 @@
 Provides a view into the current game state.
 """
 
+from collections import Counter
 from datetime import timezone
 import discord
 from models.deck import (
@@ -15,7 +16,9 @@ from models.deck import (
     DrawFourWild,
     Card,
 )
+from models.game_state import GameState, Phase
 from models.lobby_model import Lobby
+from services.game_service import AfkSkip
 from utils.card_image import get_card_filename
 from utils.utils import mention
 from views.base_views import BaseViews
@@ -131,3 +134,50 @@ class GameViews(BaseViews):
                 )
 
         return embed, file
+
+    @staticmethod
+    def afk_skip_message(skip: AfkSkip, game: GameState) -> str:
+        """
+        Describes a turn that was skipped because the player was AFK.
+        """
+        player_id = skip.player_id
+        if game.phase() == Phase.FINISHED and game.ended_in_draw():
+            return (
+                f" <@{player_id}> was AFK. No cards were available to draw, "
+                "so the game ended in a draw."
+            )
+        if skip.drawn == 0:
+            return (
+                f" <@{player_id}> was AFK. No cards were available to draw, "
+                "and their turn was skipped."
+            )
+        if skip.drawn == 1:
+            return f" <@{player_id}> was AFK. They drew 1 card and were skipped."
+        return (
+            f" <@{player_id}> was AFK. They drew {skip.drawn} cards and were skipped."
+        )
+
+    @staticmethod
+    def catch_up_summary(skips: list[AfkSkip], game: GameState) -> str | None:
+        """
+        Describes the AFK turns applied for the time the bot was offline, one line per player.
+        """
+        if not skips:
+            return None
+
+        lines = []
+        for player_id, count in Counter(skip.player_id for skip in skips).items():
+            times = "once" if count == 1 else f"{count} times"
+            lines.append(f"<@{player_id}> was AFK and skipped {times}.")
+        lines.extend(
+            f"<@{skip.player_id}> has been kicked for being AFK."
+            for skip in skips
+            if skip.kicked
+        )
+        if game.phase() == Phase.FINISHED:
+            lines.append(
+                "The game ended in a draw."
+                if game.ended_in_draw()
+                else "Game ended due to a lack of players."
+            )
+        return "While the bot was offline:\n" + "\n".join(lines)
@@ -0,0 +1,117 @@
+"""
+Provides the tutorial and command reference.
+"""
+
+import discord
+
+from views.base_views import BaseViews
+
+
+class HelpViews(BaseViews):
+    """
+    The views explaining how to play and which commands the bot has.
+    """
+
+    def tutorial_embed(self) -> discord.Embed:
+        """
+        Creates an embed explaining how to use the UNO bot.
+        """
+        embed = discord.Embed(
+            title="UNO Bot Tutorial",
+            description="Learn how to start, play, and win a game of UNO using this bot.",
+            color=discord.Color.blue(),
+        )
+
+        embed.add_field(
+            name="Goal",
+            value="Be the first player to get rid of all your cards.",
+            inline=False,
+        )
+
+        embed.add_field(
+            name="How to Start",
+            value="Use `/create` to create a lobby and `/join` to join the game.",
+            inline=False,
+        )
+
+        embed.add_field(
+            name="How to Play",
+            value=(
+                "On your turn, use `/play <card_index> <color>` to play a card from your "
+                "hand. `card_index` is the number shown in your hand view. `color` is only "
+                "needed for wild cards. You can play a card that matches the current color "
+                "or number. If you cannot play, draw a card."
+            ),
+            inline=False,
+        )
+
+        embed.add_field(
+            name="Calling UNO",
+            value=(
+                "When you are down to one card, you should call UNO. Make sure to follow "
+                "normal UNO gameplay rules during the match."
+            ),
+            inline=False,
+        )
+
+        embed.add_field(
+            name="Useful Commands",
+            value=(
+                "`/create` — create a game lobby\n"
+                "`/join` — join a game\n"
+                "`/play` — play a card on your turn\n"
+                "`/leave` — leave the game\n"
+                "`/help` — view command help\n"
+                "`/tutorial` — show this tutorial"
+            ),
+            inline=False,
+        )
+
+        embed.add_field(
+            name="How to Win",
+            value="The first player with no cards left wins the game.",
+            inline=False,
+        )
+        return embed
+
+    def help_embed(self) -> discord.Embed:
+        """
+        Creates an embed listing the main UNO bot commands.
+        """
+        embed = discord.Embed(
+            title="UNO Bot Command Reference",
+            description=(
+                "Use `/tutorial` if you want the full gameplay guide. "
+                "Use this command for a quick list of what the bot can do."
+            ),
+            color=discord.Color.green(),
+        )
+
+        embed.add_field(
+            name="Lobby Commands",
+            value=(
+                "`/create` — create a game lobby\n"
+                "`/join` — join an existing game\n"
+                "`/leave` — leave the current lobby or game"
+            ),
+            inline=False,
+        )
+
+        embed.add_field(
+            name="Gameplay Commands",
+            value=(
+                "`/play <card_index> <color>` — play a card on your turn\n"
+                "`/kick` — host removes a player from the game"
+            ),
+            inline=False,
+        )
+
+        embed.add_field(
+            name="Help Commands",
+            value=(
+                "`/tutorial` — show the full UNO tutorial and gameplay guide\n"
+                "`/help` — show this quick command reference"
+            ),
+            inline=False,
+        )
+        return embed
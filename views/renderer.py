@@ -10,11 +10,14 @@ from ui.lobby_ui import LobbyUI
 from ui.interactions import Interactions
 from models.game_state import Phase
 from models.lobby_model import Lobby
+from services.channel_actors import ChannelActors
+from services.discord_cache import DiscordCache
 from services.game_service import GameService
 from services.lobby_service import LobbyService
 from views.end_views import EndViews
 from views.game_views import GameViews
 from views.hand_views import HandViews
+from views.help_views import HelpViews
 from views.lobby_views import LobbyViews
 
 
@@ -23,18 +26,25 @@ class Renderer:
     The renderer which compiles and manages all of the views.
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     def __init__(
         self,
         lobby_service: LobbyService,
         game_service: GameService,
+        actors: ChannelActors,
+        discord_cache: DiscordCache,
     ):
         self.lobby_views = LobbyViews()
         self.game_views = GameViews()
         self.end_views = EndViews()
         self.hand_views = HandViews()
+        self.help_views = HelpViews()
 
         self.lobby_service = lobby_service
         self.game_service = game_service
+        self.actors = actors
+        self.discord_cache = discord_cache
 
     def view_for_lobby(self, lobby: Lobby) -> Interactions:
         """
@@ -110,7 +120,7 @@ class Renderer:
 
         channel = bot.get_channel(channel_id)
         if channel is None:
-            channel = await bot.fetch_channel(channel_id)
+            channel = await self.discord_cache.channel(channel_id)
 
         message = await channel.fetch_message(message_id)
 